@@ -0,0 +1,81 @@
+import os
+
+# Serve donor matching from the in-memory roster instead of SQLite
+DONOR_ROSTER_ENABLED = os.getenv("BLOODLINK_DONOR_ROSTER", "1") == "1"
+
+# Notification fan-out: "console" (mock WhatsApp) or "twilio"
+NOTIFICATION_PROVIDER = os.getenv("BLOODLINK_NOTIFICATION_PROVIDER", "console")
+NOTIFICATION_SEND_CONCURRENCY = int(os.getenv("BLOODLINK_NOTIFICATION_CONCURRENCY", "8"))
+
+# Outbox drainer for emergency alerts
+OUTBOX_BATCH_SIZE = int(os.getenv("BLOODLINK_OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_LEASE_SECONDS = 60
+OUTBOX_POLL_SECONDS = 1.0
+OUTBOX_MAX_ATTEMPTS = 5
+
+# /admin/stats: read trigger-maintained counters (else one aggregate query)
+ADMIN_STATS_COUNTERS = os.getenv("BLOODLINK_ADMIN_STATS_COUNTERS", "1") == "1"
+ADMIN_STATS_TTL_SECONDS = float(os.getenv("BLOODLINK_ADMIN_STATS_TTL", "5"))
+
+# Decoded JWT claims kept per token digest (0 disables the cache)
+TOKEN_CACHE_SIZE = int(os.getenv("BLOODLINK_TOKEN_CACHE_SIZE", "10000"))
+
+# Expired-stock sweep: moves units past expiry_date out of available stock
+INVENTORY_SWEEP_SECONDS = float(os.getenv("BLOODLINK_INVENTORY_SWEEP_SECONDS", "3600"))
+INVENTORY_SWEEP_BATCH_SIZE = 500
+
+# POST /bloodbank/inventory/bulk: rows accepted per call, and rows written
+# per transaction so other writers get the writer lock in between
+INVENTORY_BULK_MAX_ROWS = int(os.getenv("BLOODLINK_INVENTORY_BULK_MAX_ROWS", "50000"))
+INVENTORY_BULK_CHUNK_ROWS = int(os.getenv("BLOODLINK_INVENTORY_BULK_CHUNK_ROWS", "1000"))
+
+# Server-sent events (/events/stream): per-subscriber queue bound and limits
+EVENTS_QUEUE_SIZE = int(os.getenv("BLOODLINK_EVENTS_QUEUE_SIZE", "100"))
+EVENTS_MAX_SUBSCRIBERS = int(os.getenv("BLOODLINK_EVENTS_MAX_SUBSCRIBERS", "1000"))
+EVENTS_HEARTBEAT_SECONDS = 15.0
+
+# Offline geocoding (gazetteer table) and donor import
+GEOCODE_CACHE_SIZE = 10000
+DONOR_IMPORT_BATCH_SIZE = int(os.getenv("BLOODLINK_DONOR_IMPORT_BATCH_SIZE", "2000"))
+
+# GET /metrics (Prometheus text): request, SQL and hot-path timings
+METRICS_ENABLED = os.getenv("BLOODLINK_METRICS", "1") == "1"
+
+# Sampling profiler: collapsed stacks for requests slower than the threshold
+PROFILER_ENABLED = os.getenv("BLOODLINK_PROFILER", "0") == "1"
+PROFILER_SLOW_MS = float(os.getenv("BLOODLINK_PROFILER_SLOW_MS", "500"))
+PROFILER_INTERVAL_SECONDS = 0.005
+PROFILER_OUTPUT_DIR = os.getenv("BLOODLINK_PROFILER_DIR", "profiles")
+PROFILER_MAX_DUMPS = 200
+
+# Emergency coalescing: same blood group + grid cell within the window share
+# one match and one alert per donor; donors get at most one new alert per interval
+EMERGENCY_COALESCE_SECONDS = float(os.getenv("BLOODLINK_EMERGENCY_COALESCE_SECONDS", "5"))
+DONOR_ALERT_MIN_INTERVAL_SECONDS = float(os.getenv("BLOODLINK_DONOR_ALERT_MIN_INTERVAL", "600"))
+
+# Notification inbox: read rows older than the retention are archived
+# (or deleted with BLOODLINK_NOTIFICATION_ARCHIVE=0), a batch per transaction
+NOTIFICATION_RETENTION_DAYS = float(os.getenv("BLOODLINK_NOTIFICATION_RETENTION_DAYS", "30"))
+NOTIFICATION_RETENTION_ARCHIVE = os.getenv("BLOODLINK_NOTIFICATION_ARCHIVE", "1") == "1"
+NOTIFICATION_RETENTION_SECONDS = float(os.getenv("BLOODLINK_NOTIFICATION_RETENTION_SECONDS", "3600"))
+NOTIFICATION_RETENTION_BATCH_SIZE = 1000
+
+# Apply pending migrations when a worker starts. For several workers run
+# `python -m app.migrations` once before starting them and set this to 0;
+# workers then only check that nothing is pending.
+MIGRATE_ON_STARTUP = os.getenv("BLOODLINK_MIGRATE_ON_STARTUP", "1") == "1"
+
+# Dashboard read cache (ETag / 304): rendered JSON per user or role, dropped
+# when a table it reads is written; entries and bytes are both bounded
+RESPONSE_CACHE_SIZE = int(os.getenv("BLOODLINK_RESPONSE_CACHE_SIZE", "10000"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("BLOODLINK_RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Every worker polls PRAGMA data_version and drops the cached responses and
+# roster entries that writes from other processes made stale. With more
+# than one worker (gunicorn.conf.py sets BLOODLINK_WORKERS) it also relays
+# live events between them
+WORKERS = int(os.getenv("BLOODLINK_WORKERS", "1"))
+DATA_VERSION_POLL_SECONDS = float(os.getenv("BLOODLINK_DATA_VERSION_POLL", "0.1"))
+ROSTER_PATCH_MAX_USERS = 1000  # more changed users than this reloads the roster
+USER_CHANGES_KEEP = 10000  # user_changes rows kept for lagging workers
+EVENT_LOG_KEEP = 10000  # event_log rows kept for lagging workers
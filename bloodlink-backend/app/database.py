@@ -1,9 +1,327 @@
+import asyncio
+import os
+import queue
 import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
 
-DB_PATH = Path(__file__).resolve().parent.parent / "bloodlink.db"
+from app.config import METRICS_ENABLED
+from app.services import metrics
 
-def get_connection():
-    conn = sqlite3.connect(DB_PATH)
+try:
+    import fcntl
+except ImportError:  # Windows: SQLite's busy timeout is the only writer gate
+    fcntl = None
+
+DB_PATH = Path(os.getenv("BLOODLINK_DB_PATH", Path(__file__).resolve().parent.parent / "bloodlink.db"))
+SCHEMA_PATH = Path(__file__).resolve().parent / "models" / "schema.sql"
+
+# Grid cell size (degrees) used by the spatial donor lookup.
+# Keep in sync with the geo_cell triggers in schema.sql.
+GEO_CELL_DEGREES = 0.1
+GEO_CELL_ROW_WIDTH = 4000  # > 360 / GEO_CELL_DEGREES longitude cells per row
+
+
+# -----------------------------
+# Connection pool
+# -----------------------------
+# Idle connections are reused LIFO; close() hands them back instead of
+# closing. Set BLOODLINK_DB_POOL_SIZE=0 for one connection per call.
+DB_POOL_SIZE = int(os.getenv("BLOODLINK_DB_POOL_SIZE", "16"))
+DB_STATEMENT_CACHE_SIZE = 256
+DB_BUSY_TIMEOUT_SECONDS = 5
+
+DB_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -20000",      # 20 MB page cache
+    "PRAGMA mmap_size = 268435456",    # 256 MB memory-mapped reads
+    "PRAGMA temp_store = MEMORY",
+)
+
+_pool = queue.LifoQueue(maxsize=max(DB_POOL_SIZE, 1))
+
+
+# -----------------------------
+# Query timing
+# -----------------------------
+# execute() covers SQLite's first step; fetch*() covers the rest of the
+# scan. Rows pulled by iterating the cursor are not timed.
+class TimedCursor(sqlite3.Cursor):
+    _sql = ""
+
+    def execute(self, sql, parameters=()):
+        self._sql = sql
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            metrics.observe_sql(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._sql = sql
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            metrics.observe_sql(sql, time.perf_counter() - start)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            metrics.observe_fetch(self._sql, time.perf_counter() - start)
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        try:
+            return super().fetchmany(size if size is not None else self.arraysize)
+        finally:
+            metrics.observe_fetch(self._sql, time.perf_counter() - start)
+
+    def fetchall(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            metrics.observe_fetch(self._sql, time.perf_counter() - start)
+
+
+class TimedConnection(sqlite3.Connection):
+    # Connection.execute() builds its cursor in C without calling cursor(),
+    # so the shortcuts are routed through it explicitly
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = TimedCursor if METRICS_ENABLED else sqlite3.Cursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+class PooledConnection(TimedConnection):
+    def close(self):
+        release_connection(self)
+
+    def discard(self):
+        super().close()
+
+
+def _connect():
+    conn = sqlite3.connect(
+        DB_PATH,
+        factory=PooledConnection,
+        timeout=DB_BUSY_TIMEOUT_SECONDS,
+        check_same_thread=False,  # pooled connections move between threads
+        cached_statements=DB_STATEMENT_CACHE_SIZE,
+    )
+    metrics.inc("bloodlink_db_connections_opened_total", pooled="true")
     conn.row_factory = sqlite3.Row
-    return conn
\ No newline at end of file
+    conn.db_path = DB_PATH
+    conn.in_pool = False
+
+    for pragma in DB_PRAGMAS:
+        conn.execute(pragma)
+
+    return conn
+
+
+def get_connection():
+    if DB_POOL_SIZE <= 0:
+        conn = sqlite3.connect(DB_PATH, factory=TimedConnection, check_same_thread=False)
+        metrics.inc("bloodlink_db_connections_opened_total", pooled="false")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        return _connect()
+
+    if conn.db_path != DB_PATH:
+        conn.discard()
+        return _connect()
+
+    conn.in_pool = False
+    metrics.inc("bloodlink_db_connections_reused_total")
+    return conn
+
+
+def release_connection(conn):
+    if conn.in_pool:
+        return  # already released
+
+    try:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.row_factory = sqlite3.Row
+    except sqlite3.ProgrammingError:
+        return  # connection already closed
+
+    conn.in_pool = True
+    try:
+        _pool.put_nowait(conn)
+    except queue.Full:
+        conn.discard()
+
+
+@contextmanager
+def db_connection():
+    conn = get_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+# FastAPI dependency: conn = Depends(get_db)
+def get_db():
+    with db_connection() as conn:
+        yield conn
+
+
+# -----------------------------
+# Async access (DB executor)
+# -----------------------------
+# sqlite3 blocks, so async handlers hand their database work to a dedicated
+# executor instead of FastAPI's shared ~40-thread pool: one hop per request,
+# with the event loop left free for parsing, auth, SSE and notification I/O.
+# Size it with BLOODLINK_DB_EXECUTOR_THREADS (default: the pool size, so
+# each thread keeps reusing one pooled connection).
+DB_EXECUTOR_THREADS = int(os.getenv("BLOODLINK_DB_EXECUTOR_THREADS", str(max(DB_POOL_SIZE, 1))))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_THREADS, thread_name_prefix="db")
+        return _executor
+
+
+def _call_with_connection(fn, args, kwargs):
+    with db_connection() as conn:
+        return fn(conn, *args, **kwargs)
+
+
+async def run_db(fn, *args, **kwargs):
+    # await run_db(fn, ...) runs fn(conn, ...) on the DB executor with a
+    # pooled connection and returns its result; exceptions propagate
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(),
+        partial(_call_with_connection, fn, args, kwargs)
+    )
+
+
+async def run_db_task(fn, *args, **kwargs):
+    # fn(...) on the DB executor without a pooled connection, for blocking
+    # reads that open their own (donor matching) or run on the roster
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), partial(fn, *args, **kwargs))
+
+
+def shutdown_db_executor():
+    global _executor, _writer
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+        if _writer is not None:
+            _writer.shutdown(wait=True)
+            _writer = None
+
+
+# -----------------------------
+# Single writer
+# -----------------------------
+# SQLite admits one writer at a time; the others retry in its busy handler,
+# sleeping up to 100 ms between tries. Writes are queued instead:
+# run_db_write() hands them to one writer thread per process, and
+# write_lock() holds an exclusive flock on <db>-writer.lock, so writers in
+# other worker processes wait in the kernel and wake as soon as it is
+# released. Readers keep the DB executor and their WAL snapshots.
+_writer = None
+_write_lock = threading.Lock()
+_lock_files = {}  # (path, pid) -> fd; a forked child must not share the parent's
+
+
+def _lock_file():
+    key = (f"{DB_PATH}-writer.lock", os.getpid())
+    fd = _lock_files.get(key)
+    if fd is None:
+        fd = _lock_files[key] = os.open(key[0], os.O_RDWR | os.O_CREAT, 0o644)
+    return fd
+
+
+@contextmanager
+def write_lock():
+    # Take before the transaction's first write; never nest
+    start = time.perf_counter()
+    with _write_lock:
+        fd = _lock_file() if fcntl is not None else None
+        if fd is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        metrics.observe("bloodlink_db_write_lock_wait_seconds", time.perf_counter() - start)
+        try:
+            yield
+        finally:
+            if fd is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def _get_writer():
+    global _writer
+    with _executor_lock:
+        if _writer is None:
+            _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        return _writer
+
+
+def _call_with_write_lock(fn, args, kwargs):
+    with write_lock():
+        return _call_with_connection(fn, args, kwargs)
+
+
+async def run_db_write(fn, *args, **kwargs):
+    # run_db() for functions that write: queued on the writer thread and
+    # run under write_lock()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_writer(),
+        partial(_call_with_write_lock, fn, args, kwargs)
+    )
+
+
+# -----------------------------
+# Spatial grid helpers
+# -----------------------------
+def geo_cell_coords(latitude, longitude):
+    row = int((latitude + 90) / GEO_CELL_DEGREES)
+    col = int((longitude + 180) / GEO_CELL_DEGREES)
+    return row, col
+
+
+def geo_cell(latitude, longitude):
+    row, col = geo_cell_coords(latitude, longitude)
+    return row * GEO_CELL_ROW_WIDTH + col
+
+
+# -----------------------------
+# Schema bootstrap
+# -----------------------------
+def init_db():
+    # Apply pending migrations (app/migrations.py); one SELECT when current
+    from app.migrations import migrate
+    return migrate()
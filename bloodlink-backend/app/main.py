@@ -1,11 +1,28 @@
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI
-from app.database import get_connection
-from pathlib import Path
+from fastapi.responses import PlainTextResponse
+from app import database
+from app.config import MIGRATE_ON_STARTUP, WORKERS
+from app.database import init_db
+from app.migrations import assert_migrated
+from app.middleware.auth_middleware import token_cache_stats
+from app.middleware.metrics_middleware import MetricsMiddleware
+from app.services.notification_service import shutdown_dispatcher
+from app.services import (
+    change_watcher,
+    donor_roster,
+    emergency_coalescer,
+    event_hub,
+    inbox_service,
+    inventory_service,
+    metrics,
+    outbox_service,
+    response_cache,
+)
 from app.routers import admin
 from app.routers import patient
 from app.routers import bloodbank
-from app.routers import auth, users, requests, emergency, hospital
+from app.routers import auth, users, requests, emergency, hospital, events, notifications
 app = FastAPI(title="BloodLink API")
 app.add_middleware(
     CORSMiddleware,
@@ -18,7 +35,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+# Outermost, so CORS preflights and auth failures are timed too
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -28,22 +48,71 @@ app.include_router(hospital.router)
 app.include_router(bloodbank.router)
 app.include_router(patient.router)
 app.include_router(admin.router)
+app.include_router(events.router)
+app.include_router(notifications.router)
 @app.on_event("startup")
 def startup():
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    schema_path = Path("app/models/schema.sql")
-    with open(schema_path, "r") as f:
-        cursor.executescript(f.read())
+    if MIGRATE_ON_STARTUP:
+        init_db()
+    else:
+        assert_migrated()
+    outbox_service.start_drainer()
+    inventory_service.start_sweeper()
+    inbox_service.start_retention()
+    # Always on: other processes (donor_import, other workers) write too
+    change_watcher.start_watcher(relay_events=WORKERS > 1)
 
-    seed_path = Path("app/models/seed.sql")
-    # with open(seed_path, "r") as f:
-    #     cursor.executescript(f.read())
 
-    conn.commit()
-    conn.close()
+@app.on_event("shutdown")
+def shutdown():
+    # Undelivered outbox rows stay in the table for the next worker
+    change_watcher.stop_watcher()
+    outbox_service.stop_drainer()
+    inventory_service.stop_sweeper()
+    inbox_service.stop_retention()
+    shutdown_dispatcher()
+    database.shutdown_db_executor()
 
 @app.get("/")
 def root():
-    return {"message": "BloodLink API Running"}
\ No newline at end of file
+    return {"message": "BloodLink API Running"}
+
+
+# -----------------------------
+# Prometheus scrape endpoint
+# -----------------------------
+@metrics.register_collector
+def _service_gauges():
+    tokens = token_cache_stats()
+    roster = donor_roster.roster_stats()
+    coalescer = emergency_coalescer.coalescer_stats()
+    responses = response_cache.cache_stats()
+    watcher = change_watcher.watcher_stats()
+    gauges = {
+        ("bloodlink_db_pool_idle_connections", ()): database._pool.qsize(),
+        ("bloodlink_token_cache_hits", ()): tokens["hits"],
+        ("bloodlink_token_cache_misses", ()): tokens["misses"],
+        ("bloodlink_token_cache_size", ()): tokens["size"],
+        ("bloodlink_roster_hits", ()): roster["hits"],
+        ("bloodlink_roster_misses", ()): roster["misses"],
+        ("bloodlink_event_subscribers", ()): event_hub.hub_stats()["subscribers"],
+        ("bloodlink_emergency_groups", ()): coalescer["groups"],
+        ("bloodlink_emergency_coalesced", ()): coalescer["joined"],
+        ("bloodlink_emergency_alerts_merged", ()): coalescer["alerts_merged"],
+        ("bloodlink_emergency_alerts_rate_limited", ()): coalescer["alerts_rate_limited"],
+        ("bloodlink_response_cache_hits", ()): responses["hits"],
+        ("bloodlink_response_cache_misses", ()): responses["misses"],
+        ("bloodlink_response_cache_not_modified", ()): responses["not_modified"],
+        ("bloodlink_response_cache_entries", ()): responses["size"],
+        ("bloodlink_response_cache_bytes", ()): responses["bytes"],
+        ("bloodlink_change_watcher_changes", ()): watcher["changes"],
+        ("bloodlink_change_watcher_roster_reloads", ()): watcher["roster_reloads"],
+    }
+    for group, size in roster["partitions"].items():
+        gauges[("bloodlink_roster_donors", (("blood_group", group),))] = size
+    return gauges
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -1,30 +1,107 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 
+from app.config import TOKEN_CACHE_SIZE
+from app.services import metrics
+
 SECRET_KEY = "bloodlink_secret_key"
 ALGORITHM = "HS256"
 
 security = HTTPBearer()
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+# -----------------------------
+# Verified token cache
+# -----------------------------
+# Dashboards poll with the same token, so keep decoded claims (LRU, keyed
+# by token digest) until the token's own exp. Invalid tokens are never cached.
+
+_token_cache = OrderedDict()
+_token_cache_lock = threading.Lock()
+_token_cache_stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+
+def _cached_claims(key, now):
+    with _token_cache_lock:
+        entry = _token_cache.get(key)
+        if entry is None:
+            _token_cache_stats["misses"] += 1
+            return None
+
+        claims, expires_at = entry
+        if expires_at is not None and now >= expires_at:
+            del _token_cache[key]
+            _token_cache_stats["expired"] += 1
+            _token_cache_stats["misses"] += 1
+            return None
+
+        _token_cache.move_to_end(key)
+        _token_cache_stats["hits"] += 1
+        return claims
+
+
+def _store_claims(key, claims):
+    with _token_cache_lock:
+        _token_cache[key] = (claims, claims.get("exp"))
+        _token_cache.move_to_end(key)
+
+        while len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+            _token_cache_stats["evictions"] += 1
+
+
+def decode_token(token: str):
+    if TOKEN_CACHE_SIZE <= 0:
+        with metrics.timer("jwt_decode"):
+            return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+    key = hashlib.sha256(token.encode()).digest()
+    claims = _cached_claims(key, time.time())
+    if claims is None:
+        with metrics.timer("jwt_decode"):
+            claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        _store_claims(key, claims)
+
+    return dict(claims)
+
+
+def token_cache_stats():
+    with _token_cache_lock:
+        lookups = _token_cache_stats["hits"] + _token_cache_stats["misses"]
+        return {
+            **_token_cache_stats,
+            "size": len(_token_cache),
+            "max_size": TOKEN_CACHE_SIZE,
+            "hit_rate": round(_token_cache_stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
+# async: a cached decode is a dict lookup, not worth a threadpool hop
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         return payload
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
 # ✅ Role-based dependency
+# Reuses get_current_user's claims (cached per request by FastAPI and
+# across requests by the token cache), so roles never trigger a decode.
 def require_role(required_roles: list):
-    def role_checker(current_user: dict = Depends(get_current_user)):
+    async def role_checker(current_user: dict = Depends(get_current_user)):
         if current_user.get("role") not in required_roles:
             raise HTTPException(
                 status_code=403,
                 detail="Access denied for this role"
             )
         return current_user
-    return role_checker
\ No newline at end of file
+    return role_checker
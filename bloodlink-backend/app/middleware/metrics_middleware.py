@@ -0,0 +1,59 @@
+import time
+
+from app.config import METRICS_ENABLED
+from app.services import metrics, profiler
+
+
+# -----------------------------
+# Request metrics (pure ASGI)
+# -----------------------------
+# Latency is labelled by the matched route template (/hospital/requests/{id}),
+# never the raw path, so series stay bounded. Streaming responses such as
+# the SSE feed are timed to their first byte; everything else to the last.
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        token = profiler.start_request()
+        state = {"status": 500, "recorded": False, "streaming": False}
+
+        def record():
+            if state["recorded"]:
+                return
+            state["recorded"] = True
+
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            label = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+
+            metrics.observe("bloodlink_http_request_duration_seconds", elapsed, method=method, route=label)
+            metrics.inc("bloodlink_http_requests_total", method=method, route=label, status=str(state["status"]))
+            if token is not None:
+                profiler.finish_request(token, f"{method} {label}", elapsed)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                for name, value in message.get("headers", ()):
+                    if name.lower() == b"content-type" and value.startswith(b"text/event-stream"):
+                        state["streaming"] = True
+
+            await send(message)
+
+            if message["type"] == "http.response.start" and state["streaming"]:
+                record()
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                record()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            record()
@@ -0,0 +1,403 @@
+import argparse
+import hashlib
+import re
+import sqlite3
+
+from app import database
+
+# -----------------------------
+# Versioned schema migrations
+# -----------------------------
+# schema.sql is the current schema. Applying it to an existing database
+# first adds any columns it declares that the live tables lack, then runs
+# its CREATE ... IF NOT EXISTS statements, so additive changes (tables,
+# columns, indexes, triggers) only need a schema.sql edit. Rewrites SQLite
+# cannot do in place and data fixes are the numbered steps below; each runs
+# once. Pending steps and the schema apply commit as one transaction and are
+# recorded in schema_migrations (version 0 holds the schema.sql checksum).
+#
+# Run it once before starting workers:  python -m app.migrations
+# Workers then find nothing pending with a single SELECT. Concurrent runs
+# serialize on BEGIN IMMEDIATE and the loser finds nothing left to do.
+# New indexes are built inside that transaction; in WAL mode readers keep
+# being served from the old snapshot while they build.
+
+MIGRATIONS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        checksum TEXT,
+        applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+# -----------------------------
+# Steps
+# -----------------------------
+def _table_exists(cursor, name):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+    return cursor.fetchone() is not None
+
+
+def _index_exists(cursor, name):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,))
+    return cursor.fetchone() is not None
+
+
+def _rebuild_users_table(cursor):
+    # Older databases were created with a users.role CHECK that predates the
+    # admin/donor roles. SQLite cannot alter a CHECK, so rebuild the table
+    # from schema.sql (create, copy, drop, rename); the schema apply that
+    # follows restores its indexes and triggers.
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'users'")
+    row = cursor.fetchone()
+    if not row or "'donor'" in row[0]:
+        return
+
+    schema_sql = database.SCHEMA_PATH.read_text()
+    match = re.search(r"CREATE TABLE IF NOT EXISTS users \((.*?)\n\);", schema_sql, re.S)
+    cursor.execute("PRAGMA table_info(users)")
+    old_columns = [r[1] for r in cursor.fetchall()]
+
+    cursor.execute("PRAGMA foreign_keys = OFF")
+    cursor.execute(f"CREATE TABLE users_rebuild ({match.group(1)}\n)")
+    cursor.execute("PRAGMA table_info(users_rebuild)")
+    columns = [r[1] for r in cursor.fetchall() if r[1] in old_columns]
+
+    column_list = ", ".join(columns)
+    cursor.execute(f"INSERT INTO users_rebuild ({column_list}) SELECT {column_list} FROM users")
+    cursor.execute("DROP TABLE users")
+    cursor.execute("ALTER TABLE users_rebuild RENAME TO users")
+
+
+def _merge_duplicate_lots(cursor):
+    # idx_inventory_lot makes (bank, group, expiry) unique; fold any older
+    # duplicates into their lowest id first, keeping reservations pointing
+    # at the surviving lot
+    if _index_exists(cursor, "idx_inventory_lot"):
+        return
+
+    if not _table_exists(cursor, "blood_inventory"):
+        return
+
+    # Blood groups are matched exactly (indexed) by the reservation engine;
+    # older rows may have been stored as "o+" or " O+"
+    cursor.execute("""
+        UPDATE blood_inventory
+        SET blood_group = UPPER(TRIM(blood_group))
+        WHERE blood_group != UPPER(TRIM(blood_group))
+    """)
+
+    cursor.execute("""
+        CREATE TEMP TABLE lot_keepers AS
+        SELECT MIN(id) AS keep_id,
+               blood_bank_id,
+               blood_group,
+               IFNULL(expiry_date, '') AS expiry_key,
+               SUM(COALESCE(units_available, 0)) AS units
+        FROM blood_inventory
+        GROUP BY blood_bank_id, blood_group, IFNULL(expiry_date, '')
+        HAVING COUNT(*) > 1
+    """)
+
+    if _table_exists(cursor, "inventory_reservations"):
+        cursor.execute("""
+            UPDATE inventory_reservations
+            SET inventory_id = (
+                SELECT k.keep_id
+                FROM blood_inventory i
+                JOIN lot_keepers k
+                  ON k.blood_bank_id = i.blood_bank_id
+                 AND k.blood_group = i.blood_group
+                 AND k.expiry_key = IFNULL(i.expiry_date, '')
+                WHERE i.id = inventory_reservations.inventory_id
+            )
+            WHERE inventory_id IN (
+                SELECT i.id
+                FROM blood_inventory i
+                JOIN lot_keepers k
+                  ON k.blood_bank_id = i.blood_bank_id
+                 AND k.blood_group = i.blood_group
+                 AND k.expiry_key = IFNULL(i.expiry_date, '')
+                WHERE i.id != k.keep_id
+            )
+        """)
+
+    cursor.execute("""
+        DELETE FROM blood_inventory
+        WHERE id IN (
+            SELECT i.id
+            FROM blood_inventory i
+            JOIN lot_keepers k
+              ON k.blood_bank_id = i.blood_bank_id
+             AND k.blood_group = i.blood_group
+             AND k.expiry_key = IFNULL(i.expiry_date, '')
+            WHERE i.id != k.keep_id
+        )
+    """)
+    cursor.execute("""
+        UPDATE blood_inventory
+        SET units_available = (SELECT units FROM lot_keepers WHERE keep_id = blood_inventory.id)
+        WHERE id IN (SELECT keep_id FROM lot_keepers)
+    """)
+    cursor.execute("DROP TABLE lot_keepers")
+
+
+def _drop_bank_stock_triggers(cursor):
+    # bank_stock first took each bank's location from blood_banks, but
+    # inventory is keyed by the bloodbank user. CREATE TRIGGER IF NOT EXISTS
+    # would keep the old bodies, so drop them for the schema apply to
+    # recreate; _rebuild_bank_stock then relocates the existing rows.
+    for name in (
+        "trg_bank_stock_inventory_insert",
+        "trg_bank_stock_inventory_update",
+        "trg_bank_stock_bank_moved",
+        "trg_bank_stock_bank_delete",
+    ):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def _backfill_geo_cells(cursor):
+    # Grid cells for rows written before the geo_cell triggers existed
+    cursor.execute("""
+        UPDATE users
+        SET geo_cell = CAST((latitude + 90) / 0.1 AS INTEGER) * 4000
+                     + CAST((longitude + 180) / 0.1 AS INTEGER)
+        WHERE geo_cell IS NULL
+        AND latitude IS NOT NULL
+        AND longitude IS NOT NULL
+    """)
+    cursor.execute("""
+        UPDATE blood_banks
+        SET geo_cell = CAST((latitude + 90) / 0.1 AS INTEGER) * 4000
+                     + CAST((longitude + 180) / 0.1 AS INTEGER)
+        WHERE geo_cell IS NULL
+        AND latitude IS NOT NULL
+        AND longitude IS NOT NULL
+    """)
+
+
+# Summary tables: seed them from the base tables; triggers keep them current
+def _seed_stat_counters(cursor):
+    from app.services.stats_service import ensure_counters
+    ensure_counters(cursor)
+
+
+def _seed_bank_stock(cursor):
+    from app.services.inventory_service import ensure_bank_stock
+    ensure_bank_stock(cursor)
+
+
+def _rebuild_bank_stock(cursor):
+    from app.services.inventory_service import rebuild_bank_stock
+    rebuild_bank_stock(cursor)
+
+
+def _seed_gazetteer(cursor):
+    from app.services.geocoding_service import ensure_gazetteer
+    ensure_gazetteer(cursor)
+
+
+def _seed_notification_unread(cursor):
+    from app.services.inbox_service import ensure_unread_counts
+    ensure_unread_counts(cursor)
+
+
+def _seed_blood_compatibility(cursor):
+    from app.services.matching_service import seed_compatibility
+    seed_compatibility(cursor)
+
+
+# (version, name, step, before_schema). Append only; never renumber.
+# before_schema steps run ahead of the schema apply (e.g. so a new UNIQUE
+# index finds no duplicates), the rest after it.
+MIGRATIONS = (
+    (1, "merge_duplicate_lots", _merge_duplicate_lots, True),
+    (2, "users_role_check", _rebuild_users_table, True),
+    (3, "backfill_geo_cells", _backfill_geo_cells, False),
+    (4, "seed_stat_counters", _seed_stat_counters, False),
+    (5, "seed_bank_stock", _seed_bank_stock, False),
+    (6, "seed_gazetteer", _seed_gazetteer, False),
+    (7, "seed_notification_unread", _seed_notification_unread, False),
+    (8, "seed_blood_compatibility", _seed_blood_compatibility, False),
+    (9, "bank_stock_user_triggers", _drop_bank_stock_triggers, True),
+    (10, "rebuild_bank_stock", _rebuild_bank_stock, False),
+)
+
+
+# -----------------------------
+# Schema apply
+# -----------------------------
+def _statements(sql):
+    # executescript would commit; split so everything shares one transaction
+    statement = ""
+    for line in sql.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            yield statement
+            statement = ""
+
+
+def _add_missing_columns(cursor, schema_sql):
+    # Load schema.sql into a scratch database and diff table_info. ALTER TABLE
+    # only takes constant defaults; anything else needs a numbered step.
+    scratch = sqlite3.connect(":memory:")
+    scratch.executescript(schema_sql)
+    tables = [row[0] for row in scratch.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+    )]
+
+    added = []
+    for table in tables:
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in cursor.fetchall()}
+        if not existing:
+            continue  # new table: CREATE TABLE IF NOT EXISTS makes it
+
+        for _, column, declared_type, notnull, default, _ in scratch.execute(f"PRAGMA table_info({table})"):
+            if column in existing:
+                continue
+            declaration = declared_type
+            if default is not None:
+                declaration += f" DEFAULT {default}"
+            if notnull:
+                declaration += " NOT NULL"
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+            added.append(f"{table}.{column}")
+
+    scratch.close()
+    return added
+
+
+def _apply_schema(cursor, schema_sql):
+    added = _add_missing_columns(cursor, schema_sql)
+    for statement in _statements(schema_sql):
+        cursor.execute(statement)
+    return added
+
+
+# -----------------------------
+# Runner
+# -----------------------------
+def _checksum(schema_sql):
+    return hashlib.sha1(schema_sql.encode()).hexdigest()
+
+
+def _pending(cursor, checksum):
+    # Returns (steps not applied yet, whether schema.sql changed)
+    if not _table_exists(cursor, "schema_migrations"):
+        return list(MIGRATIONS), True
+
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    applied = {version: applied_checksum for version, applied_checksum in cursor.fetchall()}
+    steps = [m for m in MIGRATIONS if m[0] not in applied]
+    return steps, applied.get(0) != checksum
+
+
+def _record(cursor, version, name, checksum=None):
+    cursor.execute("""
+        INSERT INTO schema_migrations (version, name, checksum) VALUES (?, ?, ?)
+        ON CONFLICT(version) DO UPDATE SET
+            checksum = excluded.checksum,
+            applied_at = CURRENT_TIMESTAMP
+    """, (version, name, checksum))
+
+
+def _open(db_path):
+    # Own connection in autocommit mode: transactions are explicit here, and
+    # per-connection pragmas from schema.sql must not leak into the pool
+    return sqlite3.connect(
+        db_path or database.DB_PATH,
+        isolation_level=None,
+        timeout=database.DB_BUSY_TIMEOUT_SECONDS,
+    )
+
+
+def migrate(db_path=None):
+    # Returns what was applied, [] when the database was already current
+    schema_sql = database.SCHEMA_PATH.read_text()
+    checksum = _checksum(schema_sql)
+    conn = _open(db_path)
+    cursor = conn.cursor()
+
+    try:
+        steps, schema_changed = _pending(cursor, checksum)
+        if not steps and not schema_changed:
+            return []
+
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute(MIGRATIONS_TABLE_SQL)
+        # Another process may have migrated while we waited for the lock
+        steps, schema_changed = _pending(cursor, checksum)
+        applied = []
+
+        for version, name, step, before_schema in steps:
+            if before_schema:
+                step(cursor)
+                _record(cursor, version, name)
+                applied.append(name)
+
+        # Steps may have rebuilt tables (dropping their indexes and
+        # triggers), so the schema is re-applied whenever anything ran
+        if steps or schema_changed:
+            added = _apply_schema(cursor, schema_sql)
+            _record(cursor, 0, "schema.sql", checksum)
+            applied += [f"add column {column}" for column in added]
+            applied.append("schema.sql")
+
+        for version, name, step, before_schema in steps:
+            if not before_schema:
+                step(cursor)
+                _record(cursor, version, name)
+                applied.append(name)
+
+        cursor.execute("COMMIT")
+        return applied
+    except BaseException:
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def migration_status(db_path=None):
+    schema_sql = database.SCHEMA_PATH.read_text()
+    conn = _open(db_path)
+    try:
+        steps, schema_changed = _pending(conn.cursor(), _checksum(schema_sql))
+    finally:
+        conn.close()
+
+    return {
+        "pending": [name for _, name, _, _ in steps],
+        "schema_changed": schema_changed
+    }
+
+
+def assert_migrated(db_path=None):
+    # For workers started with BLOODLINK_MIGRATE_ON_STARTUP=0
+    status = migration_status(db_path)
+    if status["pending"] or status["schema_changed"]:
+        raise RuntimeError(
+            f"Database needs migrating ({status}); run: python -m app.migrations"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply pending database migrations")
+    parser.add_argument("--db", help="database path (default: BLOODLINK_DB_PATH)")
+    parser.add_argument("--status", action="store_true", help="only show what is pending")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        print(migration_status(args.db))
+        return
+
+    applied = migrate(args.db)
+    print("Applied: " + ", ".join(applied) if applied else "Database is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,7 @@ PRAGMA foreign_keys = ON;
 CREATE TABLE IF NOT EXISTS users (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     google_id TEXT UNIQUE NOT NULL,
-    role TEXT CHECK(role IN ('patient','hospital','bloodbank','admin')) NOT NULL,
+    role TEXT CHECK(role IN ('patient','donor','hospital','bloodbank','admin')) NOT NULL,
     name TEXT NOT NULL,
     age INTEGER,
     email TEXT UNIQUE NOT NULL,
@@ -16,8 +16,12 @@ CREATE TABLE IF NOT EXISTS users (
     pincode TEXT,
     latitude REAL,
     longitude REAL,
+    geo_cell INTEGER,
     is_available BOOLEAN DEFAULT 1,
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    last_donation_date DATE,
+    deferred_until DATE,       -- temporary deferral set at screening
+    eligible_from DATE         -- trigger-maintained, NULL = eligible now
 );
 
 -- =========================
@@ -48,6 +52,7 @@ CREATE TABLE IF NOT EXISTS blood_banks (
     city TEXT,
     latitude REAL,
     longitude REAL,
+    geo_cell INTEGER,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -59,6 +64,7 @@ CREATE TABLE IF NOT EXISTS blood_inventory (
     blood_bank_id INTEGER NOT NULL,
     blood_group TEXT NOT NULL,
     units_available INTEGER DEFAULT 0,
+    units_expired INTEGER DEFAULT 0,
     expiry_date DATE,
     FOREIGN KEY (blood_bank_id) REFERENCES blood_banks(id) ON DELETE CASCADE
 );
@@ -108,10 +114,531 @@ CREATE TABLE IF NOT EXISTS notifications (
     FOREIGN KEY (user_id) REFERENCES users(id)
 );
 
+-- Read notifications past retention are moved here by inbox_service
+CREATE TABLE IF NOT EXISTS notifications_archive (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER,
+    message TEXT,
+    type TEXT,
+    is_read BOOLEAN,
+    created_at DATETIME,
+    archived_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Unread count per user, kept by the triggers below so the inbox badge is
+-- a primary-key lookup
+CREATE TABLE IF NOT EXISTS notification_unread (
+    user_id INTEGER PRIMARY KEY,
+    unread INTEGER NOT NULL DEFAULT 0
+);
+
+-- =========================
+-- OUTBOX (durable alert queue)
+-- =========================
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    dedupe_key TEXT UNIQUE NOT NULL,
+    user_id INTEGER,
+    phone TEXT,
+    message TEXT NOT NULL,
+    type TEXT DEFAULT 'emergency',
+    status TEXT CHECK(status IN ('pending','leased','delivered','failed')) DEFAULT 'pending',
+    attempts INTEGER DEFAULT 0,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_until REAL,
+    enqueued_at REAL NOT NULL,
+    delivered_at REAL,
+    last_error TEXT,
+    FOREIGN KEY (user_id) REFERENCES users(id)
+);
+
+-- =========================
+-- INVENTORY RESERVATIONS (ledger of units taken by approvals)
+-- =========================
+CREATE TABLE IF NOT EXISTS inventory_reservations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    request_id INTEGER NOT NULL,
+    inventory_id INTEGER NOT NULL,
+    blood_bank_id INTEGER NOT NULL,
+    blood_group TEXT NOT NULL,
+    units INTEGER NOT NULL CHECK(units > 0),
+    status TEXT CHECK(status IN ('reserved','released','consumed')) DEFAULT 'reserved',
+    approved_by INTEGER,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (request_id) REFERENCES patient_requests(id),
+    FOREIGN KEY (inventory_id) REFERENCES blood_inventory(id)
+);
+
+-- =========================
+-- BANK STOCK (per bank / blood group totals for /bloodbank/nearby)
+-- =========================
+-- Maintained by triggers on blood_inventory and users; inventory is keyed by
+-- the bank's bloodbank user, whose geo_cell is copied here so the nearby
+-- search never touches inventory rows.
+CREATE TABLE IF NOT EXISTS bank_stock (
+    blood_bank_id INTEGER NOT NULL,
+    blood_group TEXT NOT NULL,
+    units_available INTEGER NOT NULL DEFAULT 0,
+    geo_cell INTEGER,
+    PRIMARY KEY (blood_bank_id, blood_group)
+);
+
+-- =========================
+-- GAZETTEER (offline city / pincode geocoding)
+-- =========================
+CREATE TABLE IF NOT EXISTS gazetteer (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    city TEXT NOT NULL,
+    state TEXT,
+    pincode TEXT,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL
+);
+
+-- =========================
+-- BLOOD COMPATIBILITY (red cells: recipient -> donor groups)
+-- =========================
+-- Seeded from matching_service.COMPATIBLE_DONORS by app/migrations.py
+CREATE TABLE IF NOT EXISTS blood_compatibility (
+    recipient_group TEXT NOT NULL,
+    donor_group TEXT NOT NULL,
+    PRIMARY KEY (recipient_group, donor_group)
+) WITHOUT ROWID;
+
+-- =========================
+-- STATS COUNTERS (admin dashboard)
+-- =========================
+CREATE TABLE IF NOT EXISTS stat_counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+
+-- =========================
+-- CROSS-PROCESS CHANGE TRACKING
+-- =========================
+-- Each worker caches responses and donors in memory. When PRAGMA
+-- data_version shows another connection committed, the worker reads these
+-- to see which tables changed and which users to re-read
+-- (app/services/change_watcher.py).
+CREATE TABLE IF NOT EXISTS table_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+-- Users whose roster fields changed, oldest first; pruned by the watchers
+CREATE TABLE IF NOT EXISTS user_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL
+);
+
+-- =========================
+-- EMERGENCY COALESCING (shared by all workers)
+-- =========================
+-- Claimed inside the emergency's write transaction, which the writer lock
+-- serializes across workers, so every worker joins the same group and
+-- builds the same alert dedupe keys (app/services/emergency_coalescer.py).
+-- Rows older than the coalescing window are pruned as new groups open.
+CREATE TABLE IF NOT EXISTS emergency_groups (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    blood_group TEXT NOT NULL,
+    geo_cell INTEGER NOT NULL,
+    opened_at REAL NOT NULL,
+    emergencies INTEGER NOT NULL DEFAULT 1,
+    donors TEXT NOT NULL DEFAULT '[]',   -- JSON: donors matched for the first emergency
+    alerted TEXT NOT NULL DEFAULT '[]'   -- JSON: donors that passed the rate limit
+);
+
+-- Last alert per donor for the per-donor alert rate limit
+CREATE TABLE IF NOT EXISTS donor_alerts (
+    user_id INTEGER PRIMARY KEY,
+    last_alert_at REAL NOT NULL
+);
+
+-- =========================
+-- LIVE EVENT RELAY
+-- =========================
+-- Events published in one worker, replayed to the SSE subscribers of the
+-- others by their change watchers; pruned by the watchers
+CREATE TABLE IF NOT EXISTS event_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    origin TEXT NOT NULL,
+    type TEXT NOT NULL,
+    data TEXT NOT NULL,
+    topics TEXT NOT NULL
+);
+
+-- =========================
+-- SPATIAL GRID TRIGGERS
+-- =========================
+-- geo_cell = lat_row * 4000 + lon_col on a 0.1 degree grid
+-- (see GEO_CELL_DEGREES in app/database.py)
+
+CREATE TRIGGER IF NOT EXISTS trg_users_geo_cell_insert
+AFTER INSERT ON users
+BEGIN
+    UPDATE users
+    SET geo_cell = CAST((NEW.latitude + 90) / 0.1 AS INTEGER) * 4000
+                 + CAST((NEW.longitude + 180) / 0.1 AS INTEGER)
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_users_geo_cell_update
+AFTER UPDATE OF latitude, longitude ON users
+BEGIN
+    UPDATE users
+    SET geo_cell = CAST((NEW.latitude + 90) / 0.1 AS INTEGER) * 4000
+                 + CAST((NEW.longitude + 180) / 0.1 AS INTEGER)
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_blood_banks_geo_cell_insert
+AFTER INSERT ON blood_banks
+BEGIN
+    UPDATE blood_banks
+    SET geo_cell = CAST((NEW.latitude + 90) / 0.1 AS INTEGER) * 4000
+                 + CAST((NEW.longitude + 180) / 0.1 AS INTEGER)
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_blood_banks_geo_cell_update
+AFTER UPDATE OF latitude, longitude ON blood_banks
+BEGIN
+    UPDATE blood_banks
+    SET geo_cell = CAST((NEW.latitude + 90) / 0.1 AS INTEGER) * 4000
+                 + CAST((NEW.longitude + 180) / 0.1 AS INTEGER)
+    WHERE id = NEW.id;
+END;
+
+-- =========================
+-- DONOR ELIGIBILITY TRIGGERS
+-- =========================
+-- eligible_from = the later of 90 days after the last whole-blood donation
+-- and the end of any deferral (see DONATION_INTERVAL_DAYS in
+-- app/services/matching_service.py)
+
+CREATE TRIGGER IF NOT EXISTS trg_users_eligible_from_insert
+AFTER INSERT ON users
+WHEN NEW.last_donation_date IS NOT NULL OR NEW.deferred_until IS NOT NULL
+BEGIN
+    UPDATE users
+    SET eligible_from = NULLIF(MAX(
+            COALESCE(DATE(NEW.last_donation_date, '+90 days'), ''),
+            COALESCE(DATE(NEW.deferred_until), '')
+        ), '')
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_users_eligible_from_update
+AFTER UPDATE OF last_donation_date, deferred_until ON users
+BEGIN
+    UPDATE users
+    SET eligible_from = NULLIF(MAX(
+            COALESCE(DATE(NEW.last_donation_date, '+90 days'), ''),
+            COALESCE(DATE(NEW.deferred_until), '')
+        ), '')
+    WHERE id = NEW.id;
+END;
+
+-- =========================
+-- BANK STOCK TRIGGERS
+-- =========================
+
+CREATE TRIGGER IF NOT EXISTS trg_bank_stock_inventory_insert
+AFTER INSERT ON blood_inventory
+BEGIN
+    INSERT INTO bank_stock (blood_bank_id, blood_group, units_available, geo_cell)
+    VALUES (
+        NEW.blood_bank_id,
+        NEW.blood_group,
+        COALESCE(NEW.units_available, 0),
+        (SELECT geo_cell FROM users WHERE id = NEW.blood_bank_id)
+    )
+    ON CONFLICT(blood_bank_id, blood_group) DO UPDATE SET units_available = units_available + excluded.units_available;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_bank_stock_inventory_delete
+AFTER DELETE ON blood_inventory
+BEGIN
+    UPDATE bank_stock
+    SET units_available = units_available - COALESCE(OLD.units_available, 0)
+    WHERE blood_bank_id = OLD.blood_bank_id AND blood_group = OLD.blood_group;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_bank_stock_inventory_update
+AFTER UPDATE OF units_available, blood_group, blood_bank_id ON blood_inventory
+BEGIN
+    UPDATE bank_stock
+    SET units_available = units_available - COALESCE(OLD.units_available, 0)
+    WHERE blood_bank_id = OLD.blood_bank_id AND blood_group = OLD.blood_group;
+
+    INSERT INTO bank_stock (blood_bank_id, blood_group, units_available, geo_cell)
+    VALUES (
+        NEW.blood_bank_id,
+        NEW.blood_group,
+        COALESCE(NEW.units_available, 0),
+        (SELECT geo_cell FROM users WHERE id = NEW.blood_bank_id)
+    )
+    ON CONFLICT(blood_bank_id, blood_group) DO UPDATE SET units_available = units_available + excluded.units_available;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_bank_stock_bank_moved
+AFTER UPDATE OF geo_cell ON users
+WHEN NEW.role = 'bloodbank'
+BEGIN
+    UPDATE bank_stock SET geo_cell = NEW.geo_cell WHERE blood_bank_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_bank_stock_bank_delete
+AFTER DELETE ON users
+WHEN OLD.role = 'bloodbank'
+BEGIN
+    DELETE FROM bank_stock WHERE blood_bank_id = OLD.id;
+END;
+
+-- =========================
+-- STATS COUNTER TRIGGERS
+-- =========================
+-- Keep stat_counters in step with the base tables so /admin/stats is a
+-- single primary-key scan. Names match stats_service.AGGREGATE_SQL.
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_users_insert
+AFTER INSERT ON users WHEN NEW.role = 'patient'
+BEGIN
+    INSERT INTO stat_counters (name, value) VALUES ('patients', 1)
+    ON CONFLICT(name) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_users_delete
+AFTER DELETE ON users WHEN OLD.role = 'patient'
+BEGIN
+    INSERT INTO stat_counters (name, value) VALUES ('patients', -1)
+    ON CONFLICT(name) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_users_role
+AFTER UPDATE OF role ON users
+WHEN (OLD.role = 'patient') != (NEW.role = 'patient')
+BEGIN
+    INSERT INTO stat_counters (name, value)
+    VALUES ('patients', CASE WHEN NEW.role = 'patient' THEN 1 ELSE -1 END)
+    ON CONFLICT(name) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_hospitals_insert
+AFTER INSERT ON hospitals
+BEGIN
+    INSERT INTO stat_counters (name, value) VALUES ('hospitals', 1)
+    ON CONFLICT(name) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_hospitals_delete
+AFTER DELETE ON hospitals
+BEGIN
+    INSERT INTO stat_counters (name, value) VALUES ('hospitals', -1)
+    ON CONFLICT(name) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_blood_banks_insert
+AFTER INSERT ON blood_banks
+BEGIN
+    INSERT INTO stat_counters (name, value) VALUES ('blood_banks', 1)
+    ON CONFLICT(name) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_blood_banks_delete
+AFTER DELETE ON blood_banks
+BEGIN
+    INSERT INTO stat_counters (name, value) VALUES ('blood_banks', -1)
+    ON CONFLICT(name) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_requests_insert
+AFTER INSERT ON patient_requests
+BEGIN
+    INSERT INTO stat_counters (name, value)
+    VALUES ('requests', 1),
+           ('requests.status.' || COALESCE(NEW.status, ''), 1),
+           ('requests.group.' || NEW.blood_group, 1)
+    ON CONFLICT(name) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_requests_delete
+AFTER DELETE ON patient_requests
+BEGIN
+    INSERT INTO stat_counters (name, value)
+    VALUES ('requests', -1),
+           ('requests.status.' || COALESCE(OLD.status, ''), -1),
+           ('requests.group.' || OLD.blood_group, -1)
+    ON CONFLICT(name) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_requests_update
+AFTER UPDATE OF status, blood_group ON patient_requests
+BEGIN
+    INSERT INTO stat_counters (name, value)
+    VALUES ('requests.status.' || COALESCE(OLD.status, ''), -1),
+           ('requests.status.' || COALESCE(NEW.status, ''), 1),
+           ('requests.group.' || OLD.blood_group, -1),
+           ('requests.group.' || NEW.blood_group, 1)
+    ON CONFLICT(name) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_inventory_insert
+AFTER INSERT ON blood_inventory
+BEGIN
+    INSERT INTO stat_counters (name, value)
+    VALUES ('inventory.group.' || NEW.blood_group, COALESCE(NEW.units_available, 0))
+    ON CONFLICT(name) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_inventory_delete
+AFTER DELETE ON blood_inventory
+BEGIN
+    INSERT INTO stat_counters (name, value)
+    VALUES ('inventory.group.' || OLD.blood_group, -COALESCE(OLD.units_available, 0))
+    ON CONFLICT(name) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_inventory_update
+AFTER UPDATE OF units_available, blood_group ON blood_inventory
+BEGIN
+    INSERT INTO stat_counters (name, value)
+    VALUES ('inventory.group.' || OLD.blood_group, -COALESCE(OLD.units_available, 0)),
+           ('inventory.group.' || NEW.blood_group, COALESCE(NEW.units_available, 0))
+    ON CONFLICT(name) DO UPDATE SET value = value + excluded.value;
+END;
+
+-- =========================
+-- NOTIFICATION UNREAD TRIGGERS
+-- =========================
+CREATE TRIGGER IF NOT EXISTS trg_unread_notifications_insert
+AFTER INSERT ON notifications WHEN NEW.is_read = 0
+BEGIN
+    INSERT INTO notification_unread (user_id, unread) VALUES (NEW.user_id, 1)
+    ON CONFLICT(user_id) DO UPDATE SET unread = unread + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_unread_notifications_delete
+AFTER DELETE ON notifications WHEN OLD.is_read = 0
+BEGIN
+    UPDATE notification_unread SET unread = unread - 1 WHERE user_id = OLD.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_unread_notifications_read
+AFTER UPDATE OF is_read ON notifications
+WHEN (OLD.is_read = 0) != (NEW.is_read = 0)
+BEGIN
+    INSERT INTO notification_unread (user_id, unread)
+    VALUES (NEW.user_id, CASE WHEN NEW.is_read = 0 THEN 1 ELSE -1 END)
+    ON CONFLICT(user_id) DO UPDATE SET unread = unread + excluded.unread;
+END;
+
+-- =========================
+-- CROSS-PROCESS CHANGE TRACKING TRIGGERS
+-- =========================
+
+CREATE TRIGGER IF NOT EXISTS trg_versions_inventory_insert
+AFTER INSERT ON blood_inventory
+BEGIN
+    INSERT INTO table_versions (name, version) VALUES ('blood_inventory', 1)
+    ON CONFLICT(name) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_versions_inventory_update
+AFTER UPDATE ON blood_inventory
+BEGIN
+    INSERT INTO table_versions (name, version) VALUES ('blood_inventory', 1)
+    ON CONFLICT(name) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_versions_inventory_delete
+AFTER DELETE ON blood_inventory
+BEGIN
+    INSERT INTO table_versions (name, version) VALUES ('blood_inventory', 1)
+    ON CONFLICT(name) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_versions_requests_insert
+AFTER INSERT ON patient_requests
+BEGIN
+    INSERT INTO table_versions (name, version) VALUES ('patient_requests', 1)
+    ON CONFLICT(name) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_versions_requests_update
+AFTER UPDATE ON patient_requests
+BEGIN
+    INSERT INTO table_versions (name, version) VALUES ('patient_requests', 1)
+    ON CONFLICT(name) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_versions_requests_delete
+AFTER DELETE ON patient_requests
+BEGIN
+    INSERT INTO table_versions (name, version) VALUES ('patient_requests', 1)
+    ON CONFLICT(name) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_versions_users_insert
+AFTER INSERT ON users
+BEGIN
+    INSERT INTO table_versions (name, version) VALUES ('users', 1)
+    ON CONFLICT(name) DO UPDATE SET version = version + 1;
+    INSERT INTO user_changes (user_id) VALUES (NEW.id);
+END;
+
+-- Only the columns the roster and admin stats read; a sign-in that
+-- rewrites the same values changes nothing
+CREATE TRIGGER IF NOT EXISTS trg_versions_users_update
+AFTER UPDATE OF role, name, phone, blood_group, latitude, longitude, is_available, eligible_from ON users
+WHEN OLD.role IS NOT NEW.role
+    OR OLD.name IS NOT NEW.name
+    OR OLD.phone IS NOT NEW.phone
+    OR OLD.blood_group IS NOT NEW.blood_group
+    OR OLD.latitude IS NOT NEW.latitude
+    OR OLD.longitude IS NOT NEW.longitude
+    OR OLD.is_available IS NOT NEW.is_available
+    OR OLD.eligible_from IS NOT NEW.eligible_from
+BEGIN
+    INSERT INTO table_versions (name, version) VALUES ('users', 1)
+    ON CONFLICT(name) DO UPDATE SET version = version + 1;
+    INSERT INTO user_changes (user_id) VALUES (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_versions_users_delete
+AFTER DELETE ON users
+BEGIN
+    INSERT INTO table_versions (name, version) VALUES ('users', 1)
+    ON CONFLICT(name) DO UPDATE SET version = version + 1;
+    INSERT INTO user_changes (user_id) VALUES (OLD.id);
+END;
+
 -- =========================
 -- INDEXES (MUST BE LAST)
 -- =========================
 
 CREATE INDEX IF NOT EXISTS idx_users_blood_group ON users(blood_group);
 CREATE INDEX IF NOT EXISTS idx_users_location ON users(latitude, longitude);
-CREATE INDEX IF NOT EXISTS idx_inventory_group ON blood_inventory(blood_group);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_inventory_group ON blood_inventory(blood_group);
+CREATE INDEX IF NOT EXISTS idx_users_group_cell ON users(blood_group, geo_cell);
+CREATE INDEX IF NOT EXISTS idx_users_eligible_donors
+ON users(blood_group, geo_cell, latitude, longitude, eligible_from, name, phone)
+WHERE role = 'donor' AND is_available = 1;
+CREATE INDEX IF NOT EXISTS idx_outbox_pending ON outbox(status, available_at);
+CREATE INDEX IF NOT EXISTS idx_requests_status_created ON patient_requests(status, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_requests_patient_created ON patient_requests(patient_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_requests_group_created ON patient_requests(blood_group, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_requests_created ON patient_requests(created_at, id);
+DROP INDEX IF EXISTS idx_inventory_group_units;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_inventory_lot ON blood_inventory(blood_bank_id, blood_group, IFNULL(expiry_date, ''));
+CREATE INDEX IF NOT EXISTS idx_inventory_group_expiry ON blood_inventory(blood_group, expiry_date);
+CREATE INDEX IF NOT EXISTS idx_inventory_expiring ON blood_inventory(expiry_date) WHERE units_available > 0;
+CREATE INDEX IF NOT EXISTS idx_bank_stock_group_cell ON bank_stock(blood_group, geo_cell, units_available);
+CREATE INDEX IF NOT EXISTS idx_gazetteer_pincode ON gazetteer(pincode);
+CREATE INDEX IF NOT EXISTS idx_gazetteer_city ON gazetteer(city COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_reservations_request ON inventory_reservations(request_id, status);
+CREATE INDEX IF NOT EXISTS idx_reservations_inventory ON inventory_reservations(inventory_id);
+CREATE INDEX IF NOT EXISTS idx_notifications_inbox ON notifications(user_id, is_read, id);
+CREATE INDEX IF NOT EXISTS idx_notifications_read_created ON notifications(created_at) WHERE is_read = 1;
+CREATE INDEX IF NOT EXISTS idx_emergency_groups_key ON emergency_groups(blood_group, geo_cell, opened_at);
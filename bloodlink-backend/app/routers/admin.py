@@ -1,38 +1,190 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.middleware.auth_middleware import get_current_user
-from app.database import get_connection
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from app.middleware.auth_middleware import get_current_user, token_cache_stats
+from app.database import run_db
+from app.services import (
+    change_watcher,
+    donor_roster,
+    emergency_coalescer,
+    event_hub,
+    metrics,
+    outbox_service,
+    profiler,
+    response_cache,
+    stats_service,
+)
+from app.services.donor_import import ImportJob, import_jobs, parse_ndjson
+from app.services.geocoding_service import geocode_stats
+from app.services.request_body import body_csv_records, body_lines
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
 
+# Tables the stats count; writers bump them (response_cache.bump)
+STATS_TABLES = ("users", "patient_requests", "blood_inventory")
+
+
+def _stats(conn):
+    # Response cache entries are version-checked, so the TTL cache is only
+    # used with the response cache off
+    if response_cache.RESPONSE_CACHE_SIZE > 0:
+        return stats_service.compute_stats(conn.cursor())
+    return stats_service.get_stats(conn.cursor())
+
+
+async def _stats_response():
+    return await run_db(_stats), {}
+
+
 @router.get("/stats")
-def get_admin_stats(current_user: dict = Depends(get_current_user)):
+async def get_admin_stats(request: Request, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin allowed")
+
+    # The dashboard polls this: ETag / 304 until one of STATS_TABLES is written
+    return await response_cache.respond(request, ("admin.stats",), STATS_TABLES, _stats_response)
+
+
+@router.get("/roster-stats")
+def get_roster_stats(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin allowed")
+
+    return donor_roster.roster_stats()
+
+
+@router.get("/outbox-stats")
+def get_outbox_stats(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin allowed")
+
+    return outbox_service.outbox_stats()
+
+
+@router.get("/auth-cache-stats")
+def get_auth_cache_stats(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin allowed")
+
+    return token_cache_stats()
+
+
+@router.get("/events-stats")
+def get_events_stats(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin allowed")
+
+    return event_hub.hub_stats()
+
+
+@router.get("/emergency-stats")
+def get_emergency_stats(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin allowed")
+
+    return emergency_coalescer.coalescer_stats()
+
+
+@router.get("/response-cache-stats")
+def get_response_cache_stats(current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admin allowed")
 
-    conn = get_connection()
-    cursor = conn.cursor()
+    return response_cache.cache_stats()
 
-    stats = {}
 
-    cursor.execute("SELECT COUNT(*) FROM users WHERE role='patient'")
-    stats["total_patients"] = cursor.fetchone()[0]
+# Per worker: each process answers with its own counters
+@router.get("/worker-stats")
+def get_worker_stats(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin allowed")
+
+    return {"pid": os.getpid(), "change_watcher": change_watcher.watcher_stats()}
 
-    cursor.execute("SELECT COUNT(*) FROM hospitals")
-    stats["total_hospitals"] = cursor.fetchone()[0]
 
-    cursor.execute("SELECT COUNT(*) FROM blood_banks")
-    stats["total_bloodbanks"] = cursor.fetchone()[0]
+# 🔹 SQL text behind the statement digests on /metrics
+@router.get("/sql-statements")
+def get_sql_statements(digest: str | None = None, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin allowed")
 
-    cursor.execute("SELECT COUNT(*) FROM patient_requests")
-    stats["total_requests"] = cursor.fetchone()[0]
+    statements = metrics.statement_stats(digest)
+    if digest is not None and not statements:
+        raise HTTPException(status_code=404, detail="Unknown statement digest")
+    return statements
 
-    cursor.execute("SELECT COUNT(*) FROM patient_requests WHERE status='pending'")
-    stats["pending_requests"] = cursor.fetchone()[0]
 
-    cursor.execute("SELECT COUNT(*) FROM patient_requests WHERE status='approved'")
-    stats["approved_requests"] = cursor.fetchone()[0]
+# 🔹 Slow-request profiler: flip on at runtime, collect .folded stacks
+@router.get("/profiler")
+def get_profiler(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin allowed")
+
+    return profiler.profiler_stats()
+
+
+@router.post("/profiler")
+def set_profiler(
+    enabled: bool,
+    slow_ms: float | None = None,
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin allowed")
+
+    if slow_ms is not None and slow_ms < 0:
+        raise HTTPException(status_code=400, detail="slow_ms must be >= 0")
 
-    conn.close()
+    return profiler.configure(enabled=enabled, slow_ms=slow_ms)
+
+
+async def _ndjson_records(request: Request):
+    async for line in body_lines(request):
+        for record in parse_ndjson([line]):
+            yield record
+
+
+# 🔹 Donor registry import (CSV or NDJSON body, streamed)
+# Batches are validated, geocoded and upserted as the body arrives, so the
+# upload never sits in memory. Poll GET /admin/imports for progress.
+@router.post("/import/donors")
+async def import_donors(
+    request: Request,
+    source: str = "registry",
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin allowed")
+
+    content_type = request.headers.get("content-type", "text/csv").split(";")[0].strip()
+    if content_type not in ("text/csv", "application/x-ndjson", "application/jsonl"):
+        raise HTTPException(status_code=415, detail=f"Unsupported content type {content_type}")
+
+    job = ImportJob(source)
+    records = body_csv_records(request) if content_type == "text/csv" else _ndjson_records(request)
+    batch = []
+
+    try:
+        async for record in records:
+            batch.append(record)
+
+            if len(batch) >= job.batch_size:
+                await run_in_threadpool(job.import_batch, batch)
+                batch = []
+
+        if batch:
+            await run_in_threadpool(job.import_batch, batch)
+    finally:
+        job.finish()
+
+    return job.summary()
+
+
+@router.get("/imports")
+def get_imports(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin allowed")
 
-    return stats
\ No newline at end of file
+    return {"jobs": import_jobs(), "geocode_cache": geocode_stats()}
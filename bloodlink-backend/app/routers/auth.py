@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from datetime import datetime, timedelta
 from jose import jwt
-from app.database import get_connection
-from google.oauth2 import id_token
-from google.auth.transport import requests
+from app.database import get_db, write_lock
+from app.services import donor_roster, response_cache
+from app.services.geocoding_service import geocode
+from app.services.google_auth_service import GoogleCertsUnavailable, verify_google_token
 
 # =============================
 # CONFIG
@@ -46,15 +47,12 @@ def create_access_token(data: dict):
 # =============================
 
 @router.post("/google-login")
-def google_login(payload: GoogleLogin):
+def google_login(payload: GoogleLogin, conn=Depends(get_db)):
 
     # 1️⃣ Verify Google Token
     try:
-        idinfo = id_token.verify_oauth2_token(
-            payload.token,
-            requests.Request(),
-            GOOGLE_CLIENT_ID
-        )
+        # Verified locally against cached Google certs (no HTTP per login)
+        idinfo = verify_google_token(payload.token, GOOGLE_CLIENT_ID)
 
         google_id = idinfo["sub"]
         name = idinfo.get("name")
@@ -62,8 +60,9 @@ def google_login(payload: GoogleLogin):
 
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid Google token")
+    except GoogleCertsUnavailable:
+        raise HTTPException(status_code=503, detail="Google sign-in temporarily unavailable")
 
-    conn = get_connection()
     cursor = conn.cursor()
 
     # 2️⃣ Check if user exists
@@ -73,36 +72,46 @@ def google_login(payload: GoogleLogin):
     )
     user = cursor.fetchone()
 
+    # Coordinates for matching come from the city (offline gazetteer)
+    coords = geocode(payload.city) or (None, None)
+
     # 3️⃣ If not, create user. If exists, update role + other fields
-    if not user:
-        cursor.execute("""
-            INSERT INTO users 
-            (google_id, role, name, email, phone, blood_group, city)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            google_id,
-            payload.role,
-            name,
-            email,
-            payload.phone,
-            payload.blood_group,
-            payload.city
-        ))
-    else:
-        # ✅ Update existing user with new role and optional fields
-        cursor.execute("""
-            UPDATE users
-            SET role = ?, phone = COALESCE(?, phone), blood_group = COALESCE(?, blood_group), city = COALESCE(?, city)
-            WHERE google_id = ?
-        """, (
-            payload.role,
-            payload.phone,
-            payload.blood_group,
-            payload.city,
-            google_id
-        ))
-    
-    conn.commit()
+    with write_lock():
+        if not user:
+            cursor.execute("""
+                INSERT INTO users 
+                (google_id, role, name, email, phone, blood_group, city, latitude, longitude)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                google_id,
+                payload.role,
+                name,
+                email,
+                payload.phone,
+                payload.blood_group,
+                payload.city,
+                coords[0],
+                coords[1]
+            ))
+        else:
+            # ✅ Update existing user with new role and optional fields
+            cursor.execute("""
+                UPDATE users
+                SET role = ?, phone = COALESCE(?, phone), blood_group = COALESCE(?, blood_group), city = COALESCE(?, city),
+                    latitude = COALESCE(latitude, ?), longitude = COALESCE(longitude, ?)
+                WHERE google_id = ?
+            """, (
+                payload.role,
+                payload.phone,
+                payload.blood_group,
+                payload.city,
+                coords[0],
+                coords[1],
+                google_id
+            ))
+
+        conn.commit()
+    response_cache.bump("users")  # admin stats count patients by role
 
     # 4️⃣ Fetch updated user
     cursor.execute(
@@ -111,15 +120,15 @@ def google_login(payload: GoogleLogin):
     )
     user = cursor.fetchone()
 
-    
+    # Keep the in-memory donor roster in step with the upsert
+    donor_roster.apply_user(user)
+
     # 5️⃣ Create JWT
     access_token = create_access_token({
         "user_id": user["id"],
         "role": user["role"]
     })
 
-    conn.close()
-
     return {
         "access_token": access_token,
         "role": user["role"]
@@ -1,7 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from datetime import date, datetime, timezone
+from functools import partial
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel
+from app.config import INVENTORY_BULK_CHUNK_ROWS, INVENTORY_BULK_MAX_ROWS
 from app.middleware.auth_middleware import get_current_user
-from app.database import get_connection
+from app.database import run_db, run_db_write
+from app.services import event_hub, response_cache
+from app.services.request_body import body_csv_records, body_lines
+from app.services.inventory_service import UPSERT_LOT_SQL, normalize_blood_group, upsert_lots
+from app.services.matching_service import MAX_DISTANCE_KM, MAX_MATCHES, find_nearby_blood_banks
 
 router = APIRouter(prefix="/bloodbank", tags=["Blood Bank"])
 
@@ -9,94 +18,237 @@ router = APIRouter(prefix="/bloodbank", tags=["Blood Bank"])
 class InventoryUpdate(BaseModel):
     blood_group: str
     units_available: int
+    expiry_date: date | None = None
 
 
 # 🔹 Add / Update Inventory
+def _upsert_lot(conn, blood_bank_id, blood_group, units_available, expiry_date):
+    cursor = conn.cursor()
+
+    # One lot per group and expiry date (idx_inventory_lot)
+    cursor.execute(UPSERT_LOT_SQL, (
+        blood_bank_id,
+        blood_group,
+        units_available,
+        expiry_date
+    ))
+    cursor.fetchone()
+
+    conn.commit()
+    response_cache.bump("blood_inventory")
+
+
 @router.post("/inventory")
-def update_inventory(
+async def update_inventory(
     data: InventoryUpdate,
     current_user: dict = Depends(get_current_user)
 ):
     if current_user["role"] != "bloodbank":
         raise HTTPException(status_code=403, detail="Only blood banks allowed")
 
-    conn = get_connection()
-    cursor = conn.cursor()
+    blood_group = normalize_blood_group(data.blood_group)
 
-    # Check if record exists
-    cursor.execute("""
-        SELECT id FROM blood_inventory
-        WHERE blood_bank_id = ? AND blood_group = ?
-    """, (current_user["user_id"], data.blood_group))
-
-    existing = cursor.fetchone()
-
-    if existing:
-        cursor.execute("""
-            UPDATE blood_inventory
-            SET units_available = ?
-            WHERE blood_bank_id = ? AND blood_group = ?
-        """, (
-            data.units_available,
-            current_user["user_id"],
-            data.blood_group
-        ))
-    else:
-        cursor.execute("""
-            INSERT INTO blood_inventory
-            (blood_bank_id, blood_group, units_available)
-            VALUES (?, ?, ?)
-        """, (
-            current_user["user_id"],
-            data.blood_group,
-            data.units_available
-        ))
+    expiry_date = data.expiry_date.isoformat() if data.expiry_date else None
 
-    conn.commit()
-    conn.close()
+    await run_db_write(_upsert_lot, current_user["user_id"], blood_group, data.units_available, expiry_date)
+
+    event_hub.publish("inventory.updated", {
+        "blood_bank_id": current_user["user_id"],
+        "blood_group": blood_group,
+        "units_available": data.units_available,
+        "expiry_date": expiry_date
+    }, {f"user:{current_user['user_id']}", "role:hospital", "role:admin"})
 
     return {"message": "Inventory updated successfully"}
 
 
-# 🔹 View Inventory
-@router.get("/inventory")
-def view_inventory(current_user: dict = Depends(get_current_user)):
+# 🔹 Bulk Inventory Sync (bank LIS integrations)
+# Body: JSON array, NDJSON (application/x-ndjson) or CSV (text/csv) with a
+# blood_group,units_available,expiry_date header. One transaction per
+# INVENTORY_BULK_CHUNK_ROWS rows, so a large sync never holds the writer lock
+# for long; one result per row, invalid rows are reported and skipped.
+async def _read_lots(request: Request):
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip()
+    rows = []
+
+    if content_type == "application/json":
+        try:
+            rows = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid JSON body")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of lots")
+
+    elif content_type in ("application/x-ndjson", "application/jsonl"):
+        async for line in body_lines(request):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                rows.append(None)  # reported as an invalid row
+            if len(rows) > INVENTORY_BULK_MAX_ROWS:
+                break
+
+    elif content_type == "text/csv":
+        async for row in body_csv_records(request):
+            rows.append(row)
+            if len(rows) > INVENTORY_BULK_MAX_ROWS:
+                break
+
+    else:
+        raise HTTPException(status_code=415, detail=f"Unsupported content type {content_type}")
+
+    if len(rows) > INVENTORY_BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {INVENTORY_BULK_MAX_ROWS} rows per call")
+
+    return rows
+
+
+@router.post("/inventory/bulk")
+async def bulk_update_inventory(
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
     if current_user["role"] != "bloodbank":
         raise HTTPException(status_code=403, detail="Only blood banks allowed")
 
-    conn = get_connection()
-    cursor = conn.cursor()
+    rows = await _read_lots(request)
+    results = []
+    for start in range(0, len(rows), INVENTORY_BULK_CHUNK_ROWS):
+        chunk = rows[start:start + INVENTORY_BULK_CHUNK_ROWS]
+        results += await run_db_write(upsert_lots, current_user["user_id"], chunk, start)
 
-    cursor.execute("""
-        SELECT id, blood_group, units_available
-        FROM blood_inventory
-        WHERE blood_bank_id = ?
-    """, (current_user["user_id"],))
+    errors = sum(1 for r in results if r["status"] == "error")
+
+    if len(results) > errors:
+        event_hub.publish("inventory.updated", {
+            "blood_bank_id": current_user["user_id"],
+            "lots": len(results) - errors
+        }, {f"user:{current_user['user_id']}", "role:hospital", "role:admin"})
+
+    return {
+        "applied": len(results) - errors,
+        "errors": errors,
+        "results": results
+    }
+
+
+# 🔹 View Inventory
+# view=lots: one row per lot, soonest expiry first (default)
+# view=summary: per blood group totals, usable vs expired
+INVENTORY_LOTS_SQL = """
+    SELECT id,
+           blood_group,
+           units_available,
+           COALESCE(units_expired, 0) AS units_expired,
+           expiry_date,
+           CAST(julianday(expiry_date) - julianday(DATE('now')) AS INTEGER) AS days_to_expiry,
+           expiry_date IS NOT NULL AND expiry_date < DATE('now') AS is_expired
+    FROM blood_inventory
+    WHERE blood_bank_id = ?
+    ORDER BY blood_group, expiry_date IS NULL, expiry_date, id
+"""
+
+INVENTORY_SUMMARY_SQL = """
+    SELECT blood_group,
+           COUNT(*) AS lots,
+           SUM(CASE WHEN expiry_date IS NULL OR expiry_date >= DATE('now')
+                    THEN units_available ELSE 0 END) AS units_available,
+           SUM(CASE WHEN expiry_date < DATE('now')
+                    THEN units_available ELSE 0 END)
+               + SUM(COALESCE(units_expired, 0)) AS units_expired,
+           MIN(CASE WHEN expiry_date >= DATE('now') AND units_available > 0
+                    THEN expiry_date END) AS next_expiry
+    FROM blood_inventory
+    WHERE blood_bank_id = ?
+    GROUP BY blood_group
+    ORDER BY blood_group
+"""
+
+
+def _fetch_inventory(conn, sql, blood_bank_id):
+    cursor = conn.cursor()
+    cursor.execute(sql, (blood_bank_id,))
 
     rows = cursor.fetchall()
-    conn.close()
 
     return [dict(row) for row in rows]
 
 
-# 🔹 Delete Inventory
-@router.delete("/inventory/{item_id}")
-def delete_inventory(
-    item_id: int,
+async def _inventory_response(sql, blood_bank_id):
+    return await run_db(_fetch_inventory, sql, blood_bank_id), {}
+
+
+@router.get("/inventory")
+async def view_inventory(
+    request: Request,
+    view: str = Query("lots", pattern="^(lots|summary)$"),
     current_user: dict = Depends(get_current_user)
 ):
     if current_user["role"] != "bloodbank":
         raise HTTPException(status_code=403, detail="Only blood banks allowed")
 
-    conn = get_connection()
+    sql = INVENTORY_SUMMARY_SQL if view == "summary" else INVENTORY_LOTS_SQL
+
+    # Cached per bank until blood_inventory is written; expiry columns are
+    # relative to DATE('now'), so the UTC date is part of the key
+    today = datetime.now(timezone.utc).date().isoformat()
+    return await response_cache.respond(
+        request,
+        ("bloodbank.inventory", current_user["user_id"], view, today),
+        ("blood_inventory",),
+        partial(_inventory_response, sql, current_user["user_id"])
+    )
+
+
+# 🔹 Nearby Stock ("which banks near me have N units of O-?")
+def _find_nearby(conn, *args, **kwargs):
+    return find_nearby_blood_banks(conn.cursor(), *args, **kwargs)
+
+
+@router.get("/nearby")
+async def find_nearby_stock(
+    blood_group: str,
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    units: int = Query(1, ge=1),
+    radius_km: float = Query(MAX_DISTANCE_KM, gt=0, le=1000),
+    limit: int = Query(MAX_MATCHES, ge=1, le=100),
+    current_user: dict = Depends(get_current_user)
+):
+    return await run_db(
+        _find_nearby,
+        normalize_blood_group(blood_group),
+        latitude,
+        longitude,
+        min_units=units,
+        radius_km=radius_km,
+        limit=limit
+    )
+
+
+# 🔹 Delete Inventory
+def _delete_lot(conn, item_id, blood_bank_id):
     cursor = conn.cursor()
 
     cursor.execute("""
         DELETE FROM blood_inventory
         WHERE id = ? AND blood_bank_id = ?
-    """, (item_id, current_user["user_id"]))
+    """, (item_id, blood_bank_id))
 
     conn.commit()
-    conn.close()
+    response_cache.bump("blood_inventory")
+
+
+@router.delete("/inventory/{item_id}")
+async def delete_inventory(
+    item_id: int,
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] != "bloodbank":
+        raise HTTPException(status_code=403, detail="Only blood banks allowed")
+
+    await run_db_write(_delete_lot, item_id, current_user["user_id"])
 
     return {"message": "Inventory deleted successfully"}
\ No newline at end of file
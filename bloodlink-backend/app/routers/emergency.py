@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from app.middleware.auth_middleware import get_current_user
-from app.database import get_connection
-from app.services.matching_service import find_matching_donors
-from app.services.notification_service import send_notification, send_whatsapp
+from app.database import geo_cell, run_db, run_db_write
+from app.services.matching_service import find_matching_donors, find_matching_donors_batch
+from app.services import emergency_coalescer, event_hub, outbox_service
 
 router = APIRouter(prefix="/emergency", tags=["Emergency"])
 
@@ -15,18 +15,42 @@ class EmergencyRequest(BaseModel):
     longitude: float
 
 
-@router.post("/create")
-def create_emergency(
-    request: EmergencyRequest,
-    current_user: dict = Depends(get_current_user)
-):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Only hospital/admin can create emergency")
+class EmergencyBatch(BaseModel):
+    requests: list[EmergencyRequest]
 
-    conn = get_connection()
-    cursor = conn.cursor()
 
-    # Save emergency request
+def _group_alerts(group, blood_group, donors):
+    # One alert per donor per coalescing group; the message counts the
+    # group's emergencies so far
+    message = emergency_coalescer.alert_message(blood_group, group.emergencies)
+    return [
+        {
+            "dedupe_key": emergency_coalescer.alert_key(group, donor["id"]),
+            "user_id": donor["id"],
+            "phone": donor["phone"],
+            "message": message
+        }
+        for donor in donors
+    ]
+
+
+def _publish_emergency(emergency_id, request, matched_donors, group, opened):
+    topics = {"role:hospital", "role:admin"}
+    if opened:  # donors already heard about coalesced ones
+        topics.update(f"user:{donor['id']}" for donor in matched_donors)
+
+    event_hub.publish("emergency.created", {
+        "id": emergency_id,
+        "blood_group": request.blood_group,
+        "units_required": request.units_required,
+        "latitude": request.latitude,
+        "longitude": request.longitude,
+        "matched_donors_count": len(matched_donors),
+        "group": group.id
+    }, topics)
+
+
+def _insert_emergency(cursor, request):
     cursor.execute("""
         INSERT INTO emergency_requests (hospital_id, blood_group, units_required, latitude, longitude)
         VALUES (?, ?, ?, ?, ?)
@@ -37,25 +61,108 @@ def create_emergency(
         request.latitude,
         request.longitude
     ))
+    return cursor.lastrowid
+
+
+def _match(requests):
+    if len(requests) == 1:
+        r = requests[0]
+        return [find_matching_donors(r.blood_group, r.latitude, r.longitude)]
+    return find_matching_donors_batch((r.blood_group, r.latitude, r.longitude) for r in requests)
+
+
+def _match_requests(conn, requests):
+    # Donors per request, on the DB executor so matching never holds the
+    # writer lock. A request whose (blood group, cell) group is already open
+    # reuses the group's match; of the rest, only the first request per key
+    # in this call runs matching.
+    keys = [(r.blood_group, geo_cell(r.latitude, r.longitude)) for r in requests]
+    donors = {}
+    first = {}
+
+    for key, r in zip(keys, requests):
+        if key not in donors:
+            donors[key] = emergency_coalescer.group_donors(conn, r.blood_group, r.latitude, r.longitude)
+            first[key] = r
+
+    missing = [key for key, matched in donors.items() if matched is None]
+    if missing:
+        for key, matched in zip(missing, _match([first[key] for key in missing])):
+            donors[key] = matched
+
+    return [donors[key] for key in keys]
+
+
+def _create_emergencies(conn, requests, matches):
+    # Returns (emergency_id, request, matched_donors, group, opened) per
+    # request. Emergency rows, group claims, rate-limit marks and alerts
+    # commit together; the outbox drainer delivers them even if this worker
+    # dies right after.
+    cursor = conn.cursor()
+    created = []
+
+    for r, donors in zip(requests, matches):
+        emergency_id = _insert_emergency(cursor, r)
+        group, opened = emergency_coalescer.claim(cursor, r.blood_group, r.latitude, r.longitude, donors)
+
+        if opened:
+            allowed = emergency_coalescer.acquire_alerts(cursor, group.donors)
+            emergency_coalescer.set_alerted(cursor, group, allowed)
+            outbox_service.enqueue(cursor, _group_alerts(group, r.blood_group, allowed))
+            emergency_coalescer.count(alerts_queued=len(allowed))
+        else:
+            outbox_service.enqueue(cursor, _group_alerts(group, r.blood_group, group.alerted), merge=True)
+            emergency_coalescer.count(alerts_merged=len(group.alerted))
+
+        created.append((emergency_id, r, group.donors, group, opened))
 
-    emergency_id = cursor.lastrowid
     conn.commit()
-    conn.close()
+    return created
 
-    # Smart matching
-    matched_donors = find_matching_donors(
-        request.blood_group,
-        request.latitude,
-        request.longitude
-    )
 
-    # Send notifications
-    for donor in matched_donors:
-        message = f"🚨 Emergency! {request.blood_group} blood needed urgently."
-        send_notification(donor["id"], message)
-        send_whatsapp(donor["phone"], message)
+async def _create(requests):
+    matches = await run_db(_match_requests, requests)
+    created = await run_db_write(_create_emergencies, requests, matches)
+
+    # Alerts go out on the drainer's threads while this worker keeps serving
+    outbox_service.wake()
+    return created
+
+
+@router.post("/create")
+async def create_emergency(
+    request: EmergencyRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only hospital/admin can create emergency")
+
+    [(emergency_id, _, matched_donors, group, opened)] = await _create([request])
+
+    _publish_emergency(emergency_id, request, matched_donors, group, opened)
+
+    return {
+        "message": "Emergency created and donor alerts queued",
+        "matched_donors_count": len(matched_donors),
+        "coalesced": not opened
+    }
+
+
+# 🔹 Burst of emergencies (mass-casualty events): one transaction, one matching pass
+@router.post("/create-batch")
+async def create_emergency_batch(
+    batch: EmergencyBatch,
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only hospital/admin can create emergency")
+
+    created = await _create(batch.requests)
+
+    for emergency_id, request, matched_donors, group, opened in created:
+        _publish_emergency(emergency_id, request, matched_donors, group, opened)
 
     return {
-        "message": "Emergency created and donors notified",
-        "matched_donors_count": len(matched_donors)
-    }
\ No newline at end of file
+        "message": "Emergencies created and donor alerts queued",
+        "matched_donors_count": [len(matched_donors) for _, _, matched_donors, _, _ in created]
+    }
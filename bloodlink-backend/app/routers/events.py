@@ -0,0 +1,59 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from jose import JWTError
+from app.config import EVENTS_HEARTBEAT_SECONDS
+from app.middleware.auth_middleware import decode_token
+from app.services import event_hub
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+# EventSource cannot set headers, so the JWT may also come as ?token=
+optional_security = HTTPBearer(auto_error=False)
+
+
+async def _event_stream(request: Request, subscriber):
+    try:
+        yield "retry: 3000\n\n"
+
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": keep-alive\n\n"
+                continue
+
+            yield event_hub.format_sse(event)
+    finally:
+        event_hub.unsubscribe(subscriber)
+
+
+# 🔹 Live dashboard updates (Server-Sent Events)
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    token: str | None = None,
+    credentials: HTTPAuthorizationCredentials | None = Depends(optional_security)
+):
+    raw_token = credentials.credentials if credentials else token
+    if not raw_token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    try:
+        current_user = decode_token(raw_token)
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    subscriber = event_hub.subscribe(event_hub.user_topics(current_user))
+    if subscriber is None:
+        raise HTTPException(status_code=503, detail="Too many live connections")
+
+    return StreamingResponse(
+        _event_stream(request, subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
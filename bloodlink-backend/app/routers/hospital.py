@@ -1,40 +1,75 @@
-from fastapi import APIRouter, Depends, HTTPException
+from functools import partial
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from app.middleware.auth_middleware import get_current_user
-from app.database import get_connection
+from app.database import run_db_write
+from app.services import event_hub, inventory_service, response_cache
+from app.services.pagination import (
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    page_limit,
+    page_response,
+    request_filters,
+    stream_ndjson,
+)
 
 router = APIRouter(prefix="/hospital", tags=["Hospital"])
 
 
-# 🔹 Get All Requests
+# 🔹 Get All Requests (keyset-paginated, newest first)
+HOSPITAL_REQUESTS_SQL = """
+    SELECT pr.id,
+           u.name as patient_name,
+           pr.blood_group,
+           pr.units_required,
+           pr.status,
+           pr.created_at
+    FROM patient_requests pr
+    JOIN users u ON pr.patient_id = u.id
+"""
+
+
 @router.get("/requests")
-def get_all_requests(current_user: dict = Depends(get_current_user)):
+async def get_all_requests(
+    request: Request,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    page_cursor: str | None = Query(None, alias="cursor"),
+    status: str | None = None,
+    blood_group: str | None = None,
+    created_from: str | None = None,
+    created_to: str | None = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    current_user: dict = Depends(get_current_user)
+):
     if current_user["role"] != "hospital":
         raise HTTPException(status_code=403, detail="Only hospitals allowed")
 
-    conn = get_connection()
-    cursor = conn.cursor()
+    clauses, params = request_filters(status, blood_group, created_from, created_to)
+    after = decode_cursor(page_cursor) if page_cursor else None
+    limit = page_limit(limit, page_cursor)
 
-    cursor.execute("""
-        SELECT pr.id,
-               u.name as patient_name,
-               pr.blood_group,
-               pr.units_required,
-               pr.status,
-               pr.created_at
-        FROM patient_requests pr
-        JOIN users u ON pr.patient_id = u.id
-        ORDER BY pr.created_at DESC
-    """)
+    if format == "ndjson":
+        return StreamingResponse(
+            stream_ndjson(HOSPITAL_REQUESTS_SQL, clauses, params, after),
+            media_type="application/x-ndjson"
+        )
 
-    rows = cursor.fetchall()
-    conn.close()
-
-    return [dict(row) for row in rows]
+    # Same list for every hospital: cached per role until a write
+    key = ("hospital.requests", limit, page_cursor, status, blood_group, created_from, created_to)
+    return await response_cache.respond(
+        request,
+        key,
+        ("patient_requests",),
+        partial(page_response, HOSPITAL_REQUESTS_SQL, clauses, params, limit, after)
+    )
 
 
 # 🔹 Approve / Reject Request
+# Approval reserves stock atomically (see inventory_service); rejecting an
+# approved request puts its reserved units back.
 @router.put("/requests/{request_id}")
-def update_request_status(
+async def update_request_status(
     request_id: int,
     status: str,
     current_user: dict = Depends(get_current_user)
@@ -42,57 +77,20 @@ def update_request_status(
     if current_user["role"] != "hospital":
         raise HTTPException(status_code=403, detail="Only hospitals allowed")
 
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # 🔹 Get request
-    cursor.execute("""
-        SELECT blood_group, units_required
-        FROM patient_requests
-        WHERE id = ?
-    """, (request_id,))
-    request = cursor.fetchone()
-
-    if not request:
-        raise HTTPException(status_code=404, detail="Request not found")
-
-    blood_group = request["blood_group"]
-    units_required = request["units_required"]
-
-    # 🔹 If approving, check inventory
-    if status == "approved":
-
-        cursor.execute("""
-            SELECT id, units_available
-            FROM blood_inventory
-            WHERE LOWER(blood_group) = LOWER(?)
-            ORDER BY units_available DESC
-        """, (blood_group,))
-
-        inventory = cursor.fetchone()
-
-        if not inventory:
-            raise HTTPException(status_code=400, detail="No blood stock available")
-
-        if inventory["units_available"] < units_required:
-            raise HTTPException(status_code=400, detail="Insufficient stock")
-
-        new_units = inventory["units_available"] - units_required
-
-        cursor.execute("""
-            UPDATE blood_inventory
-            SET units_available = ?
-            WHERE id = ?
-        """, (new_units, inventory["id"]))
-
-    # 🔹 Update request status
-    cursor.execute("""
-        UPDATE patient_requests
-        SET status = ?
-        WHERE id = ?
-    """, (status, request_id))
-
-    conn.commit()
-    conn.close()
-
-    return {"message": f"Request {status} successfully"}
\ No newline at end of file
+    result = await run_db_write(
+        inventory_service.update_request_status,
+        request_id,
+        status,
+        approved_by=current_user["user_id"]
+    )
+
+    # Patient sees their request move; other dashboards refresh lists/stats
+    topics = {f"user:{result['patient_id']}", "role:hospital", "role:admin"}
+    banks = {a["blood_bank_id"] for a in result["allocations"]}
+    topics.update(f"user:{bank_id}" for bank_id in banks)
+    event_hub.publish("request.status", result, topics)
+
+    return {
+        "message": f"Request {status} successfully",
+        "allocations": result["allocations"]
+    }
@@ -0,0 +1,124 @@
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from app.middleware.auth_middleware import get_current_user
+from app.database import run_db, run_db_write
+from app.services.inbox_service import unread_count
+
+router = APIRouter(prefix="/notifications", tags=["Notifications"])
+
+INBOX_PAGE_SIZE = 50
+INBOX_MAX_PAGE_SIZE = 200
+MARK_READ_MAX_IDS = 1000
+
+
+class MarkRead(BaseModel):
+    ids: list[int] | None = None  # these notifications
+    up_to_id: int | None = None   # or everything up to and including this id
+
+
+# 🔹 Inbox
+# since_id: rows newer than the last one the client has, oldest first (polling).
+# before_id: older pages, newest first. Each read state is its own range scan
+# on idx_notifications_inbox (user_id, is_read, id), merged by id, so no
+# query sorts more than 2 * limit rows.
+def _fetch_inbox(conn, user_id, since_id, before_id, unread_only, limit):
+    bounds = ""
+    bound_params = []
+
+    if since_id is not None:
+        bounds += " AND id > ?"
+        bound_params.append(since_id)
+    if before_id is not None:
+        bounds += " AND id < ?"
+        bound_params.append(before_id)
+
+    order = "ASC" if since_id is not None else "DESC"
+    states = (0,) if unread_only else (0, 1)
+
+    part = f"""
+        SELECT * FROM (
+            SELECT id, message, type, is_read, created_at
+            FROM notifications
+            WHERE user_id = ? AND is_read = ?{bounds}
+            ORDER BY id {order}
+            LIMIT ?
+        )
+    """
+    params = []
+    for state in states:
+        params += [user_id, state, *bound_params, limit]
+
+    cursor = conn.cursor()
+    cursor.execute(f"{' UNION ALL '.join([part] * len(states))} ORDER BY id {order} LIMIT ?", params + [limit])
+    rows = [dict(row) for row in cursor.fetchall()]
+
+    return {
+        "notifications": rows,
+        "unread_count": unread_count(cursor, user_id)
+    }
+
+
+@router.get("")
+async def get_inbox(
+    since_id: int | None = Query(None, ge=0),
+    before_id: int | None = Query(None, ge=1),
+    unread_only: bool = False,
+    limit: int = Query(INBOX_PAGE_SIZE, ge=1, le=INBOX_MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user)
+):
+    if since_id is not None and before_id is not None:
+        raise HTTPException(status_code=400, detail="Use either since_id or before_id")
+
+    return await run_db(_fetch_inbox, current_user["user_id"], since_id, before_id, unread_only, limit)
+
+
+# 🔹 Unread badge: one primary-key lookup on notification_unread
+def _unread_count(conn, user_id):
+    return unread_count(conn.cursor(), user_id)
+
+
+@router.get("/unread-count")
+async def get_unread_count(current_user: dict = Depends(get_current_user)):
+    return {"unread_count": await run_db(_unread_count, current_user["user_id"])}
+
+
+# 🔹 Mark read (one UPDATE however many rows)
+def _mark_read(conn, user_id, ids, up_to_id):
+    cursor = conn.cursor()
+
+    if ids is not None:
+        cursor.execute("""
+            UPDATE notifications
+            SET is_read = 1
+            WHERE user_id = ? AND is_read = 0
+            AND id IN (SELECT value FROM json_each(?))
+        """, (user_id, json.dumps(ids)))
+    else:
+        cursor.execute("""
+            UPDATE notifications
+            SET is_read = 1
+            WHERE user_id = ? AND is_read = 0 AND id <= ?
+        """, (user_id, up_to_id))
+
+    marked = cursor.rowcount
+    conn.commit()
+
+    return {
+        "marked_read": marked,
+        "unread_count": unread_count(cursor, user_id)
+    }
+
+
+@router.post("/mark-read")
+async def mark_read(
+    data: MarkRead,
+    current_user: dict = Depends(get_current_user)
+):
+    if (data.ids is None) == (data.up_to_id is None):
+        raise HTTPException(status_code=400, detail="Give either ids or up_to_id")
+    if data.ids is not None and len(data.ids) > MARK_READ_MAX_IDS:
+        raise HTTPException(status_code=413, detail=f"At most {MARK_READ_MAX_IDS} ids per call")
+
+    return await run_db_write(_mark_read, current_user["user_id"], data.ids, data.up_to_id)
@@ -1,31 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException
+from functools import partial
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from app.middleware.auth_middleware import get_current_user
-from app.database import get_connection
+from app.services import response_cache
+from app.services.pagination import (
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    page_limit,
+    page_response,
+    request_filters,
+    stream_ndjson,
+)
 
 router = APIRouter(prefix="/patient", tags=["Patient"])
 
+PATIENT_REQUESTS_SQL = """
+    SELECT pr.id,
+           pr.blood_group,
+           pr.units_required,
+           pr.request_type,
+           pr.status,
+           pr.created_at
+    FROM patient_requests pr
+"""
+
 
 @router.get("/requests")
-def get_my_requests(current_user: dict = Depends(get_current_user)):
+async def get_my_requests(
+    request: Request,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    page_cursor: str | None = Query(None, alias="cursor"),
+    status: str | None = None,
+    blood_group: str | None = None,
+    created_from: str | None = None,
+    created_to: str | None = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    current_user: dict = Depends(get_current_user)
+):
     if current_user["role"] != "patient":
         raise HTTPException(status_code=403, detail="Only patients allowed")
 
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT id,
-               blood_group,
-               units_required,
-               request_type,
-               status,
-               created_at
-        FROM patient_requests
-        WHERE patient_id = ?
-        ORDER BY created_at DESC
-    """, (current_user["user_id"],))
-
-    rows = cursor.fetchall()
-    conn.close()
-
-    return [dict(row) for row in rows]
\ No newline at end of file
+    clauses, params = request_filters(status, blood_group, created_from, created_to)
+    clauses.insert(0, "pr.patient_id = ?")
+    params.insert(0, current_user["user_id"])
+    after = decode_cursor(page_cursor) if page_cursor else None
+    limit = page_limit(limit, page_cursor)
+
+    if format == "ndjson":
+        return StreamingResponse(
+            stream_ndjson(PATIENT_REQUESTS_SQL, clauses, params, after),
+            media_type="application/x-ndjson"
+        )
+
+    # Cached per patient until patient_requests is written (ETag / 304)
+    key = ("patient.requests", current_user["user_id"], limit, page_cursor, status, blood_group, created_from, created_to)
+    return await response_cache.respond(
+        request,
+        key,
+        ("patient_requests",),
+        partial(page_response, PATIENT_REQUESTS_SQL, clauses, params, limit, after)
+    )
\ No newline at end of file
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from app.middleware.auth_middleware import get_current_user
-from app.database import get_connection
-from app.services.matching_service import find_matching_donors
+from app.database import run_db_task, run_db_write
+from app.services import event_hub, response_cache
+from app.services.matching_service import find_matching_donors, find_matching_donors_batch
 
 router = APIRouter(prefix="/requests", tags=["Requests"])
 
@@ -16,15 +17,13 @@ class BloodRequest(BaseModel):
     longitude: float
 
 
-@router.post("/create")
-def create_blood_request(
-    request: BloodRequest,
-    current_user: dict = Depends(get_current_user)
-):
-    if current_user["role"] != "patient":
-        raise HTTPException(status_code=403, detail="Only patients can create requests")
+class BloodRequestBatch(BaseModel):
+    requests: list[BloodRequest]
+
 
-    conn = get_connection()
+# Only the INSERT runs on the DB writer; matching is a read and goes to the
+# DB executor, so it never holds the cross-process writer lock
+def _create_request(conn, patient_id, request):
     cursor = conn.cursor()
 
     cursor.execute("""
@@ -32,24 +31,97 @@ def create_blood_request(
         (patient_id, blood_group, units_required, request_type, scheduled_date)
         VALUES (?, ?, ?, ?, ?)
     """, (
-        current_user["user_id"],
+        patient_id,
         request.blood_group,
         request.units_required,
         request.request_type,
         request.scheduled_date
     ))
+    request_id = cursor.lastrowid
 
     conn.commit()
-    conn.close()
+    response_cache.bump("patient_requests")
+
+    return request_id
+
+
+@router.post("/create")
+async def create_blood_request(
+    request: BloodRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] != "patient":
+        raise HTTPException(status_code=403, detail="Only patients can create requests")
+
+    request_id = await run_db_write(_create_request, current_user["user_id"], request)
 
     # Smart Matching
-    matched_donors = find_matching_donors(
+    matched_donors = await run_db_task(
+        find_matching_donors,
         request.blood_group,
         request.latitude,
         request.longitude
     )
 
+    event_hub.publish("request.created", {
+        "id": request_id,
+        "patient_id": current_user["user_id"],
+        "blood_group": request.blood_group,
+        "units_required": request.units_required,
+        "request_type": request.request_type,
+        "status": "pending"
+    }, {f"user:{current_user['user_id']}", "role:hospital", "role:admin"})
+
     return {
         "message": "Blood request created successfully",
         "matched_donors": matched_donors
-    }
\ No newline at end of file
+    }
+
+
+def _create_requests(conn, patient_id, requests):
+    cursor = conn.cursor()
+
+    cursor.executemany("""
+        INSERT INTO patient_requests 
+        (patient_id, blood_group, units_required, request_type, scheduled_date)
+        VALUES (?, ?, ?, ?, ?)
+    """, [
+        (
+            patient_id,
+            r.blood_group,
+            r.units_required,
+            r.request_type,
+            r.scheduled_date
+        )
+        for r in requests
+    ])
+
+    conn.commit()
+    response_cache.bump("patient_requests")
+
+
+@router.post("/create-batch")
+async def create_blood_requests_batch(
+    batch: BloodRequestBatch,
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] != "patient":
+        raise HTTPException(status_code=403, detail="Only patients can create requests")
+
+    await run_db_write(_create_requests, current_user["user_id"], batch.requests)
+
+    # Smart Matching for the whole burst in one pass
+    matches = await run_db_task(find_matching_donors_batch, [
+        (r.blood_group, r.latitude, r.longitude)
+        for r in batch.requests
+    ])
+
+    event_hub.publish("request.created", {
+        "patient_id": current_user["user_id"],
+        "count": len(batch.requests)
+    }, {f"user:{current_user['user_id']}", "role:hospital", "role:admin"})
+
+    return {
+        "message": "Blood requests created successfully",
+        "matched_donors": matches
+    }
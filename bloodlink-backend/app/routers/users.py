@@ -1,5 +1,10 @@
-from fastapi import APIRouter, Depends
+from datetime import date, datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
 from app.middleware.auth_middleware import get_current_user
+from app.database import get_db, write_lock
+from app.services import donor_roster
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -8,4 +13,150 @@ def get_me(current_user: dict = Depends(get_current_user)):
     return {
         "message": "Authenticated",
         "user": current_user
-    }
\ No newline at end of file
+    }
+
+
+class AvailabilityUpdate(BaseModel):
+    is_available: bool
+
+
+# 🔹 Donor availability toggle
+@router.put("/me/availability")
+def update_availability(
+    data: AvailabilityUpdate,
+    current_user: dict = Depends(get_current_user),
+    conn=Depends(get_db)
+):
+    cursor = conn.cursor()
+
+    with write_lock():
+        cursor.execute("""
+            UPDATE users
+            SET is_available = ?
+            WHERE id = ?
+        """, (int(data.is_available), current_user["user_id"]))
+
+        cursor.execute("SELECT * FROM users WHERE id = ?", (current_user["user_id"],))
+        user = cursor.fetchone()
+
+        conn.commit()
+
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    donor_roster.apply_user(user)
+
+    return {
+        "message": "Availability updated",
+        "is_available": data.is_available
+    }
+
+
+# -----------------------------
+# Donor eligibility
+# -----------------------------
+# eligible_from is derived by triggers (schema.sql) from the last donation
+# and any deferral; matching skips donors until that date.
+STAFF_ROLES = ("hospital", "bloodbank", "admin")
+
+
+def _today():
+    # UTC, like DATE('now') in matching and the roster's eligibility check
+    return datetime.now(timezone.utc).date()
+
+
+class DonationRecord(BaseModel):
+    donated_on: date | None = None  # default: today (UTC)
+
+
+class DeferralUpdate(BaseModel):
+    deferred_until: date | None = None  # None lifts the deferral
+
+
+def _eligibility(user):
+    return {
+        "donor_id": user["id"],
+        "last_donation_date": user["last_donation_date"],
+        "deferred_until": user["deferred_until"],
+        "eligible_from": user["eligible_from"],
+        "eligible_now": user["eligible_from"] is None or user["eligible_from"] <= _today().isoformat()
+    }
+
+
+def _update_donor(conn, donor_id, assignment, value):
+    cursor = conn.cursor()
+
+    with write_lock():
+        cursor.execute(f"""
+            UPDATE users
+            SET {assignment}
+            WHERE id = ? AND role = 'donor'
+        """, (value, donor_id))
+
+        if not cursor.rowcount:
+            raise HTTPException(status_code=404, detail="Donor not found")
+
+        cursor.execute("SELECT * FROM users WHERE id = ?", (donor_id,))
+        user = cursor.fetchone()
+
+        conn.commit()
+
+    donor_roster.apply_user(user)
+
+    return _eligibility(user)
+
+
+@router.get("/me/eligibility")
+def get_my_eligibility(
+    current_user: dict = Depends(get_current_user),
+    conn=Depends(get_db)
+):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users WHERE id = ? AND role = 'donor'", (current_user["user_id"],))
+    user = cursor.fetchone()
+
+    if not user:
+        raise HTTPException(status_code=404, detail="Donor not found")
+
+    return _eligibility(user)
+
+
+# 🔹 Donation recorded by hospital / blood bank staff
+@router.post("/{donor_id}/donations")
+def record_donation(
+    donor_id: int,
+    data: DonationRecord,
+    current_user: dict = Depends(get_current_user),
+    conn=Depends(get_db)
+):
+    if current_user["role"] not in STAFF_ROLES:
+        raise HTTPException(status_code=403, detail="Only hospitals, blood banks or admin allowed")
+
+    today = _today()
+    donated_on = data.donated_on or today
+    if donated_on > today:
+        raise HTTPException(status_code=400, detail="donated_on cannot be in the future")
+
+    # An older record never moves the last donation back
+    return _update_donor(
+        conn,
+        donor_id,
+        "last_donation_date = MAX(COALESCE(last_donation_date, ''), ?)",
+        donated_on.isoformat()
+    )
+
+
+# 🔹 Deferral set at screening (illness, travel, medication, ...)
+@router.put("/{donor_id}/deferral")
+def update_deferral(
+    donor_id: int,
+    data: DeferralUpdate,
+    current_user: dict = Depends(get_current_user),
+    conn=Depends(get_db)
+):
+    if current_user["role"] not in STAFF_ROLES:
+        raise HTTPException(status_code=403, detail="Only hospitals, blood banks or admin allowed")
+
+    deferred_until = data.deferred_until.isoformat() if data.deferred_until else None
+
+    return _update_donor(conn, donor_id, "deferred_until = ?", deferred_until)
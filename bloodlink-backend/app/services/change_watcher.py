@@ -0,0 +1,204 @@
+import json
+import threading
+
+from app.config import DATA_VERSION_POLL_SECONDS, EVENT_LOG_KEEP, ROSTER_PATCH_MAX_USERS, USER_CHANGES_KEEP
+from app.database import get_connection, write_lock
+from app.services import donor_roster, event_hub, response_cache, stats_service
+
+# -----------------------------
+# Cross-process invalidation
+# -----------------------------
+# Each worker keeps its own response cache and donor roster. PRAGMA
+# data_version on a connection of our own moves whenever any other
+# connection, in this process or another, commits. Then table_versions
+# (kept by triggers) says which tables changed and user_changes which users,
+# so only the affected cache entries are dropped and only those donors are
+# re-read. The other connection may be another worker or a CLI such as
+# donor_import, so the watcher runs with a single worker too. This worker's
+# own writes come back as well; re-applying them is harmless.
+#
+# With several workers it also relays live events: each poll writes the
+# events this worker published to event_log and replays the other workers'
+# rows to local SSE subscribers, after the caches they would refetch from
+# were dropped.
+
+_stop = threading.Event()
+_watcher = None
+_state = {"data_version": None, "versions": {}, "user_seq": 0, "event_id": 0}
+
+_stats = {
+    "polls": 0,
+    "changes": 0,
+    "tables_bumped": 0,
+    "users_patched": 0,
+    "roster_reloads": 0,
+    "events_written": 0,
+    "events_replayed": 0,
+}
+
+
+def _snapshot(cursor):
+    cursor.execute("PRAGMA data_version")
+    _state["data_version"] = cursor.fetchone()[0]
+    cursor.execute("SELECT name, version FROM table_versions")
+    _state["versions"] = dict(cursor.fetchall())
+    cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM user_changes")
+    _state["user_seq"] = cursor.fetchone()[0]
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM event_log")
+    _state["event_id"] = cursor.fetchone()[0]
+
+
+def _sync_roster(cursor):
+    cursor.execute("SELECT MIN(seq), MAX(seq) FROM user_changes")
+    low, high = cursor.fetchone()
+    last = _state["user_seq"]
+    if high is None or high <= last:
+        return
+
+    cursor.execute("""
+        SELECT DISTINCT user_id FROM user_changes
+        WHERE seq > ? AND seq <= ?
+    """, (last, high))
+    user_ids = [row[0] for row in cursor.fetchall()]
+
+    # Rows we never saw were pruned, or the batch is an import: reload
+    if low > last + 1 or len(user_ids) > ROSTER_PATCH_MAX_USERS:
+        donor_roster.invalidate()
+        _stats["roster_reloads"] += 1
+    else:
+        cursor.execute("""
+            SELECT * FROM users
+            WHERE id IN (SELECT value FROM json_each(?))
+        """, (json.dumps(user_ids),))
+        users = cursor.fetchall()
+
+        for user in users:
+            donor_roster.apply_user(user)
+        for user_id in set(user_ids) - {user["id"] for user in users}:
+            donor_roster.remove_user(user_id)
+        _stats["users_patched"] += len(user_ids)
+
+    _state["user_seq"] = high
+
+    if high - low >= 2 * USER_CHANGES_KEEP:
+        with write_lock():
+            cursor.execute("DELETE FROM user_changes WHERE seq <= ?", (high - USER_CHANGES_KEEP,))
+            cursor.connection.commit()
+
+
+def _write_events(cursor):
+    events = event_hub.take_relayed()
+    if not events:
+        return
+
+    with write_lock():
+        cursor.executemany("""
+            INSERT INTO event_log (origin, type, data, topics)
+            VALUES (?, ?, ?, ?)
+        """, [
+            (event_hub.ORIGIN, event_type, json.dumps(data), json.dumps(topics))
+            for event_type, data, topics in events
+        ])
+        cursor.connection.commit()
+    _stats["events_written"] += len(events)
+
+
+def _replay_events(cursor):
+    cursor.execute("""
+        SELECT id, origin, type, data, topics FROM event_log
+        WHERE id > ?
+        ORDER BY id
+    """, (_state["event_id"],))
+    rows = cursor.fetchall()
+    if not rows:
+        return
+
+    for row in rows:
+        if row["origin"] != event_hub.ORIGIN:
+            event_hub.replay(row["type"], json.loads(row["data"]), json.loads(row["topics"]))
+            _stats["events_replayed"] += 1
+    _state["event_id"] = rows[-1]["id"]
+
+    cursor.execute("SELECT MIN(id) FROM event_log")
+    low = cursor.fetchone()[0]
+    if _state["event_id"] - low >= 2 * EVENT_LOG_KEEP:
+        with write_lock():
+            cursor.execute("DELETE FROM event_log WHERE id <= ?", (_state["event_id"] - EVENT_LOG_KEEP,))
+            cursor.connection.commit()
+
+
+def poll_once(conn):
+    # Returns the tables that changed since the last poll
+    cursor = conn.cursor()
+    _write_events(cursor)
+
+    cursor.execute("PRAGMA data_version")
+    data_version = cursor.fetchone()[0]
+    _stats["polls"] += 1
+
+    if data_version == _state["data_version"]:
+        return []
+    _state["data_version"] = data_version
+
+    cursor.execute("SELECT name, version FROM table_versions")
+    versions = dict(cursor.fetchall())
+    changed = [name for name, version in versions.items() if _state["versions"].get(name) != version]
+    _state["versions"] = versions
+
+    # notifications, outbox, ... nothing cached
+    if changed:
+        _stats["changes"] += 1
+        _stats["tables_bumped"] += len(changed)
+        response_cache.bump(*changed)
+        stats_service.invalidate_cache()
+
+        if "users" in changed:
+            _sync_roster(cursor)
+
+    _replay_events(cursor)
+
+    return changed
+
+
+def _run(conn):
+    while not _stop.wait(DATA_VERSION_POLL_SECONDS):
+        try:
+            poll_once(conn)
+        except Exception as e:
+            print("Change Watcher Error:", e)
+
+    conn.close()
+
+
+def start_watcher(relay_events=True):
+    global _watcher
+    if _watcher is not None and _watcher.is_alive():
+        return
+
+    # One connection for the thread's lifetime: data_version is per connection
+    conn = get_connection()
+    _snapshot(conn.cursor())
+    event_hub.enable_relay(relay_events)
+
+    _stop.clear()
+    _watcher = threading.Thread(target=_run, args=(conn,), name="change-watcher", daemon=True)
+    _watcher.start()
+
+
+def stop_watcher(timeout=10):
+    global _watcher
+    _stop.set()
+    if _watcher is not None:
+        _watcher.join(timeout)
+        _watcher = None
+    event_hub.enable_relay(False)
+
+
+def watcher_stats():
+    return {
+        **_stats,
+        "running": _watcher is not None and _watcher.is_alive(),
+        "poll_seconds": DATA_VERSION_POLL_SECONDS,
+        "data_version": _state["data_version"],
+        "versions": dict(_state["versions"]),
+    }
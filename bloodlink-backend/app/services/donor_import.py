@@ -0,0 +1,300 @@
+import argparse
+import csv
+import itertools
+import json
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from datetime import date
+
+from app.config import DONOR_IMPORT_BATCH_SIZE
+from app.database import db_connection, write_lock
+from app.services import donor_roster
+from app.services.geocoding_service import geocode, load_gazetteer
+from app.services.inventory_service import BLOOD_GROUPS, normalize_blood_group
+
+MAX_ERROR_SAMPLES = 50
+MAX_RECENT_JOBS = 20
+
+# -----------------------------
+# Streaming donor import
+# -----------------------------
+# Partner registries arrive as CSV or NDJSON. Records are read lazily,
+# validated and geocoded a batch at a time, and upserted one transaction
+# per batch, so memory stays flat however large the file is. Re-importing
+# the same file updates donors in place (keyed on source + external id).
+
+UPSERT_DONOR_SQL = """
+    INSERT INTO users
+    (google_id, role, name, email, phone, blood_group, city, pincode, latitude, longitude, age, is_available,
+     last_donation_date)
+    VALUES (?, 'donor', ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(google_id) DO UPDATE SET
+        name = excluded.name,
+        email = excluded.email,
+        phone = excluded.phone,
+        blood_group = excluded.blood_group,
+        city = excluded.city,
+        pincode = excluded.pincode,
+        latitude = excluded.latitude,
+        longitude = excluded.longitude,
+        age = COALESCE(excluded.age, users.age),
+        is_available = excluded.is_available,
+        last_donation_date = COALESCE(excluded.last_donation_date, users.last_donation_date)
+    WHERE users.role = 'donor'
+"""
+
+_jobs_lock = threading.Lock()
+_jobs = {}  # job id -> ImportJob, most recent last
+
+
+def parse_csv(lines):
+    return csv.DictReader(lines)
+
+
+def parse_ndjson(lines):
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None  # counted as invalid
+
+
+def _optional_float(value):
+    if value in (None, ""):
+        return None
+    return float(value)
+
+
+def validate_donor(raw, source):
+    # Returns the UPSERT_DONOR_SQL parameters, or raises ValueError
+    if not isinstance(raw, dict):
+        raise ValueError("record must be an object")
+
+    name = str(raw.get("name") or "").strip()
+    if not name:
+        raise ValueError("name is required")
+
+    blood_group = normalize_blood_group(str(raw.get("blood_group") or ""))
+    if blood_group not in BLOOD_GROUPS:
+        raise ValueError(f"invalid blood_group {raw.get('blood_group')!r}")
+
+    email = str(raw.get("email") or "").strip() or None
+    phone = str(raw.get("phone") or "").strip() or None
+    external_id = str(raw.get("external_id") or raw.get("id") or email or phone or "").strip()
+    if not external_id:
+        raise ValueError("one of external_id, email or phone is required")
+
+    google_id = f"import:{source}:{external_id}"
+
+    try:
+        latitude = _optional_float(raw.get("latitude"))
+        longitude = _optional_float(raw.get("longitude"))
+        age = int(raw["age"]) if raw.get("age") not in (None, "") else None
+    except (TypeError, ValueError):
+        raise ValueError("latitude, longitude and age must be numbers")
+
+    if latitude is not None and not -90 <= latitude <= 90:
+        raise ValueError("latitude out of range")
+    if longitude is not None and not -180 <= longitude <= 180:
+        raise ValueError("longitude out of range")
+
+    city = str(raw.get("city") or "").strip() or None
+    pincode = str(raw.get("pincode") or "").strip() or None
+
+    is_available = str(raw.get("is_available", "1")).strip().lower() not in ("0", "false", "no")
+
+    last_donation_date = str(raw.get("last_donation_date") or "").strip() or None
+    if last_donation_date is not None:
+        try:
+            last_donation_date = date.fromisoformat(last_donation_date).isoformat()
+        except ValueError:
+            raise ValueError(f"invalid last_donation_date {last_donation_date!r}")
+
+    return [
+        google_id,
+        name,
+        email or f"{google_id}@donors.invalid",  # users.email is NOT NULL UNIQUE
+        phone,
+        blood_group,
+        city,
+        pincode,
+        latitude,
+        longitude,
+        age,
+        1 if is_available else 0,
+        last_donation_date
+    ]
+
+
+class ImportJob:
+    def __init__(self, source, batch_size=DONOR_IMPORT_BATCH_SIZE, progress=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.source = source
+        self.batch_size = batch_size
+        self.progress = progress  # callable(stats) after every batch
+        self.started_at = time.time()
+        self.finished_at = None
+        self.stats = {
+            "read": 0,
+            "imported": 0,
+            "invalid": 0,
+            "rejected": 0,     # valid but refused by the database (e.g. email taken)
+            "geocoded": 0,
+            "no_location": 0,
+            "batches": 0,
+        }
+        self.errors = []  # first MAX_ERROR_SAMPLES problems, with row numbers
+
+        with _jobs_lock:
+            _jobs[self.id] = self
+            while len(_jobs) > MAX_RECENT_JOBS:
+                _jobs.pop(next(iter(_jobs)))
+
+    def _error(self, row_number, message):
+        if len(self.errors) < MAX_ERROR_SAMPLES:
+            self.errors.append({"row": row_number, "error": message})
+
+    def import_batch(self, records):
+        # records: raw dicts for one batch; one transaction
+        params = []
+        first_row = self.stats["read"]
+
+        for offset, raw in enumerate(records):
+            row_number = first_row + offset + 1
+            try:
+                row = validate_donor(raw, self.source)
+            except ValueError as e:
+                self.stats["invalid"] += 1
+                self._error(row_number, str(e))
+                continue
+
+            if row[7] is None or row[8] is None:
+                coords = geocode(row[5], row[6])
+                if coords:
+                    row[7], row[8] = coords
+                    self.stats["geocoded"] += 1
+                else:
+                    self.stats["no_location"] += 1
+
+            params.append((row_number, row))
+
+        self.stats["read"] += len(records)
+
+        with db_connection() as conn, write_lock():
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                for row_number, row in params:
+                    try:
+                        cursor.execute(UPSERT_DONOR_SQL, row)
+                    except sqlite3.IntegrityError as e:  # this row only
+                        self.stats["rejected"] += 1
+                        self._error(row_number, str(e))
+                        continue
+
+                    if cursor.rowcount:
+                        self.stats["imported"] += 1
+                    else:
+                        self.stats["rejected"] += 1
+                        self._error(row_number, "google_id belongs to a non-donor account")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+        self.stats["batches"] += 1
+        if self.progress:
+            self.progress(self.summary())
+
+    def run(self, records):
+        # Sync driver for the CLI: any iterable of raw dicts
+        try:
+            while True:
+                batch = list(itertools.islice(records, self.batch_size))
+                if not batch:
+                    break
+                self.import_batch(batch)
+        finally:
+            self.finish()
+        return self.summary()
+
+    def finish(self):
+        self.finished_at = time.time()
+        # Imported donors change every roster partition
+        donor_roster.invalidate()
+
+    def summary(self):
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "id": self.id,
+            "source": self.source,
+            "running": self.finished_at is None,
+            **self.stats,
+            "elapsed_seconds": round(elapsed, 2),
+            "rows_per_second": round(self.stats["read"] / elapsed, 1) if elapsed else 0.0,
+            "errors": list(self.errors),
+        }
+
+
+def import_jobs():
+    with _jobs_lock:
+        return [job.summary() for job in reversed(list(_jobs.values()))]
+
+
+# -----------------------------
+# Command line
+# -----------------------------
+#   python -m app.services.donor_import donors registry.csv --source redcross
+#   python -m app.services.donor_import donors registry.ndjson --source redcross
+#   python -m app.services.donor_import gazetteer pincodes.csv
+
+def _print_progress(stats):
+    print(
+        f"\r{stats['read']:>10,} read  {stats['imported']:>10,} imported  "
+        f"{stats['invalid'] + stats['rejected']:>8,} skipped  {stats['rows_per_second']:>10,.0f} rows/s",
+        end="",
+        file=sys.stderr,
+        flush=True
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import donors or gazetteer entries")
+    parser.add_argument("kind", choices=["donors", "gazetteer"])
+    parser.add_argument("path", help="CSV or NDJSON file, '-' for stdin")
+    parser.add_argument("--source", default="registry", help="registry name, part of each donor's key")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=DONOR_IMPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    from app.database import init_db
+    init_db()
+
+    f = sys.stdin if args.path == "-" else open(args.path, newline="", encoding="utf-8")
+    try:
+        if args.kind == "gazetteer":
+            with db_connection() as conn:
+                loaded = load_gazetteer(conn.cursor(), f)
+                conn.commit()
+            print(f"{loaded} gazetteer rows loaded")
+            return
+
+        fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+        records = parse_ndjson(f) if fmt == "ndjson" else parse_csv(f)
+
+        job = ImportJob(args.source, args.batch_size, progress=_print_progress)
+        summary = job.run(iter(records))
+        print(file=sys.stderr)
+        print(json.dumps(summary, indent=2))
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+if __name__ == "__main__":
+    main()
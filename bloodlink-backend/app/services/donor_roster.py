@@ -0,0 +1,216 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timezone
+
+from app.database import get_connection, geo_cell
+
+# -----------------------------
+# Process-level donor roster
+# -----------------------------
+# Available donors, partitioned by blood group and kept sorted by geo_cell
+# in parallel arrays, so matching can run grid lookups without SQLite.
+# Partitions load lazily and are patched in place on writes. Donors still
+# in their donation cooldown stay in the roster and are skipped at lookup
+# time, since eligibility changes with the date, not with a write.
+
+_lock = threading.Lock()
+_partitions = {}
+_donor_group = {}  # donor id -> blood group of the partition holding it
+
+_stats = {
+    "hits": 0,
+    "misses": 0,
+    "rebuilds": 0,
+    "rebuild_seconds_total": 0.0,
+    "last_rebuild_seconds": 0.0,
+    "patches": 0,
+}
+
+
+class _Partition:
+    __slots__ = ("cells", "ids", "lats", "lons", "eligible", "names", "phones")
+
+    def __init__(self):
+        self.cells = array("q")
+        self.ids = array("q")
+        self.lats = array("d")
+        self.lons = array("d")
+        self.eligible = array("l")  # eligible_from as a date ordinal, 0 = now
+        self.names = []
+        self.phones = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def insert(self, donor_id, lat, lon, eligible_from, name, phone):
+        cell = geo_cell(lat, lon)
+        index = bisect_right(self.cells, cell)
+        self.cells.insert(index, cell)
+        self.ids.insert(index, donor_id)
+        self.lats.insert(index, lat)
+        self.lons.insert(index, lon)
+        self.eligible.insert(index, _ordinal(eligible_from))
+        self.names.insert(index, name)
+        self.phones.insert(index, phone)
+
+    def remove(self, donor_id):
+        index = self.ids.index(donor_id)
+        for column in (self.cells, self.ids, self.lats, self.lons, self.eligible, self.names, self.phones):
+            del column[index]
+
+
+def _ordinal(eligible_from):
+    return date.fromisoformat(eligible_from).toordinal() if eligible_from else 0
+
+
+def _is_eligible(user):
+    return (
+        user["role"] == "donor"
+        and user["is_available"]
+        and user["blood_group"]
+        and user["latitude"] is not None
+        and user["longitude"] is not None
+    )
+
+
+def _load_partition(blood_group):
+    start = time.perf_counter()
+
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        SELECT id, name, phone, latitude, longitude, geo_cell, eligible_from
+        FROM users
+        WHERE role = 'donor'
+        AND blood_group = ?
+        AND is_available = 1
+        AND geo_cell IS NOT NULL
+        ORDER BY geo_cell
+    """, (blood_group,))
+
+    partition = _Partition()
+    for row in cursor:
+        partition.cells.append(row["geo_cell"])
+        partition.ids.append(row["id"])
+        partition.lats.append(row["latitude"])
+        partition.lons.append(row["longitude"])
+        partition.eligible.append(_ordinal(row["eligible_from"]))
+        partition.names.append(row["name"])
+        partition.phones.append(row["phone"])
+
+    conn.close()
+
+    elapsed = time.perf_counter() - start
+    _stats["rebuilds"] += 1
+    _stats["rebuild_seconds_total"] += elapsed
+    _stats["last_rebuild_seconds"] = elapsed
+
+    return partition
+
+
+def _get_partition(blood_group):
+    partition = _partitions.get(blood_group)
+    if partition is not None:
+        _stats["hits"] += 1
+        return partition
+
+    _stats["misses"] += 1
+    partition = _load_partition(blood_group)
+    _partitions[blood_group] = partition
+    for donor_id in partition.ids:
+        _donor_group[donor_id] = blood_group
+    return partition
+
+
+# -----------------------------
+# Reads
+# -----------------------------
+def candidates(donor_groups, min_lat, max_lat, cell_ranges):
+    # Same contract as the SQL grid query in matching_service: donors of
+    # any of donor_groups that are eligible today
+    today = datetime.now(timezone.utc).date().toordinal()  # DATE('now') is UTC
+
+    with _lock:
+        donors = []
+        for blood_group in donor_groups:
+            partition = _get_partition(blood_group)
+
+            for low, high in cell_ranges:
+                start = bisect_left(partition.cells, low)
+                end = bisect_right(partition.cells, high, lo=start)
+
+                for i in range(start, end):
+                    lat = partition.lats[i]
+                    if min_lat <= lat <= max_lat and partition.eligible[i] <= today:
+                        donors.append({
+                            "id": partition.ids[i],
+                            "name": partition.names[i],
+                            "phone": partition.phones[i],
+                            "blood_group": blood_group,
+                            "latitude": lat,
+                            "longitude": partition.lons[i],
+                        })
+
+        return donors
+
+
+# -----------------------------
+# Write-through updates
+# -----------------------------
+def apply_user(user):
+    # Patch the roster from a freshly written users row
+    with _lock:
+        _stats["patches"] += 1
+
+        old_group = _donor_group.pop(user["id"], None)
+        if old_group is not None and old_group in _partitions:
+            _partitions[old_group].remove(user["id"])
+
+        if not _is_eligible(user):
+            return
+
+        partition = _partitions.get(user["blood_group"])
+        if partition is None:
+            return  # loads fresh on first use
+
+        partition.insert(
+            user["id"],
+            user["latitude"],
+            user["longitude"],
+            user["eligible_from"],
+            user["name"],
+            user["phone"]
+        )
+        _donor_group[user["id"]] = user["blood_group"]
+
+
+def remove_user(user_id):
+    with _lock:
+        group = _donor_group.pop(user_id, None)
+        if group is not None and group in _partitions:
+            _partitions[group].remove(user_id)
+
+
+def invalidate(blood_group=None):
+    with _lock:
+        groups = [blood_group] if blood_group is not None else list(_partitions)
+
+        for group in groups:
+            partition = _partitions.pop(group, None)
+            if partition is None:
+                continue
+            for donor_id in partition.ids:
+                _donor_group.pop(donor_id, None)
+
+
+def roster_stats():
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "hit_rate": round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+            "partitions": {group: len(p) for group, p in _partitions.items()},
+        }
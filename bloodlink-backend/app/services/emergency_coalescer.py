@@ -0,0 +1,154 @@
+import json
+import threading
+import time
+
+from app.config import DONOR_ALERT_MIN_INTERVAL_SECONDS, EMERGENCY_COALESCE_SECONDS
+from app.database import db_connection, geo_cell
+
+# -----------------------------
+# Emergency coalescing
+# -----------------------------
+# Emergencies for the same blood group in the same grid cell (0.1°) within
+# EMERGENCY_COALESCE_SECONDS of the first one form a group. The first
+# request matches donors and alerts them; later ones reuse that match and
+# only rewrite the still-pending alerts into one consolidated message, so
+# an incident reported by several hospitals costs one matching pass and one
+# alert per donor. Groups live in emergency_groups and are claimed inside
+# the emergency's write transaction; the writer lock serializes those across
+# workers, so every worker joins the same group and alert dedupe keys match.
+
+_lock = threading.Lock()
+
+_stats = {
+    "groups": 0,
+    "joined": 0,          # emergencies that reused a group's match
+    "alerts_queued": 0,
+    "alerts_merged": 0,   # consolidated into an existing alert
+    "alerts_rate_limited": 0,
+}
+
+
+class _Group:
+    __slots__ = ("id", "emergencies", "donors", "alerted")
+
+    def __init__(self, group_id, emergencies, donors, alerted):
+        self.id = group_id
+        self.emergencies = emergencies
+        self.donors = donors     # matched donors, shared with joiners
+        self.alerted = alerted   # the subset that passed the rate limit
+
+
+def _open_group(db, blood_group, cell, now):
+    if EMERGENCY_COALESCE_SECONDS <= 0:
+        return None
+    return db.execute("""
+        SELECT id, emergencies, donors, alerted
+        FROM emergency_groups
+        WHERE blood_group = ? AND geo_cell = ? AND opened_at > ?
+        ORDER BY opened_at DESC
+        LIMIT 1
+    """, (blood_group, cell, now - EMERGENCY_COALESCE_SECONDS)).fetchone()
+
+
+def group_donors(db, blood_group, latitude, longitude, now=None):
+    # Read side: the open group's matched donors, or None when the request
+    # has to match itself. Checked before matching, so an emergency arriving
+    # after the group committed skips its own matching pass.
+    now = time.time() if now is None else now
+    row = _open_group(db, blood_group, geo_cell(latitude, longitude), now)
+    return json.loads(row["donors"]) if row is not None else None
+
+
+def claim(cursor, blood_group, latitude, longitude, donors, now=None):
+    # Inside the write transaction. Returns (group, opened); a joined group
+    # keeps its opener's donors, an opened one stores `donors`.
+    now = time.time() if now is None else now
+    cell = geo_cell(latitude, longitude)
+
+    row = _open_group(cursor, blood_group, cell, now)
+    if row is not None:
+        cursor.execute("UPDATE emergency_groups SET emergencies = emergencies + 1 WHERE id = ?", (row["id"],))
+        count(joined=1)
+        return _Group(row["id"], row["emergencies"] + 1, json.loads(row["donors"]), json.loads(row["alerted"])), False
+
+    cursor.execute("DELETE FROM emergency_groups WHERE opened_at <= ?", (now - max(EMERGENCY_COALESCE_SECONDS, 0),))
+    cursor.execute("""
+        INSERT INTO emergency_groups (blood_group, geo_cell, opened_at, donors)
+        VALUES (?, ?, ?, ?)
+    """, (blood_group, cell, now, json.dumps(donors)))
+    count(groups=1)
+    return _Group(cursor.lastrowid, 1, donors, []), True
+
+
+def set_alerted(cursor, group, alerted):
+    group.alerted = alerted
+    cursor.execute("UPDATE emergency_groups SET alerted = ? WHERE id = ?", (json.dumps(alerted), group.id))
+
+
+def alert_message(blood_group, emergencies):
+    if emergencies <= 1:
+        return f"🚨 Emergency! {blood_group} blood needed urgently."
+    return f"🚨 Emergency! {blood_group} blood needed urgently ({emergencies} requests nearby)."
+
+
+def alert_key(group, donor_id):
+    return f"emergency-group:{group.id}:user:{donor_id}"
+
+
+def count(**amounts):
+    with _lock:
+        for key, amount in amounts.items():
+            _stats[key] += amount
+
+
+# -----------------------------
+# Per-donor alert rate limit
+# -----------------------------
+# Last alert time per donor in donor_alerts, written in the same transaction
+# as the alerts, so a rolled-back emergency leaves no trace and every worker
+# sees the same limit. A donor alerted less than
+# DONOR_ALERT_MIN_INTERVAL_SECONDS ago is skipped for new groups.
+def acquire_alerts(cursor, donors, now=None):
+    # Returns the donors that may be alerted and marks them alerted at `now`
+    now = time.time() if now is None else now
+    if not donors:
+        return []
+
+    cursor.execute("""
+        SELECT user_id FROM donor_alerts
+        WHERE user_id IN (SELECT value FROM json_each(?))
+        AND last_alert_at > ?
+    """, (json.dumps([donor["id"] for donor in donors]), now - DONOR_ALERT_MIN_INTERVAL_SECONDS))
+    limited = {row[0] for row in cursor.fetchall()}
+    allowed = [donor for donor in donors if donor["id"] not in limited]
+
+    cursor.executemany("""
+        INSERT INTO donor_alerts (user_id, last_alert_at) VALUES (?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET last_alert_at = excluded.last_alert_at
+    """, [(donor["id"], now) for donor in allowed])
+
+    count(alerts_rate_limited=len(donors) - len(allowed))
+    return allowed
+
+
+def coalescer_stats():
+    # Counters are this worker's; open_groups is shared
+    with db_connection() as conn:
+        open_groups = conn.execute(
+            "SELECT COUNT(*) FROM emergency_groups WHERE opened_at > ?",
+            (time.time() - EMERGENCY_COALESCE_SECONDS,)
+        ).fetchone()[0]
+
+    with _lock:
+        return {
+            **_stats,
+            "open_groups": open_groups,
+            "window_seconds": EMERGENCY_COALESCE_SECONDS,
+            "donor_min_interval_seconds": DONOR_ALERT_MIN_INTERVAL_SECONDS,
+        }
+
+
+def reset():
+    with _lock:
+        for key in _stats:
+            _stats[key] = 0
@@ -0,0 +1,145 @@
+import asyncio
+import itertools
+import json
+import threading
+import time
+import uuid
+
+from app.config import EVENTS_MAX_SUBSCRIBERS, EVENTS_QUEUE_SIZE
+
+# -----------------------------
+# In-process pub/sub for dashboard push
+# -----------------------------
+# Routers publish after their transaction commits; each connected stream
+# has a bounded queue on its event loop. Topics:
+#   role:<role>    every signed-in user with that role
+#   user:<id>      one user (patient, blood bank, notified donor)
+#
+# Slow consumers: when a subscriber's queue is full its backlog is dropped
+# and replaced by a single "resync" event, so the client refetches over
+# REST once instead of the hub buffering without bound.
+#
+# Several workers: with the relay on, published events are also queued for
+# event_log, and each worker's change watcher writes its own and replays
+# the others', so a stream sees every write whichever worker made it.
+
+ORIGIN = uuid.uuid4().hex  # this process, in event_log.origin
+
+_ids = itertools.count(1)
+_lock = threading.Lock()
+_subscribers = set()
+_relay = None  # events for other workers while the relay is on
+_stats = {"published": 0, "delivered": 0, "resyncs": 0, "rejected": 0, "relayed": 0, "replayed": 0}
+
+
+class Subscriber:
+    def __init__(self, topics, loop, queue_size=EVENTS_QUEUE_SIZE):
+        self.topics = frozenset(topics)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.connected_at = time.time()
+        self.lagged = 0
+
+    def _offer(self, event):
+        # Runs on the subscriber's loop
+        try:
+            self.queue.put_nowait(event)
+            _count("delivered")
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"id": event["id"], "type": "resync", "data": {}})
+            self.lagged += 1
+            _count("resyncs")
+
+
+def _count(key, amount=1):
+    with _lock:
+        _stats[key] += amount
+
+
+def user_topics(user):
+    return {f"role:{user['role']}", f"user:{user['user_id']}"}
+
+
+def subscribe(topics):
+    # Call from the event loop that will read the queue; None when full
+    subscriber = Subscriber(topics, asyncio.get_running_loop())
+
+    with _lock:
+        if len(_subscribers) >= EVENTS_MAX_SUBSCRIBERS:
+            _stats["rejected"] += 1
+            return None
+        _subscribers.add(subscriber)
+
+    return subscriber
+
+
+def unsubscribe(subscriber):
+    with _lock:
+        _subscribers.discard(subscriber)
+
+
+def publish(event_type, data, topics):
+    # Thread-safe; safe to call from sync routers in the threadpool
+    topics = set(topics)
+
+    with _lock:
+        _stats["published"] += 1
+        if _relay is not None:
+            _relay.append((event_type, data, sorted(topics)))
+
+    return _deliver(event_type, data, topics)
+
+
+def replay(event_type, data, topics):
+    # An event another worker published; local subscribers only
+    _count("replayed")
+    return _deliver(event_type, data, set(topics))
+
+
+def enable_relay(enabled=True):
+    global _relay
+    with _lock:
+        _relay = [] if enabled else None
+
+
+def take_relayed():
+    # Events published here since the last call, oldest first
+    global _relay
+    with _lock:
+        if not _relay:
+            return []
+        events, _relay = _relay, []
+        _stats["relayed"] += len(events)
+        return events
+
+
+def _deliver(event_type, data, topics):
+    event = {"id": next(_ids), "type": event_type, "data": data}
+
+    with _lock:
+        targets = [s for s in _subscribers if s.topics & topics]
+
+    for subscriber in targets:
+        try:
+            subscriber.loop.call_soon_threadsafe(subscriber._offer, event)
+        except RuntimeError:
+            unsubscribe(subscriber)  # loop already closed
+
+    return event
+
+
+def format_sse(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def hub_stats():
+    with _lock:
+        return {
+            **_stats,
+            "subscribers": len(_subscribers),
+            "max_subscribers": EVENTS_MAX_SUBSCRIBERS,
+            "queue_size": EVENTS_QUEUE_SIZE,
+            "relay": _relay is not None,
+        }
@@ -0,0 +1,119 @@
+import csv
+from functools import lru_cache
+from pathlib import Path
+
+from app.config import GEOCODE_CACHE_SIZE
+from app.database import db_connection
+
+GAZETTEER_SEED_PATH = Path(__file__).resolve().parent.parent / "models" / "gazetteer.csv"
+
+# -----------------------------
+# Offline gazetteer
+# -----------------------------
+# City / pincode -> coordinates from the local `gazetteer` table; no network
+# calls. The bundled seed covers major Indian cities at their head post
+# office; load a full pincode directory with
+#   python -m app.services.donor_import gazetteer <file.csv>
+
+
+def _gazetteer_rows(lines):
+    # CSV with city,state,pincode,latitude,longitude
+    for row in csv.DictReader(lines):
+        try:
+            latitude = float(row["latitude"])
+            longitude = float(row["longitude"])
+        except (KeyError, TypeError, ValueError):
+            continue
+
+        yield (
+            (row.get("city") or "").strip(),
+            (row.get("state") or "").strip() or None,
+            (row.get("pincode") or "").strip() or None,
+            latitude,
+            longitude
+        )
+
+
+def load_gazetteer(cursor, lines):
+    # Does not commit; returns rows loaded
+    cursor.executemany("""
+        INSERT INTO gazetteer (city, state, pincode, latitude, longitude)
+        VALUES (?, ?, ?, ?, ?)
+    """, _gazetteer_rows(lines))
+    loaded = cursor.rowcount
+
+    _lookup.cache_clear()
+    return loaded
+
+
+def ensure_gazetteer(cursor):
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM gazetteer)")
+    if cursor.fetchone()[0]:
+        return
+
+    with open(GAZETTEER_SEED_PATH, newline="") as f:
+        load_gazetteer(cursor, f)
+
+
+# -----------------------------
+# Lookup (memoized)
+# -----------------------------
+@lru_cache(maxsize=GEOCODE_CACHE_SIZE)
+def _lookup(city_key, pincode_key):
+    with db_connection() as conn:
+        cursor = conn.cursor()
+
+        if pincode_key:
+            cursor.execute("""
+                SELECT latitude, longitude FROM gazetteer
+                WHERE pincode = ?
+                LIMIT 1
+            """, (pincode_key,))
+            row = cursor.fetchone()
+            if row:
+                return row[0], row[1]
+
+        if city_key:
+            cursor.execute("""
+                SELECT latitude, longitude FROM gazetteer
+                WHERE city = ? COLLATE NOCASE
+                LIMIT 1
+            """, (city_key,))
+            row = cursor.fetchone()
+            if row:
+                return row[0], row[1]
+
+        # First three pincode digits are the sorting district
+        if pincode_key and len(pincode_key) == 6:
+            cursor.execute("""
+                SELECT AVG(latitude), AVG(longitude) FROM gazetteer
+                WHERE pincode >= ? AND pincode < ?
+            """, (pincode_key[:3], pincode_key[:3] + "~"))
+            row = cursor.fetchone()
+            if row and row[0] is not None:
+                return row[0], row[1]
+
+    return None
+
+
+def geocode(city=None, pincode=None):
+    # (latitude, longitude) or None. Misses are cached too.
+    city_key = (city or "").strip().lower() or None
+    pincode_key = "".join((pincode or "").split()) or None
+
+    if not city_key and not pincode_key:
+        return None
+
+    return _lookup(city_key, pincode_key)
+
+
+def geocode_stats():
+    info = _lookup.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+        "hit_rate": round(info.hits / lookups, 4) if lookups else 0.0,
+    }
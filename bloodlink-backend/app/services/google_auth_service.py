@@ -0,0 +1,148 @@
+import re
+import threading
+import time
+
+import requests
+from google.auth import crypt as google_crypt
+from google.auth import jwt as google_jwt
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+DEFAULT_MAX_AGE_SECONDS = 3600
+REFRESH_AHEAD_FRACTION = 0.8  # refresh in the background at 80% of max-age
+FETCH_TIMEOUT_SECONDS = 5
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class GoogleCertsUnavailable(Exception):
+    pass
+
+
+# -----------------------------
+# Signing key sources
+# -----------------------------
+# A key source is anything with get_certs() -> {kid: PEM certificate}.
+
+class GoogleCertsSource:
+    # Google's certs, cached for Cache-Control max-age over one HTTP session
+    def __init__(self, url=GOOGLE_CERTS_URL, session=None):
+        self.url = url
+        self.session = session or requests.Session()
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()  # one fetch at a time on a cold cache
+        self._certs = None
+        self._expires_at = 0.0
+        self._refresh_at = 0.0
+        self._refreshing = False
+        self.fetches = 0
+
+    def _fetch(self):
+        try:
+            response = self.session.get(self.url, timeout=FETCH_TIMEOUT_SECONDS)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise GoogleCertsUnavailable(str(e))
+        certs = _parse_certs(response)
+
+        match = _MAX_AGE.search(response.headers.get("Cache-Control", ""))
+        max_age = int(match.group(1)) if match else DEFAULT_MAX_AGE_SECONDS
+
+        now = time.time()
+        with self._lock:
+            self._certs = certs
+            self._expires_at = now + max_age
+            self._refresh_at = now + max_age * REFRESH_AHEAD_FRACTION
+            self.fetches += 1
+        return self._certs
+
+    def _background_refresh(self):
+        try:
+            self._fetch()
+        except Exception as e:
+            print("Google certs refresh failed:", e)  # keep serving cached certs
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def get_certs(self):
+        now = time.time()
+
+        with self._lock:
+            certs = self._certs
+            expired = certs is None or now >= self._expires_at
+            refresh = not expired and now >= self._refresh_at and not self._refreshing
+            if refresh:
+                self._refreshing = True
+
+        if expired:
+            with self._fetch_lock:
+                with self._lock:
+                    if self._certs is not None and time.time() < self._expires_at:
+                        return self._certs
+                return self._fetch()
+
+        if refresh:
+            threading.Thread(target=self._background_refresh, daemon=True).start()
+
+        return certs
+
+
+def _parse_certs(response):
+    # A body that is not {kid: PEM} is an outage on Google's side, not a bad
+    # client token: raise GoogleCertsUnavailable, never ValueError (a 400)
+    try:
+        certs = response.json()
+        if not isinstance(certs, dict) or not certs:
+            raise ValueError("expected a non-empty {kid: certificate} object")
+        for cert in certs.values():
+            google_crypt.RSAVerifier.from_string(cert)
+    except Exception as e:
+        raise GoogleCertsUnavailable(f"Unusable certs response: {e}")
+    return certs
+
+
+class StaticKeySource:
+    # Local stand-in key set for tests
+    def __init__(self, certs):
+        self.certs = certs
+
+    def get_certs(self):
+        return self.certs
+
+
+_key_source = None
+_key_source_lock = threading.Lock()
+
+
+def get_key_source():
+    global _key_source
+    with _key_source_lock:
+        if _key_source is None:
+            _key_source = GoogleCertsSource()
+        return _key_source
+
+
+def set_key_source(source):
+    global _key_source
+    with _key_source_lock:
+        _key_source = source
+
+
+# -----------------------------
+# Verification
+# -----------------------------
+def verify_google_token(token, client_id):
+    # Local RSA verification against cached certs; raises ValueError like
+    # google.oauth2.id_token.verify_oauth2_token
+    idinfo = google_jwt.decode(
+        token,
+        certs=get_key_source().get_certs(),
+        audience=client_id
+    )
+
+    if idinfo.get("iss") not in GOOGLE_ISSUERS:
+        raise ValueError(f"Wrong issuer: {idinfo.get('iss')}")
+
+    return idinfo
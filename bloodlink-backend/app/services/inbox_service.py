@@ -0,0 +1,106 @@
+import threading
+
+from app.config import (
+    NOTIFICATION_RETENTION_ARCHIVE,
+    NOTIFICATION_RETENTION_BATCH_SIZE,
+    NOTIFICATION_RETENTION_DAYS,
+    NOTIFICATION_RETENTION_SECONDS,
+)
+from app.database import db_connection, write_lock
+
+
+# notification_unread holds the unread count per user; triggers in
+# schema.sql keep it current, this only seeds or repairs it.
+def rebuild_unread_counts(cursor):
+    cursor.execute("DELETE FROM notification_unread")
+    cursor.execute("""
+        INSERT INTO notification_unread (user_id, unread)
+        SELECT user_id, COUNT(*)
+        FROM notifications
+        WHERE is_read = 0
+        GROUP BY user_id
+    """)
+
+
+def ensure_unread_counts(cursor):
+    # Seed once for databases that had notifications before the counters
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM notification_unread)")
+    if not cursor.fetchone()[0]:
+        rebuild_unread_counts(cursor)
+
+
+def unread_count(cursor, user_id):
+    cursor.execute("SELECT unread FROM notification_unread WHERE user_id = ?", (user_id,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+# -----------------------------
+# Retention
+# -----------------------------
+# Read notifications older than NOTIFICATION_RETENTION_DAYS move to
+# notifications_archive (or are deleted), a batch per transaction so inbox
+# writes are never blocked for long. Unread rows are never touched.
+_stop = threading.Event()
+_purger = None
+
+
+def purge_read(days=NOTIFICATION_RETENTION_DAYS, batch_size=NOTIFICATION_RETENTION_BATCH_SIZE,
+               archive=NOTIFICATION_RETENTION_ARCHIVE):
+    purged = 0
+
+    with db_connection() as conn:
+        cursor = conn.cursor()
+
+        while True:
+            with write_lock():
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("""
+                    SELECT id FROM notifications
+                    WHERE is_read = 1
+                    AND created_at < DATETIME('now', ?)
+                    LIMIT ?
+                """, (f"-{days} days", batch_size))
+                ids = [(row[0],) for row in cursor.fetchall()]
+
+                if archive:
+                    cursor.executemany("""
+                        INSERT OR REPLACE INTO notifications_archive
+                        (id, user_id, message, type, is_read, created_at)
+                        SELECT id, user_id, message, type, is_read, created_at
+                        FROM notifications WHERE id = ?
+                    """, ids)
+                cursor.executemany("DELETE FROM notifications WHERE id = ?", ids)
+                conn.commit()
+
+            purged += len(ids)
+            if len(ids) < batch_size:
+                return purged
+
+
+def _run():
+    while not _stop.is_set():
+        try:
+            purge_read()
+        except Exception as e:
+            print("Notification Retention Error:", e)
+
+        _stop.wait(NOTIFICATION_RETENTION_SECONDS)
+
+
+def start_retention():
+    global _purger
+    if _purger is not None and _purger.is_alive():
+        return
+
+    _stop.clear()
+    _purger = threading.Thread(target=_run, name="notification-retention", daemon=True)
+    _purger.start()
+
+
+def stop_retention(timeout=10):
+    global _purger
+    _stop.set()
+    if _purger is not None:
+        _purger.join(timeout)
+        _purger = None
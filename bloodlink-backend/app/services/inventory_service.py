@@ -0,0 +1,362 @@
+import threading
+from datetime import date
+
+from fastapi import HTTPException
+
+from app.config import INVENTORY_SWEEP_BATCH_SIZE, INVENTORY_SWEEP_SECONDS
+from app.database import db_connection, write_lock
+from app.services import response_cache
+
+BLOOD_GROUPS = ("A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-")
+
+RELEASE_STATUSES = ("pending", "rejected", "cancelled")
+
+# Legal moves per current status. Only an approved request holds a
+# reservation, so "fulfilled" is reachable from "approved" alone; fulfilled
+# and cancelled requests are final.
+REQUEST_TRANSITIONS = {
+    "pending": ("approved", "rejected", "cancelled"),
+    "approved": ("fulfilled", "pending", "rejected", "cancelled"),
+    "rejected": ("pending", "approved", "cancelled"),
+    "fulfilled": (),
+    "cancelled": (),
+}
+
+
+def normalize_blood_group(value):
+    # Canonical key ("o+ " -> "O+") so lookups can use the blood_group indexes
+    return value.strip().upper() if value else value
+
+
+# -----------------------------
+# Lot upserts (single and bulk)
+# -----------------------------
+# A lot is (blood_bank_id, blood_group, expiry_date), unique through
+# idx_inventory_lot; writes set units_available to the bank's figure.
+UPSERT_LOT_SQL = """
+    INSERT INTO blood_inventory (blood_bank_id, blood_group, units_available, expiry_date)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(blood_bank_id, blood_group, IFNULL(expiry_date, ''))
+    DO UPDATE SET units_available = excluded.units_available
+    RETURNING id
+"""
+
+
+def validate_lot(raw):
+    # Returns (blood_group, units_available, expiry_date) or raises ValueError
+    if not isinstance(raw, dict):
+        raise ValueError("row must be an object")
+
+    blood_group = normalize_blood_group(str(raw.get("blood_group") or ""))
+    if blood_group not in BLOOD_GROUPS:
+        raise ValueError(f"invalid blood_group {raw.get('blood_group')!r}")
+
+    try:
+        units = int(raw.get("units_available"))
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid units_available {raw.get('units_available')!r}")
+    if units < 0:
+        raise ValueError("units_available must be >= 0")
+
+    expiry_date = raw.get("expiry_date") or None
+    if expiry_date is not None:
+        try:
+            expiry_date = date.fromisoformat(str(expiry_date)).isoformat()
+        except ValueError:
+            raise ValueError(f"invalid expiry_date {raw.get('expiry_date')!r}")
+
+    return blood_group, units, expiry_date
+
+
+def upsert_lots(conn, blood_bank_id, rows, first_row=0):
+    # rows: raw dicts. Valid rows are written in one transaction; invalid
+    # ones are reported and skipped. Returns one result per input row,
+    # numbered from first_row.
+    cursor = conn.cursor()
+    results = []
+
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        # AUTOINCREMENT ids only grow, so anything above this was inserted
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM blood_inventory")
+        max_id = cursor.fetchone()[0]
+        seen = set()
+
+        for index, raw in enumerate(rows, first_row):
+            try:
+                blood_group, units, expiry_date = validate_lot(raw)
+            except ValueError as e:
+                results.append({"row": index, "status": "error", "error": str(e)})
+                continue
+
+            cursor.execute(UPSERT_LOT_SQL, (blood_bank_id, blood_group, units, expiry_date))
+            lot_id = cursor.fetchone()[0]
+
+            results.append({
+                "row": index,
+                "status": "inserted" if lot_id > max_id and lot_id not in seen else "updated",
+                "id": lot_id
+            })
+            seen.add(lot_id)
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    response_cache.bump("blood_inventory")
+
+    return results
+
+
+# -----------------------------
+# Bank stock summary
+# -----------------------------
+# bank_stock holds SUM(units_available) per bank and blood group, located at
+# the bloodbank user the inventory belongs to; triggers in schema.sql keep it
+# current, this only seeds or repairs it.
+def rebuild_bank_stock(cursor):
+    cursor.execute("DELETE FROM bank_stock")
+    cursor.execute("""
+        INSERT INTO bank_stock (blood_bank_id, blood_group, units_available, geo_cell)
+        SELECT i.blood_bank_id,
+               i.blood_group,
+               SUM(COALESCE(i.units_available, 0)),
+               b.geo_cell
+        FROM blood_inventory i
+        LEFT JOIN users b ON b.id = i.blood_bank_id
+        GROUP BY i.blood_bank_id, i.blood_group
+    """)
+
+
+def ensure_bank_stock(cursor):
+    # Seed once for databases that had inventory before bank_stock existed
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM bank_stock)")
+    if not cursor.fetchone()[0]:
+        rebuild_bank_stock(cursor)
+
+
+# -----------------------------
+# Allocation (first-expired-first-out)
+# -----------------------------
+# Lots are taken in expiry order (undated lots last) so short-dated units are
+# used before they expire. Expired lots are skipped even before the sweep
+# has moved them out; idx_inventory_group_expiry serves the ordered scan.
+DATED_LOTS_SQL = """
+    SELECT id, blood_bank_id, units_available
+    FROM blood_inventory
+    WHERE blood_group = ?
+    AND expiry_date >= DATE('now')
+    AND units_available > 0
+    ORDER BY expiry_date, id
+"""
+
+UNDATED_LOTS_SQL = """
+    SELECT id, blood_bank_id, units_available
+    FROM blood_inventory
+    WHERE blood_group = ?
+    AND expiry_date IS NULL
+    AND units_available > 0
+    ORDER BY id
+"""
+
+
+def _allocate(cursor, blood_group, units_required):
+    # Returns [(inventory_id, blood_bank_id, units)]
+    allocations = []
+    remaining = units_required
+
+    for sql in (DATED_LOTS_SQL, UNDATED_LOTS_SQL):
+        for lot in cursor.execute(sql, (blood_group,)):
+            take = min(lot["units_available"], remaining)
+            allocations.append((lot["id"], lot["blood_bank_id"], take))
+            remaining -= take
+            if remaining == 0:
+                return allocations
+
+    if not allocations:
+        raise HTTPException(status_code=400, detail="No blood stock available")
+    raise HTTPException(status_code=400, detail="Insufficient stock")
+
+
+def _reserve(cursor, request_id, blood_group, allocations, approved_by):
+    for inventory_id, blood_bank_id, units in allocations:
+        # Conditional decrement: stock can never go below zero
+        cursor.execute("""
+            UPDATE blood_inventory
+            SET units_available = units_available - ?
+            WHERE id = ? AND units_available >= ?
+        """, (units, inventory_id, units))
+
+        if cursor.rowcount != 1:
+            raise HTTPException(status_code=409, detail="Stock changed, please retry")
+
+        cursor.execute("""
+            INSERT INTO inventory_reservations
+            (request_id, inventory_id, blood_bank_id, blood_group, units, approved_by)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (request_id, inventory_id, blood_bank_id, blood_group, units, approved_by))
+
+
+def _release(cursor, request_id):
+    # Put reserved units back into their lots (if the lot still exists)
+    cursor.execute("""
+        UPDATE blood_inventory
+        SET units_available = units_available + (
+            SELECT SUM(r.units)
+            FROM inventory_reservations r
+            WHERE r.inventory_id = blood_inventory.id
+            AND r.request_id = ?
+            AND r.status = 'reserved'
+        )
+        WHERE id IN (
+            SELECT inventory_id
+            FROM inventory_reservations
+            WHERE request_id = ? AND status = 'reserved'
+        )
+    """, (request_id, request_id))
+
+    cursor.execute("""
+        UPDATE inventory_reservations
+        SET status = 'released'
+        WHERE request_id = ? AND status = 'reserved'
+    """, (request_id,))
+
+
+# -----------------------------
+# Request status transitions
+# -----------------------------
+def update_request_status(conn, request_id, status, approved_by=None):
+    if status not in REQUEST_TRANSITIONS:
+        raise HTTPException(status_code=400, detail=f"Invalid status {status!r}")
+
+    cursor = conn.cursor()
+
+    # Take the write lock up front so concurrent approvals queue on SQLite's
+    # busy timeout instead of reading the same stock
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute("""
+            SELECT patient_id, blood_group, units_required, status
+            FROM patient_requests
+            WHERE id = ?
+        """, (request_id,))
+        request = cursor.fetchone()
+
+        if not request:
+            raise HTTPException(status_code=404, detail="Request not found")
+
+        current = request["status"]
+        blood_group = normalize_blood_group(request["blood_group"])
+        allocations = []
+
+        if current == status:
+            raise HTTPException(status_code=409, detail=f"Request already {current}")
+        if status not in REQUEST_TRANSITIONS.get(current, ()):
+            raise HTTPException(status_code=400, detail=f"Cannot change a {current} request to {status}")
+
+        if status == "approved":
+            allocations = _allocate(cursor, blood_group, request["units_required"])
+            _reserve(cursor, request_id, blood_group, allocations, approved_by)
+
+        elif current == "approved" and status in RELEASE_STATUSES:
+            _release(cursor, request_id)
+
+        elif status == "fulfilled":
+            cursor.execute("""
+                UPDATE inventory_reservations
+                SET status = 'consumed'
+                WHERE request_id = ? AND status = 'reserved'
+            """, (request_id,))
+
+        cursor.execute("""
+            UPDATE patient_requests
+            SET status = ?
+            WHERE id = ?
+        """, (status, request_id))
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    response_cache.bump("patient_requests", "blood_inventory")
+
+    return {
+        "request_id": request_id,
+        "patient_id": request["patient_id"],
+        "blood_group": blood_group,
+        "previous_status": current,
+        "status": status,
+        "allocations": [
+            {"inventory_id": inventory_id, "blood_bank_id": blood_bank_id, "units": units}
+            for inventory_id, blood_bank_id, units in allocations
+        ]
+    }
+
+
+# -----------------------------
+# Expired-stock sweep
+# -----------------------------
+# Moves units_available of lots past expiry_date into units_expired, a batch
+# per transaction so approvals are never blocked for long.
+_stop = threading.Event()
+_sweeper = None
+
+
+def sweep_expired(batch_size=INVENTORY_SWEEP_BATCH_SIZE):
+    swept = 0
+
+    with db_connection() as conn:
+        cursor = conn.cursor()
+
+        while True:
+            with write_lock():
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("""
+                    UPDATE blood_inventory
+                    SET units_expired = COALESCE(units_expired, 0) + units_available,
+                        units_available = 0
+                    WHERE id IN (
+                        SELECT id FROM blood_inventory
+                        WHERE expiry_date < DATE('now')
+                        AND units_available > 0
+                        LIMIT ?
+                    )
+                """, (batch_size,))
+                batch = cursor.rowcount
+                conn.commit()
+
+            if batch:
+                response_cache.bump("blood_inventory")
+            swept += batch
+            if batch < batch_size:
+                return swept
+
+
+def _run():
+    while not _stop.is_set():
+        try:
+            sweep_expired()
+        except Exception as e:
+            print("Inventory Sweep Error:", e)
+
+        _stop.wait(INVENTORY_SWEEP_SECONDS)
+
+
+def start_sweeper():
+    global _sweeper
+    if _sweeper is not None and _sweeper.is_alive():
+        return
+
+    _stop.clear()
+    _sweeper = threading.Thread(target=_run, name="inventory-sweeper", daemon=True)
+    _sweeper.start()
+
+
+def stop_sweeper(timeout=10):
+    global _sweeper
+    _stop.set()
+    if _sweeper is not None:
+        _sweeper.join(timeout)
+        _sweeper = None
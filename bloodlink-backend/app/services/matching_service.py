@@ -1,11 +1,59 @@
+import heapq
+import json
 import math
-from app.database import get_connection
+from app.config import DONOR_ROSTER_ENABLED
+from app.database import get_connection, geo_cell_coords, GEO_CELL_ROW_WIDTH
+from app.services import donor_roster, metrics
+
+try:
+    import numpy as np
+except ImportError:  # batch matching falls back to pure Python
+    np = None
+
+EARTH_RADIUS_KM = 6371
+MAX_DISTANCE_KM = 150
+MAX_MATCHES = 10
+
+# Upper bound on request x donor matrix cells computed at once (~16 MB)
+BATCH_MATRIX_CELLS = 2_000_000
+
+# Search rings for the k-nearest lookup, widened only until enough donors
+SEARCH_RADII_KM = (5, 10, 20, 40, 80, 150)
+
+# Whole-blood donation interval; keep in sync with the eligible_from
+# triggers in schema.sql
+DONATION_INTERVAL_DAYS = 90
+
+# Red cell compatibility: recipient group -> donor groups it can receive,
+# identical group first. Seeded into the blood_compatibility table.
+COMPATIBLE_DONORS = {
+    "O-": ("O-",),
+    "O+": ("O+", "O-"),
+    "A-": ("A-", "O-"),
+    "A+": ("A+", "A-", "O+", "O-"),
+    "B-": ("B-", "O-"),
+    "B+": ("B+", "B-", "O+", "O-"),
+    "AB-": ("AB-", "A-", "B-", "O-"),
+    "AB+": ("AB+", "AB-", "A+", "A-", "B+", "B-", "O+", "O-"),
+}
+
+
+def seed_compatibility(cursor):
+    cursor.executemany(
+        "INSERT OR IGNORE INTO blood_compatibility (recipient_group, donor_group) VALUES (?, ?)",
+        [
+            (recipient, donor)
+            for recipient, donors in COMPATIBLE_DONORS.items()
+            for donor in donors
+        ]
+    )
+
 
 # -----------------------------
 # Haversine Formula
 # -----------------------------
 def calculate_distance(lat1, lon1, lat2, lon2):
-    R = 6371  # Earth radius in KM
+    R = EARTH_RADIUS_KM  # Earth radius in KM
 
     d_lat = math.radians(lat2 - lat1)
     d_lon = math.radians(lon2 - lon1)
@@ -22,27 +70,125 @@ def calculate_distance(lat1, lon1, lat2, lon2):
 
 
 # -----------------------------
-# Smart Matching Logic
+# Bounding Box
 # -----------------------------
-def find_matching_donors(blood_group, patient_lat, patient_lon):
+def bounding_box(lat, lon, radius_km):
+    # Returns (min_lat, max_lat, lon_ranges) covering every point within
+    # radius_km. lon_ranges has two entries when the box crosses 180°.
+    angular = radius_km / EARTH_RADIUS_KM
+    d_lat = math.degrees(angular)
+
+    min_lat = lat - d_lat
+    max_lat = lat + d_lat
+
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90), min(max_lat, 90), [(-180, 180)]
+
+    ratio = math.sin(angular) / math.cos(math.radians(lat))
+    if ratio >= 1:
+        return min_lat, max_lat, [(-180, 180)]
+
+    d_lon = math.degrees(math.asin(ratio))
+    min_lon = lon - d_lon
+    max_lon = lon + d_lon
+
+    if min_lon < -180:
+        return min_lat, max_lat, [(min_lon + 360, 180), (-180, max_lon)]
+    if max_lon > 180:
+        return min_lat, max_lat, [(min_lon, 180), (-180, max_lon - 360)]
+
+    return min_lat, max_lat, [(min_lon, max_lon)]
+
+
+def _cell_ranges(min_lat, max_lat, lon_ranges):
+    ranges = []
+    first_row, _ = geo_cell_coords(min_lat, 0)
+    last_row, _ = geo_cell_coords(max_lat, 0)
+
+    for min_lon, max_lon in lon_ranges:
+        _, first_col = geo_cell_coords(0, min_lon)
+        _, last_col = geo_cell_coords(0, max_lon)
+
+        for row in range(first_row, last_row + 1):
+            base = row * GEO_CELL_ROW_WIDTH
+            ranges.append((base + first_col, base + last_col))
+
+    return ranges
+
+
+def _merge_ranges(ranges):
+    merged = []
+    for low, high in sorted(ranges):
+        if merged and low <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], high))
+        else:
+            merged.append((low, high))
+    return merged
+
+
+def _query_cells(blood_group, min_lat, max_lat, cell_ranges):
+    # Eligible donors of every group compatible with the recipient's
+    if DONOR_ROSTER_ENABLED:
+        return donor_roster.candidates(COMPATIBLE_DONORS.get(blood_group, ()), min_lat, max_lat, cell_ranges)
+
     conn = get_connection()
     cursor = conn.cursor()
 
+    # One query: compatible groups from blood_compatibility, then a seek per
+    # (group, cell range) on the partial covering index
+    # idx_users_eligible_donors (role/is_available match its WHERE). Ranges
+    # go in as one JSON parameter so the statement text never changes.
     cursor.execute("""
-        SELECT id, name, phone, blood_group, latitude, longitude
-        FROM users
-        WHERE role = 'donor'
-        AND blood_group = ?
-        AND is_available = 1
-    """, (blood_group,))
+        SELECT u.id, u.name, u.phone, u.blood_group, u.latitude, u.longitude
+        FROM blood_compatibility c
+        CROSS JOIN json_each(?) r
+        CROSS JOIN users u
+        WHERE c.recipient_group = ?
+        AND u.blood_group = c.donor_group
+        AND u.role = 'donor'
+        AND u.is_available = 1
+        AND u.geo_cell BETWEEN json_extract(r.value, '$[0]') AND json_extract(r.value, '$[1]')
+        AND u.latitude BETWEEN ? AND ?
+        AND (u.eligible_from IS NULL OR u.eligible_from <= DATE('now'))
+    """, (json.dumps(cell_ranges), blood_group, min_lat, max_lat))
 
     donors = cursor.fetchall()
     conn.close()
 
+    return donors
+
+
+def _fetch_candidates(blood_group, lat, lon, radius_km):
+    min_lat, max_lat, lon_ranges = bounding_box(lat, lon, radius_km)
+    cell_ranges = _cell_ranges(min_lat, max_lat, lon_ranges)
+    return _query_cells(blood_group, min_lat, max_lat, cell_ranges)
+
+
+def _donor_match(donor, distance):
+    return {
+        "id": donor["id"],
+        "name": donor["name"],
+        "phone": donor["phone"],
+        "blood_group": donor["blood_group"],
+        "distance_km": round(float(distance), 2)
+    }
+
+
+# -----------------------------
+# Smart Matching Logic
+# -----------------------------
+@metrics.timed("find_matching_donors")
+def find_matching_donors(blood_group, patient_lat, patient_lon, limit=MAX_MATCHES):
     matched = []
 
-    for donor in donors:
-        if donor["latitude"] and donor["longitude"]:
+    # k-nearest: widen the ring only until it holds `limit` donors.
+    # Everything inside `radius` is guaranteed fetched, so once there are
+    # enough matches within it no farther donor can be closer.
+    for radius in SEARCH_RADII_KM:
+        donors = _fetch_candidates(blood_group, patient_lat, patient_lon, radius)
+
+        matched = []
+        for donor in donors:
             distance = calculate_distance(
                 patient_lat,
                 patient_lon,
@@ -50,15 +196,178 @@ def find_matching_donors(blood_group, patient_lat, patient_lon):
                 donor["longitude"]
             )
 
-            if distance <= 150:
+            if distance <= radius:
+                matched.append(_donor_match(donor, distance))
+
+        if len(matched) >= limit:
+            break
+
+    # Sort by nearest distance (id breaks ties, so roster and SQL agree)
+    matched.sort(key=lambda x: (x["distance_km"], x["id"]))
+
+    return matched[:limit]  # return top N nearest donors
+
+
+# -----------------------------
+# Nearby Blood Bank Stock
+# -----------------------------
+def _query_bank_stock(cursor, blood_group, min_units, min_lat, max_lat, cell_ranges):
+    # Banks are the bloodbank users inventory is keyed on (blood_bank_id is
+    # their users.id). bank_stock carries their geo_cell, so the spatial
+    # filter and the stock threshold are both answered from
+    # idx_bank_stock_group_cell, one seek per cell range passed as JSON like
+    # the donor query. Lots past expiry_date still count in bank_stock until
+    # the sweep moves them out; `expired` subtracts them so only units FEFO
+    # would allocate are shown.
+    cursor.execute("""
+        WITH expired AS (
+            SELECT blood_bank_id, SUM(units_available) AS units
+            FROM blood_inventory
+            WHERE blood_group = ?
+            AND expiry_date < DATE('now')
+            AND units_available > 0
+            GROUP BY blood_bank_id
+        )
+        SELECT b.id, b.name, b.phone, b.city, b.latitude, b.longitude,
+               s.units_available - COALESCE(e.units, 0) AS units_available
+        FROM json_each(?) r
+        CROSS JOIN bank_stock s
+        JOIN users b ON b.id = s.blood_bank_id AND b.role = 'bloodbank'
+        LEFT JOIN expired e ON e.blood_bank_id = s.blood_bank_id
+        WHERE s.blood_group = ?
+        AND s.geo_cell BETWEEN json_extract(r.value, '$[0]') AND json_extract(r.value, '$[1]')
+        AND s.units_available >= ?
+        AND s.units_available - COALESCE(e.units, 0) >= ?
+        AND b.latitude BETWEEN ? AND ?
+    """, (blood_group, json.dumps(cell_ranges), blood_group, min_units, min_units, min_lat, max_lat))
+
+    return cursor.fetchall()
+
+
+@metrics.timed("find_nearby_blood_banks")
+def find_nearby_blood_banks(cursor, blood_group, lat, lon, min_units=1, radius_km=MAX_DISTANCE_KM, limit=MAX_MATCHES):
+    # Same widening rings as find_matching_donors, capped at radius_km
+    radii = [r for r in SEARCH_RADII_KM if r < radius_km] + [radius_km]
+    matched = []
+
+    for radius in radii:
+        min_lat, max_lat, lon_ranges = bounding_box(lat, lon, radius)
+        cell_ranges = _merge_ranges(_cell_ranges(min_lat, max_lat, lon_ranges))
+        banks = _query_bank_stock(cursor, blood_group, min_units, min_lat, max_lat, cell_ranges)
+
+        matched = []
+        for bank in banks:
+            distance = calculate_distance(lat, lon, bank["latitude"], bank["longitude"])
+            if distance <= radius:
                 matched.append({
-                    "id": donor["id"],
-                    "name": donor["name"],
-                    "phone": donor["phone"],
+                    "id": bank["id"],
+                    "name": bank["name"],
+                    "phone": bank["phone"],
+                    "city": bank["city"],
+                    "blood_group": blood_group,
+                    "units_available": bank["units_available"],
                     "distance_km": round(distance, 2)
                 })
 
-    # Sort by nearest distance
+        if len(matched) >= limit:
+            break
+
     matched.sort(key=lambda x: x["distance_km"])
 
-    return matched[:10]  # return top 10 nearest donors
\ No newline at end of file
+    return matched[:limit]
+
+
+# -----------------------------
+# Batch Matching
+# -----------------------------
+def _nearest_numpy(points, donors, limit, max_distance_km):
+    donor_lat = np.radians(np.array([d["latitude"] for d in donors], dtype=np.float64))
+    donor_lon = np.radians(np.array([d["longitude"] for d in donors], dtype=np.float64))
+    cos_donor_lat = np.cos(donor_lat)
+
+    results = []
+    rows_per_chunk = max(1, BATCH_MATRIX_CELLS // len(donors))
+
+    for start in range(0, len(points), rows_per_chunk):
+        chunk = points[start:start + rows_per_chunk]
+        req_lat = np.radians(np.array([p[0] for p in chunk], dtype=np.float64))[:, None]
+        req_lon = np.radians(np.array([p[1] for p in chunk], dtype=np.float64))[:, None]
+
+        # Same Haversine as calculate_distance, over the full matrix
+        a = (
+            np.sin((donor_lat - req_lat) / 2) ** 2
+            + np.cos(req_lat) * cos_donor_lat * np.sin((donor_lon - req_lon) / 2) ** 2
+        )
+        distances = EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        distances[distances > max_distance_km] = np.inf
+
+        k = min(limit, len(donors))
+        if k < len(donors):
+            nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        else:
+            nearest = np.broadcast_to(np.arange(len(donors)), (len(chunk), len(donors)))
+
+        for row, columns in enumerate(nearest):
+            row_distances = distances[row, columns]
+            order = np.argsort(row_distances, kind="stable")
+            results.append([
+                _donor_match(donors[columns[i]], row_distances[i])
+                for i in order
+                if np.isfinite(row_distances[i])
+            ])
+
+    return results
+
+
+def _nearest_python(points, donors, limit, max_distance_km):
+    results = []
+
+    for lat, lon in points:
+        in_range = []
+        for donor in donors:
+            distance = calculate_distance(lat, lon, donor["latitude"], donor["longitude"])
+            if distance <= max_distance_km:
+                in_range.append((distance, donor["id"], donor))
+
+        nearest = heapq.nsmallest(limit, in_range, key=lambda x: (x[0], x[1]))
+        results.append([_donor_match(donor, distance) for distance, _, donor in nearest])
+
+    return results
+
+
+@metrics.timed("find_matching_donors_batch")
+def find_matching_donors_batch(requests, limit=MAX_MATCHES, max_distance_km=MAX_DISTANCE_KM):
+    # requests: iterable of (blood_group, lat, lon).
+    # Returns one list of matches per request, in input order.
+    requests = list(requests)
+    results = [[] for _ in requests]
+
+    by_group = {}
+    for index, (blood_group, lat, lon) in enumerate(requests):
+        by_group.setdefault(blood_group, []).append(index)
+
+    for blood_group, indexes in by_group.items():
+        # One candidate query per blood group covering every request's box
+        boxes = [bounding_box(requests[i][1], requests[i][2], max_distance_km) for i in indexes]
+        min_lat = min(box[0] for box in boxes)
+        max_lat = max(box[1] for box in boxes)
+        cell_ranges = _merge_ranges(
+            cell_range
+            for box in boxes
+            for cell_range in _cell_ranges(*box)
+        )
+
+        donors = _query_cells(blood_group, min_lat, max_lat, cell_ranges)
+        if not donors:
+            continue
+
+        points = [(requests[i][1], requests[i][2]) for i in indexes]
+        if np is not None:
+            matches = _nearest_numpy(points, donors, limit, max_distance_km)
+        else:
+            matches = _nearest_python(points, donors, limit, max_distance_km)
+
+        for i, donor_matches in zip(indexes, matches):
+            results[i] = donor_matches
+
+    return results
@@ -0,0 +1,262 @@
+import hashlib
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+from app.config import METRICS_ENABLED
+
+# -----------------------------
+# In-process metrics registry
+# -----------------------------
+# Counters, fixed-bucket histograms and count/sum summaries, rendered in the
+# Prometheus text format on GET /metrics. Everything is per worker process.
+# Kept free of app imports so app.database can time its own queries.
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_SQL_STATEMENTS = 500  # distinct statements tracked; the rest share one series
+
+HELP = {
+    "bloodlink_http_request_duration_seconds": ("histogram", "HTTP request latency by route template"),
+    "bloodlink_http_requests_total": ("counter", "HTTP responses by route template and status"),
+    "bloodlink_sql_query_duration_seconds": ("histogram", "SQLite execute() time by operation and table"),
+    "bloodlink_sql_statement_seconds": ("summary", "SQLite execute() time by statement"),
+    "bloodlink_sql_fetch_seconds_total": ("counter", "SQLite fetch*() time by statement"),
+    "bloodlink_db_connections_opened_total": ("counter", "SQLite connections opened"),
+    "bloodlink_db_connections_reused_total": ("counter", "Connections served from the pool"),
+    "bloodlink_operation_duration_seconds": ("histogram", "Hot-path operation latency"),
+    "bloodlink_profiles_written_total": ("counter", "Slow-request profiles written"),
+}
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> float
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+_summaries = {}   # (name, labels) -> [count, sum]
+_collectors = []  # callables returning {(name, labels): value} gauges
+
+_statements = {}  # sql -> (digest, op, table)
+_statement_text = {}  # digest -> normalized sql
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    if not METRICS_ENABLED:
+        return
+
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, seconds, **labels):
+    if not METRICS_ENABLED:
+        return
+
+    key = (name, _labels(labels))
+    slot = bisect_left(LATENCY_BUCKETS, seconds)
+    with _lock:
+        series = _histograms.get(key)
+        if series is None:
+            series = _histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+        series[slot] += 1
+        series[-1] += seconds
+
+
+def observe_summary(name, seconds, **labels):
+    # Count and sum only: for high-cardinality series where buckets per
+    # label set would swamp the scrape
+    if not METRICS_ENABLED:
+        return
+
+    key = (name, _labels(labels))
+    with _lock:
+        series = _summaries.get(key)
+        if series is None:
+            series = _summaries[key] = [0, 0.0]
+        series[0] += 1
+        series[1] += seconds
+
+
+@contextmanager
+def timer(op):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe("bloodlink_operation_duration_seconds", time.perf_counter() - start, op=op)
+
+
+def timed(op):
+    # Decorator form of timer()
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timer(op):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def register_collector(fn):
+    _collectors.append(fn)
+    return fn
+
+
+# -----------------------------
+# SQL statements
+# -----------------------------
+# Statements are labelled by a short digest of their normalized text, plus
+# the operation and main table so dashboards stay readable. Spatial OR
+# chains and IN lists vary in length per call; collapse them so one query
+# in the code is one series. Latency buckets are kept per operation and
+# table only; per statement /metrics carries count and sum, and the text
+# behind a digest is served by statement_stats() (GET /admin/sql-statements).
+
+_WHITESPACE = re.compile(r"\s+")
+_BETWEEN_CHAIN = re.compile(r"\(\s*([\w.]+) BETWEEN \? AND \?(?:\s+OR\s+\1 BETWEEN \? AND \?)*\s*\)", re.I)
+_IN_LIST = re.compile(r"IN \(\?(?:,\s*\?)+\)", re.I)
+_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|JOIN)\s+([A-Za-z_][\w]*)", re.I)
+
+
+def _describe(sql):
+    text = _WHITESPACE.sub(" ", sql).strip()
+    text = _BETWEEN_CHAIN.sub(r"(\1 BETWEEN ? AND ? OR ...)", text)
+    text = _IN_LIST.sub("IN (?, ...)", text)
+
+    op = text.split(" ", 1)[0].upper() if text else ""
+    match = _TABLE.search(text)
+    table = match.group(1) if match else ""
+    digest = hashlib.sha1(text.encode()).hexdigest()[:10]
+    return digest, op, table, text
+
+
+def statement_labels(sql):
+    described = _statements.get(sql)
+    if described is not None:
+        return described
+
+    digest, op, table, text = _describe(sql)
+    with _lock:
+        if digest not in _statement_text and len(_statement_text) >= MAX_SQL_STATEMENTS:
+            digest, op, table = "other", "", ""
+        else:
+            _statement_text[digest] = text
+        # Dynamic statements (different OR chain lengths) map to one digest,
+        # so this dict only grows with the statements the code contains
+        if len(_statements) < MAX_SQL_STATEMENTS * 8:
+            _statements[sql] = (digest, op, table)
+
+    return digest, op, table
+
+
+def observe_sql(sql, seconds):
+    digest, op, table = statement_labels(sql)
+    observe("bloodlink_sql_query_duration_seconds", seconds, op=op, table=table)
+    observe_summary("bloodlink_sql_statement_seconds", seconds, statement=digest, op=op, table=table)
+
+
+def observe_fetch(sql, seconds):
+    digest, op, table = statement_labels(sql)
+    inc("bloodlink_sql_fetch_seconds_total", seconds, statement=digest, op=op, table=table)
+
+
+def statement_stats(digest=None):
+    # digest -> op, table, normalized SQL and execute() totals, slowest first
+    with _lock:
+        texts = dict(_statement_text)
+        labels = {d: (op, table) for d, op, table in _statements.values()}
+        totals = {
+            dict(key)["statement"]: list(series)
+            for (name, key), series in _summaries.items()
+            if name == "bloodlink_sql_statement_seconds"
+        }
+
+    stats = {}
+    for key in texts if digest is None else [digest] if digest in texts else []:
+        op, table = labels.get(key, ("", ""))
+        calls, seconds = totals.get(key, (0, 0.0))
+        stats[key] = {"op": op, "table": table, "sql": texts[key], "calls": calls, "seconds": round(seconds, 6)}
+
+    return dict(sorted(stats.items(), key=lambda item: -item[1]["seconds"]))
+
+
+# -----------------------------
+# Prometheus text format
+# -----------------------------
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value):
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+def render():
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: list(series) for key, series in _histograms.items()}
+        summaries = {key: list(series) for key, series in _summaries.items()}
+
+    gauges = {}
+    for collector in _collectors:
+        try:
+            gauges.update(collector())
+        except Exception as e:  # a broken collector must not break scraping
+            print("Metrics collector error:", e)
+
+    by_name = {}
+    for (name, labels), value in counters.items():
+        by_name.setdefault(name, []).append(("counter", labels, value))
+    for (name, labels), series in histograms.items():
+        by_name.setdefault(name, []).append(("histogram", labels, series))
+    for (name, labels), series in summaries.items():
+        by_name.setdefault(name, []).append(("summary", labels, series))
+    for (name, labels), value in gauges.items():
+        by_name.setdefault(name, []).append(("gauge", labels, value))
+
+    lines = []
+    for name in sorted(by_name):
+        kind, help_text = HELP.get(name, (by_name[name][0][0], name.replace("_", " ")))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+        for kind, labels, value in sorted(by_name[name], key=lambda s: s[1]):
+            if kind == "summary":
+                lines.append(f"{name}_sum{_format_labels(labels)} {value[1]:.6f}")
+                lines.append(f"{name}_count{_format_labels(labels)} {value[0]}")
+                continue
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, value):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+            cumulative += value[-2]
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {value[-1]:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _summaries.clear()
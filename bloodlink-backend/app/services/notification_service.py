@@ -1,20 +1,116 @@
-from app.database import get_connection
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-
-def send_notification(user_id: int, message: str, notif_type: str = "emergency"):
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        INSERT INTO notifications (user_id, message, type)
-        VALUES (?, ?, ?)
-    """, (user_id, message, notif_type))
-
-    conn.commit()
-    conn.close()
+from app.config import NOTIFICATION_PROVIDER, NOTIFICATION_SEND_CONCURRENCY
+from app.services import metrics
 
 
 # Mock WhatsApp API
 def send_whatsapp(phone: str, message: str):
     print(f"\n📲 WhatsApp Sent To {phone}")
-    print(f"Message: {message}\n")
\ No newline at end of file
+    print(f"Message: {message}\n")
+
+
+# -----------------------------
+# Providers
+# -----------------------------
+# A provider is anything with send(phone, message) that raises on failure.
+
+class ConsoleProvider:
+    def send(self, phone, message):
+        send_whatsapp(phone, message)
+
+
+class InMemoryProvider:
+    # Local fake transport for tests and benchmarks
+    def __init__(self, fail_first=0):
+        self.sent = []
+        self.fail_first = fail_first
+        self._lock = threading.Lock()
+
+    def send(self, phone, message):
+        with self._lock:
+            if self.fail_first > 0:
+                self.fail_first -= 1
+                raise ConnectionError("simulated provider failure")
+            self.sent.append((phone, message))
+
+
+def _default_provider():
+    if NOTIFICATION_PROVIDER == "twilio":
+        from app.services.whatsapp_service import TwilioWhatsAppProvider
+        return TwilioWhatsAppProvider()
+    return ConsoleProvider()
+
+
+# -----------------------------
+# Fan-out dispatcher
+# -----------------------------
+class NotificationDispatcher:
+    def __init__(self, provider, concurrency=NOTIFICATION_SEND_CONCURRENCY):
+        self.provider = provider
+
+        # A bounded pool is the provider concurrency limit. Each send is one
+        # attempt: the outbox owns retries and backoff, so a failure here
+        # never sleeps while the batch's lease is held.
+        self._senders = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="notify-send")
+
+        self._lock = threading.Lock()
+        self.stats = {"sent": 0, "failed": 0}
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def send_all(self, alerts):
+        # Blocking fan-out used by the outbox drainer; one bool per alert
+        futures = [
+            self._senders.submit(self._send, alert["phone"], alert["message"])
+            if alert.get("phone") else None
+            for alert in alerts
+        ]
+        return [future.result() if future else True for future in futures]
+
+    def _send(self, phone, message):
+        try:
+            with metrics.timer("notification_send"):
+                self.provider.send(phone, message)
+            self._count("sent")
+            return True
+        except Exception as e:
+            print("Notification Error:", e)
+            self._count("failed")
+            return False
+
+    def shutdown(self, wait=True):
+        self._senders.shutdown(wait=wait)
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = NotificationDispatcher(_default_provider())
+        return _dispatcher
+
+
+def set_provider(provider):
+    # Swap the transport (e.g. InMemoryProvider in tests); returns the new dispatcher
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is not None:
+            _dispatcher.shutdown(wait=True)
+        _dispatcher = NotificationDispatcher(provider)
+        return _dispatcher
+
+
+def shutdown_dispatcher():
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is not None:
+            _dispatcher.shutdown(wait=True)
+            _dispatcher = None
@@ -0,0 +1,244 @@
+import threading
+import time
+import uuid
+
+from app.config import (
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_LEASE_SECONDS,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_POLL_SECONDS,
+)
+from app.database import get_connection, write_lock
+from app.services.notification_service import get_dispatcher
+
+# -----------------------------
+# Transactional outbox
+# -----------------------------
+# Alerts are written to `outbox` in the caller's transaction and delivered
+# by a background drainer that claims batches under a lease. A worker that
+# dies mid-batch just lets its lease expire; the rows are picked up again.
+
+_stats_lock = threading.Lock()
+_stats = {
+    "enqueued": 0,
+    "claimed": 0,
+    "delivered": 0,
+    "retried": 0,
+    "failed": 0,
+    "batches": 0,
+    "latency_ms_total": 0.0,
+    "latency_ms_max": 0.0,
+    "busy_seconds": 0.0,
+}
+
+_wake = threading.Event()
+_stop = threading.Event()
+_drainer = None
+
+
+def _count(**amounts):
+    with _stats_lock:
+        for key, amount in amounts.items():
+            _stats[key] += amount
+
+
+# -----------------------------
+# Enqueue (inside caller's transaction)
+# -----------------------------
+ENQUEUE_SQL = """
+    INSERT OR IGNORE INTO outbox
+    (dedupe_key, user_id, phone, message, type, available_at, enqueued_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Same key again: take the newer message if the alert has not gone out yet
+ENQUEUE_MERGE_SQL = """
+    INSERT INTO outbox
+    (dedupe_key, user_id, phone, message, type, available_at, enqueued_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(dedupe_key) DO UPDATE SET message = excluded.message
+    WHERE outbox.status = 'pending'
+"""
+
+
+def enqueue(cursor, alerts, notif_type="emergency", merge=False):
+    # alerts: dicts with dedupe_key, user_id, phone, message.
+    # Does not commit; duplicates by dedupe_key are ignored, or with
+    # merge=True replace the message of a still-pending alert.
+    now = time.time()
+    cursor.executemany(ENQUEUE_MERGE_SQL if merge else ENQUEUE_SQL, [
+        (
+            alert["dedupe_key"],
+            alert["user_id"],
+            alert.get("phone"),
+            alert["message"],
+            notif_type,
+            now,
+            now
+        )
+        for alert in alerts
+    ])
+
+    _count(enqueued=cursor.rowcount if cursor.rowcount > 0 else 0)
+
+
+def wake():
+    # Call after committing enqueued rows to skip the poll delay
+    _wake.set()
+
+
+# -----------------------------
+# Drain
+# -----------------------------
+def _claim_batch(conn, owner, batch_size):
+    now = time.time()
+    cursor = conn.cursor()
+
+    with write_lock():
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("""
+            UPDATE outbox
+            SET status = 'leased',
+                lease_owner = ?,
+                lease_until = ?,
+                attempts = attempts + 1
+            WHERE id IN (
+                SELECT id FROM outbox
+                WHERE status = 'pending' AND available_at <= ?
+                UNION ALL
+                SELECT id FROM outbox
+                WHERE status = 'leased' AND lease_until < ?
+                ORDER BY id
+                LIMIT ?
+            )
+        """, (owner, now + OUTBOX_LEASE_SECONDS, now, now, batch_size))
+        conn.commit()
+
+    cursor.execute("""
+        SELECT id, user_id, phone, message, type, attempts, enqueued_at
+        FROM outbox
+        WHERE lease_owner = ? AND status = 'leased'
+        ORDER BY id
+    """, (owner,))
+    return cursor.fetchall()
+
+
+def drain_once(batch_size=OUTBOX_BATCH_SIZE):
+    owner = uuid.uuid4().hex
+    conn = get_connection()
+
+    try:
+        rows = _claim_batch(conn, owner, batch_size)
+        if not rows:
+            return 0
+
+        started = time.perf_counter()
+        results = get_dispatcher().send_all([dict(row) for row in rows])
+
+        now = time.time()
+        delivered = [row for row, ok in zip(rows, results) if ok]
+        failed = [row for row, ok in zip(rows, results) if not ok]
+
+        cursor = conn.cursor()
+        with write_lock():
+            cursor.execute("BEGIN IMMEDIATE")
+
+            # In-app notification rows and the delivered mark commit together,
+            # and only while we still hold the lease
+            notifications = []
+            for row in delivered:
+                cursor.execute("""
+                    UPDATE outbox
+                    SET status = 'delivered', delivered_at = ?, lease_owner = NULL, lease_until = NULL
+                    WHERE id = ? AND lease_owner = ?
+                """, (now, row["id"], owner))
+                if cursor.rowcount:
+                    notifications.append((row["user_id"], row["message"], row["type"]))
+
+            cursor.executemany("""
+                INSERT INTO notifications (user_id, message, type)
+                VALUES (?, ?, ?)
+            """, notifications)
+
+            for row in failed:
+                exhausted = row["attempts"] >= OUTBOX_MAX_ATTEMPTS
+                cursor.execute("""
+                    UPDATE outbox
+                    SET status = ?, available_at = ?, lease_owner = NULL, lease_until = NULL,
+                        last_error = 'provider send failed'
+                    WHERE id = ? AND lease_owner = ?
+                """, (
+                    "failed" if exhausted else "pending",
+                    now + OUTBOX_POLL_SECONDS * (2 ** row["attempts"]),
+                    row["id"],
+                    owner
+                ))
+
+            conn.commit()
+
+        latencies = [(now - row["enqueued_at"]) * 1000 for row in delivered]
+        retried = sum(1 for row in failed if row["attempts"] < OUTBOX_MAX_ATTEMPTS)
+        _count(
+            claimed=len(rows),
+            delivered=len(delivered),
+            retried=retried,
+            failed=len(failed) - retried,
+            batches=1,
+            latency_ms_total=sum(latencies),
+            busy_seconds=time.perf_counter() - started
+        )
+        if latencies:
+            with _stats_lock:
+                _stats["latency_ms_max"] = max(_stats["latency_ms_max"], max(latencies))
+
+        return len(rows)
+    finally:
+        conn.close()
+
+
+def _run():
+    while not _stop.is_set():
+        try:
+            drained = drain_once()
+        except Exception as e:
+            print("Outbox Error:", e)
+            drained = 0
+
+        if drained == 0:
+            _wake.wait(OUTBOX_POLL_SECONDS)
+            _wake.clear()
+
+
+def start_drainer():
+    global _drainer
+    if _drainer is not None and _drainer.is_alive():
+        return
+
+    _stop.clear()
+    _drainer = threading.Thread(target=_run, name="outbox-drainer", daemon=True)
+    _drainer.start()
+
+
+def stop_drainer(timeout=10):
+    global _drainer
+    _stop.set()
+    _wake.set()
+    if _drainer is not None:
+        _drainer.join(timeout)
+        _drainer = None
+
+
+def outbox_stats():
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status")
+    backlog = {row[0]: row[1] for row in cursor.fetchall()}
+    conn.close()
+
+    with _stats_lock:
+        stats = dict(_stats)
+
+    stats["backlog"] = backlog
+    stats["avg_latency_ms"] = round(stats["latency_ms_total"] / stats["delivered"], 2) if stats["delivered"] else 0.0
+    stats["throughput_per_second"] = round(stats["delivered"] / stats["busy_seconds"], 1) if stats["busy_seconds"] else 0.0
+    return stats
@@ -0,0 +1,120 @@
+import base64
+import json
+
+from fastapi import HTTPException
+
+from app.database import db_connection, run_db
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+EXPORT_CHUNK_SIZE = 1000
+
+# -----------------------------
+# Keyset pagination on (created_at, id)
+# -----------------------------
+# Pages are ordered newest first; the cursor is the (created_at, id) of the
+# last row returned, so every page is an index range scan no matter how deep.
+# Paging is opt-in: without limit or cursor a listing returns every row, as
+# it did before, so existing clients that ignore X-Next-Cursor see no cut.
+
+
+def encode_cursor(created_at, row_id):
+    raw = json.dumps([created_at, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return str(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def page_limit(limit, cursor):
+    # None means unbounded; a cursor alone pages at the default size
+    if limit is None and cursor:
+        return DEFAULT_PAGE_SIZE
+    return limit
+
+
+def request_filters(status=None, blood_group=None, created_from=None, created_to=None):
+    # Filters on patient_requests aliased as pr
+    clauses = []
+    params = []
+
+    if status:
+        clauses.append("pr.status = ?")
+        params.append(status)
+    if blood_group:
+        clauses.append("pr.blood_group = ?")
+        params.append(blood_group)
+    if created_from:
+        clauses.append("pr.created_at >= ?")
+        params.append(created_from)
+    if created_to:
+        clauses.append("pr.created_at < ?")
+        params.append(created_to)
+
+    return clauses, params
+
+
+def _page_sql(select_sql, clauses, after):
+    clauses = list(clauses)
+    if after is not None:
+        clauses.append("(pr.created_at, pr.id) < (?, ?)")
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return f"""
+        {select_sql}
+        {where}
+        ORDER BY pr.created_at DESC, pr.id DESC
+        LIMIT ?
+    """
+
+
+def fetch_page(db, select_sql, clauses, params, limit, after=None):
+    # db: connection or cursor, so run_db(fetch_page, ...) works as is.
+    # Returns (rows as dicts, next cursor or None); limit=None returns all rows
+    params = list(params)
+    if after is not None:
+        params.extend(after)
+
+    # LIMIT -1 is SQLite for no limit
+    rows = db.execute(_page_sql(select_sql, clauses, after), params + [-1 if limit is None else limit + 1]).fetchall()
+    rows = [dict(row) for row in rows]
+
+    if limit is None or len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last["created_at"], last["id"])
+
+
+async def page_response(select_sql, clauses, params, limit, after=None):
+    # (rows, headers) for response_cache.respond
+    rows, next_cursor = await run_db(fetch_page, select_sql, clauses, params, limit, after)
+    return rows, ({"X-Next-Cursor": next_cursor} if next_cursor else {})
+
+
+def stream_ndjson(select_sql, clauses, params, after=None):
+    # Bulk export: walks every page on its own connection, one JSON per line
+    with db_connection() as conn:
+        cursor = conn.cursor()
+
+        while True:
+            sql = _page_sql(select_sql, clauses, after)
+            page_params = list(params) + (list(after) if after else []) + [EXPORT_CHUNK_SIZE]
+            cursor.execute(sql, page_params)
+            rows = cursor.fetchall()
+
+            if not rows:
+                return
+
+            yield "".join(json.dumps(dict(row)) + "\n" for row in rows)
+
+            if len(rows) < EXPORT_CHUNK_SIZE:
+                return
+            after = (rows[-1]["created_at"], rows[-1]["id"])
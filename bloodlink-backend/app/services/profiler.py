@@ -0,0 +1,153 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from app.config import (
+    PROFILER_ENABLED,
+    PROFILER_INTERVAL_SECONDS,
+    PROFILER_MAX_DUMPS,
+    PROFILER_OUTPUT_DIR,
+    PROFILER_SLOW_MS
+)
+from app.services import metrics
+
+# -----------------------------
+# Sampling profiler (opt-in)
+# -----------------------------
+# While requests are in flight a daemon thread snapshots every thread's
+# stack each PROFILER_INTERVAL_SECONDS. When a request finishes slower than
+# the threshold, the samples taken during it are written as collapsed
+# stacks ("frame;frame;frame count"), which flamegraph.pl, speedscope and
+# inferno read directly. Samples are not tied to a thread, so concurrent
+# requests show up in each other's profiles; profile under light load.
+
+# Threads parked in these modules are idle, not work
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py", "thread.py")
+
+_settings = {
+    "enabled": PROFILER_ENABLED,
+    "slow_ms": PROFILER_SLOW_MS,
+    "interval": PROFILER_INTERVAL_SECONDS,
+    "output_dir": PROFILER_OUTPUT_DIR,
+}
+_lock = threading.Lock()
+_active = {}  # request token -> Counter of collapsed stacks
+_wakeup = threading.Event()
+_thread = None
+_next_token = 0
+_stats = {"samples": 0, "slow_requests": 0, "written": 0, "dropped": 0}
+
+
+def configure(enabled=None, slow_ms=None, output_dir=None):
+    with _lock:
+        if enabled is not None:
+            _settings["enabled"] = enabled
+        if enabled:
+            # PROFILER_MAX_DUMPS caps each profiling session, not the process
+            _stats["written"] = 0
+        if slow_ms is not None:
+            _settings["slow_ms"] = slow_ms
+        if output_dir is not None:
+            _settings["output_dir"] = output_dir
+    return profiler_stats()
+
+
+def profiler_stats():
+    with _lock:
+        return {**_settings, **_stats, "in_flight": len(_active)}
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def _sample(own_id):
+    stacks = []
+    for thread_id, frame in sys._current_frames().items():
+        if thread_id == own_id:
+            continue
+        if frame.f_code.co_filename.endswith(_IDLE_FILES):
+            continue
+        stacks.append(_collapse(frame))
+    return stacks
+
+
+def _run():
+    own_id = threading.get_ident()
+    while True:
+        _wakeup.wait()
+        stacks = _sample(own_id)
+
+        with _lock:
+            if not _active:
+                _wakeup.clear()
+                continue
+            for samples in _active.values():
+                samples.update(stacks)
+            _stats["samples"] += 1
+            interval = _settings["interval"]
+
+        time.sleep(interval)
+
+
+def _ensure_thread():
+    global _thread
+    if _thread is None:
+        _thread = threading.Thread(target=_run, name="profiler", daemon=True)
+        _thread.start()
+
+
+def start_request():
+    # Returns a token for finish_request(), or None when profiling is off
+    global _next_token
+    if not _settings["enabled"]:
+        return None
+
+    with _lock:
+        _next_token += 1
+        token = _next_token
+        _active[token] = Counter()
+        _ensure_thread()
+
+    _wakeup.set()
+    return token
+
+
+def finish_request(token, label, seconds):
+    # Writes a .folded file when the request was slow; returns its path
+    with _lock:
+        samples = _active.pop(token, None)
+        slow = seconds * 1000 >= _settings["slow_ms"]
+        if not slow or not samples:
+            return None
+
+        _stats["slow_requests"] += 1
+        if _stats["written"] >= PROFILER_MAX_DUMPS:
+            _stats["dropped"] += 1
+            return None
+        _stats["written"] += 1
+        output_dir = Path(_settings["output_dir"])
+
+    safe_label = re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_") or "root"
+    path = output_dir / f"{time.strftime('%Y%m%d-%H%M%S')}-{int(seconds * 1000)}ms-{safe_label}-{token}.folded"
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+
+    metrics.inc("bloodlink_profiles_written_total")
+    return path
@@ -0,0 +1,68 @@
+import csv
+from collections import deque
+
+from fastapi import HTTPException, Request
+
+# A quoted field left open this long is a malformed upload, not a record
+MAX_CSV_RECORD_CHARS = 1_000_000
+
+
+def _decode(line):
+    try:
+        return line.decode().rstrip("\r")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Request body must be UTF-8")
+
+
+async def body_lines(request: Request):
+    # Decoded lines of a streamed request body, without buffering all of it
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield _decode(line)
+    if buffer:
+        yield _decode(buffer)
+
+
+async def body_csv_records(request: Request):
+    # Dicts keyed by the header row of a streamed CSV body. One csv.reader
+    # parses the whole body; physical lines are held back until their quotes
+    # balance, so the reader is only ever asked for a complete record and a
+    # quoted field may contain commas and newlines.
+    lines = deque()
+    reader = csv.reader(iter(lines.popleft, None))
+    header = None
+    pending = []
+    quotes = 0
+
+    async for line in body_lines(request):
+        if line.startswith("\ufeff") and header is None and not pending:
+            line = line[1:]  # byte order mark from spreadsheet exports
+
+        pending.append(line + "\n")
+        quotes += line.count('"')
+        if quotes % 2:
+            if sum(map(len, pending)) > MAX_CSV_RECORD_CHARS:
+                raise HTTPException(status_code=400, detail="Unterminated quoted field in CSV")
+            continue
+
+        lines.extend(pending)
+        pending = []
+        quotes = 0
+
+        try:
+            values = next(reader)
+        except csv.Error as e:
+            raise HTTPException(status_code=400, detail=f"Invalid CSV: {e}")
+
+        if not any(value.strip() for value in values):
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        yield dict(zip(header, values))
+
+    if pending:
+        raise HTTPException(status_code=400, detail="Unterminated quoted field in CSV")
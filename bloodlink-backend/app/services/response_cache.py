@@ -0,0 +1,150 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from fastapi import Response
+
+from app.config import RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_SIZE
+
+try:
+    import orjson
+except ImportError:  # stdlib encoder, same JSON without the speed
+    orjson = None
+
+# -----------------------------
+# Dashboard response cache
+# -----------------------------
+# Polled read endpoints keep their encoded JSON per key (route + user or
+# role + query). Each entry remembers the version of every table it read;
+# writers call bump() after they commit, so an entry is served only while
+# none of its tables changed. The ETag is a digest of the body, so a client
+# revalidating with If-None-Match gets 304 with no SQLite work, and an
+# unchanged rebuild after a bump still answers 304.
+
+_lock = threading.Lock()
+_versions = {}  # table -> write counter
+_entries = OrderedDict()  # key -> _Entry, least recently used first
+_bytes = 0
+
+_stats = {
+    "hits": 0,
+    "misses": 0,
+    "not_modified": 0,
+    "evictions": 0,
+}
+
+
+class _Entry:
+    __slots__ = ("versions", "body", "etag", "headers")
+
+    def __init__(self, versions, body, headers):
+        self.versions = versions
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self.headers = headers
+
+
+def dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def bump(*tables):
+    # Call after the writing transaction has committed
+    with _lock:
+        for table in tables:
+            _versions[table] = _versions.get(table, 0) + 1
+
+
+def _current(tables):
+    return tuple(_versions.get(table, 0) for table in tables)
+
+
+def _lookup(key, tables):
+    # Returns (entry or None, current versions); versions are taken before
+    # the rebuild reads, so a write racing it leaves the entry stale, not wrong
+    with _lock:
+        versions = _current(tables)
+        entry = _entries.get(key)
+        if entry is not None and entry.versions == versions:
+            _entries.move_to_end(key)
+            _stats["hits"] += 1
+            return entry, versions
+
+        _stats["misses"] += 1
+        return None, versions
+
+
+def _store(key, entry):
+    global _bytes
+    if RESPONSE_CACHE_SIZE <= 0 or len(entry.body) > RESPONSE_CACHE_MAX_BYTES:
+        return
+
+    with _lock:
+        old = _entries.pop(key, None)
+        if old is not None:
+            _bytes -= len(old.body)
+
+        _entries[key] = entry
+        _bytes += len(entry.body)
+
+        while len(_entries) > RESPONSE_CACHE_SIZE or _bytes > RESPONSE_CACHE_MAX_BYTES:
+            _, evicted = _entries.popitem(last=False)
+            _bytes -= len(evicted.body)
+            _stats["evictions"] += 1
+
+
+def _matches(if_none_match, etag):
+    # If-None-Match uses the weak comparison: W/ prefixes are ignored
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+async def respond(request, key, tables, build):
+    # build(): awaitable -> (payload, extra headers); run only on a miss
+    entry, versions = _lookup(key, tables)
+
+    if entry is None:
+        payload, headers = await build()
+        entry = _Entry(versions, dumps(payload), headers)
+        _store(key, entry)
+
+    # Per-user data: browsers may keep it but must revalidate every time
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache", **entry.headers}
+
+    if _matches(request.headers.get("if-none-match"), entry.etag):
+        with _lock:
+            _stats["not_modified"] += 1
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+def cache_stats():
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "size": len(_entries),
+            "max_size": RESPONSE_CACHE_SIZE,
+            "bytes": _bytes,
+            "max_bytes": RESPONSE_CACHE_MAX_BYTES,
+            "hit_rate": round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+            "encoder": "orjson" if orjson is not None else "json",
+            "versions": dict(_versions),
+        }
+
+
+def reset():
+    global _bytes
+    with _lock:
+        _entries.clear()
+        _versions.clear()
+        _bytes = 0
+        for name in _stats:
+            _stats[name] = 0
@@ -0,0 +1,94 @@
+import threading
+import time
+
+from app.config import ADMIN_STATS_COUNTERS, ADMIN_STATS_TTL_SECONDS
+
+# -----------------------------
+# Admin dashboard stats
+# -----------------------------
+# Both sources yield (name, value) rows with the same names: the aggregate
+# query scans the base tables once, stat_counters is kept current by the
+# triggers in schema.sql.
+
+AGGREGATE_SQL = """
+    SELECT 'patients', COUNT(*) FROM users WHERE role = 'patient'
+    UNION ALL
+    SELECT 'hospitals', COUNT(*) FROM hospitals
+    UNION ALL
+    SELECT 'blood_banks', COUNT(*) FROM blood_banks
+    UNION ALL
+    SELECT 'requests', COUNT(*) FROM patient_requests
+    UNION ALL
+    SELECT 'requests.status.' || COALESCE(status, ''), COUNT(*)
+    FROM patient_requests GROUP BY status
+    UNION ALL
+    SELECT 'requests.group.' || blood_group, COUNT(*)
+    FROM patient_requests GROUP BY blood_group
+    UNION ALL
+    SELECT 'inventory.group.' || blood_group, COALESCE(SUM(units_available), 0)
+    FROM blood_inventory GROUP BY blood_group
+"""
+
+_cache_lock = threading.Lock()
+_cache = {"stats": None, "expires_at": 0.0}
+
+
+def rebuild_counters(cursor):
+    cursor.execute("DELETE FROM stat_counters")
+    cursor.execute(f"INSERT INTO stat_counters (name, value) {AGGREGATE_SQL}")
+    cursor.execute("INSERT INTO stat_counters (name, value) VALUES ('initialized', 1)")
+
+
+def ensure_counters(cursor):
+    cursor.execute("SELECT 1 FROM stat_counters WHERE name = 'initialized'")
+    if not cursor.fetchone():
+        rebuild_counters(cursor)
+
+
+def _build_stats(rows):
+    values = {name: value for name, value in rows}
+
+    def prefixed(prefix):
+        return {
+            name[len(prefix):]: value
+            for name, value in values.items()
+            if name.startswith(prefix) and value
+        }
+
+    return {
+        "total_patients": values.get("patients", 0),
+        "total_hospitals": values.get("hospitals", 0),
+        "total_bloodbanks": values.get("blood_banks", 0),
+        "total_requests": values.get("requests", 0),
+        "pending_requests": values.get("requests.status.pending", 0),
+        "approved_requests": values.get("requests.status.approved", 0),
+        "requests_by_blood_group": prefixed("requests.group."),
+        "inventory_by_blood_group": prefixed("inventory.group."),
+    }
+
+
+def compute_stats(cursor):
+    if ADMIN_STATS_COUNTERS:
+        cursor.execute("SELECT name, value FROM stat_counters")
+    else:
+        cursor.execute(AGGREGATE_SQL)
+    return _build_stats(cursor.fetchall())
+
+
+def get_stats(cursor):
+    now = time.monotonic()
+    with _cache_lock:
+        if _cache["stats"] is not None and now < _cache["expires_at"]:
+            return _cache["stats"]
+
+    stats = compute_stats(cursor)
+
+    with _cache_lock:
+        _cache["stats"] = stats
+        _cache["expires_at"] = now + ADMIN_STATS_TTL_SECONDS
+    return stats
+
+
+def invalidate_cache():
+    with _cache_lock:
+        _cache["stats"] = None
@@ -1,4 +1,5 @@
 import os
+import threading
 from twilio.rest import Client
 from dotenv import load_dotenv
 
@@ -8,6 +9,28 @@ TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_WHATSAPP_NUMBER = os.getenv("TWILIO_WHATSAPP_NUMBER")
 
+_client = None
+_client_lock = threading.Lock()
+
+
+# One Twilio client (and its HTTP session) for the whole process
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+        return _client
+
+
+class TwilioWhatsAppProvider:
+    # notification_service provider; raises so the outbox can retry
+    def send(self, phone, message):
+        get_client().messages.create(
+            from_=TWILIO_WHATSAPP_NUMBER,
+            body=message,
+            to=f"whatsapp:{phone}"
+        )
+
 
 def send_emergency_whatsapp_alert(
     donor_phone,
@@ -17,7 +40,7 @@ def send_emergency_whatsapp_alert(
     distance
 ):
     try:
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+        client = get_client()
 
         formatted_phone = f"whatsapp:{donor_phone}"
 
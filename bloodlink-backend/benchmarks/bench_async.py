@@ -0,0 +1,121 @@
+# Concurrency scaling: the pre-async sync handlers (threadpool + get_db) vs
+# the async routes on the DB executor, for a read (/hospital/requests) and a
+# write (/requests/create), at increasing numbers of simultaneous clients.
+#
+#   cd bloodlink-backend
+#   python -m benchmarks.bench_async --concurrency 50 100 250 500 1000
+
+import argparse
+import random
+import tempfile
+from pathlib import Path
+
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from benchmarks.bench_matching import BLOOD_GROUPS, METROS
+from benchmarks.load import auth_header, run_load
+from benchmarks.seed import seed_database, user_ids
+
+
+def legacy_app():
+    # The handlers as they were: sync def, sync auth, connection from get_db
+    from app.database import get_db
+    from app.middleware.auth_middleware import decode_token, security
+    from app.routers.hospital import HOSPITAL_REQUESTS_SQL
+    from app.routers.requests import BloodRequest
+    from app.services.matching_service import find_matching_donors
+    from app.services.pagination import fetch_page
+
+    app = FastAPI()
+
+    def current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+        return decode_token(credentials.credentials)
+
+    @app.get("/hospital/requests")
+    def get_all_requests(limit: int = 50, current_user: dict = Depends(current_user), conn=Depends(get_db)):
+        if current_user["role"] != "hospital":
+            raise HTTPException(status_code=403, detail="Only hospitals allowed")
+        rows, _ = fetch_page(conn.cursor(), HOSPITAL_REQUESTS_SQL, [], [], limit)
+        return rows
+
+    @app.post("/requests/create")
+    def create_blood_request(request: BloodRequest, current_user: dict = Depends(current_user), conn=Depends(get_db)):
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO patient_requests
+            (patient_id, blood_group, units_required, request_type, scheduled_date)
+            VALUES (?, ?, ?, ?, ?)
+        """, (current_user["user_id"], request.blood_group, request.units_required,
+              request.request_type, request.scheduled_date))
+        conn.commit()
+        return {"matched_donors": find_matching_donors(request.blood_group, request.latitude, request.longitude)}
+
+    return app
+
+
+def async_app():
+    from app.routers import hospital, requests
+
+    app = FastAPI()
+    app.include_router(hospital.router)
+    app.include_router(requests.router)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 100, 250, 500, 1000])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--donors", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    from app import database
+    from app.services import donor_roster
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = Path(tmp) / "bench.db"
+        database.init_db()
+        conn = database.get_connection()
+        seed_database(conn, donors=args.donors, requests=args.requests)
+        conn.close()
+        donor_roster.invalidate()
+
+        ids = user_ids()
+        hospital = auth_header(ids["hospital"][0], "hospital")
+        patients = [auth_header(user_id, "patient") for user_id in ids["patient"]]
+        rng = random.Random(5)
+
+        async def read(client):
+            return await client.get("/hospital/requests", params={"limit": 50}, headers=hospital)
+
+        async def write(client):
+            lat, lon = rng.choice(METROS)
+            return await client.post("/requests/create", headers=rng.choice(patients), json={
+                "blood_group": rng.choice(BLOOD_GROUPS),
+                "units_required": 1,
+                "request_type": "immediate",
+                "latitude": lat + rng.gauss(0, 0.2),
+                "longitude": lon + rng.gauss(0, 0.2)
+            })
+
+        apps = {"sync": legacy_app(), "async": async_app()}
+        print(f"{'route':<20}{'clients':>8}  {'sync req/s':>11}{'p50':>9}{'p99':>9}"
+              f"  {'async req/s':>12}{'p50':>9}{'p99':>9}")
+
+        for label, send in (("GET hospital/reqs", read), ("POST requests", write)):
+            for concurrency in args.concurrency:
+                row = {}
+                for name, app in apps.items():
+                    row[name] = run_load(app, send, concurrency, args.duration)
+                    assert row[name]["errors"] == 0, (name, row[name])
+                s, a = row["sync"], row["async"]
+                print(f"{label:<20}{concurrency:>8}  {s['rps']:>11}{s['p50_ms']:>9}{s['p99_ms']:>9}"
+                      f"  {a['rps']:>12}{a['p50_ms']:>9}{a['p99_ms']:>9}")
+
+        database.shutdown_db_executor()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# Requests per second on the authenticated no-op route /users/me with and
+# without the verified-token cache.
+#
+#   cd bloodlink-backend
+#   python -m benchmarks.bench_auth --concurrency 16 --duration 5
+
+import argparse
+
+from benchmarks.load import auth_header, run_load
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--tokens", type=int, default=50, help="distinct users polling")
+    args = parser.parse_args()
+
+    from app.main import app
+    from app.middleware import auth_middleware
+
+    headers = [auth_header(user_id, "patient") for user_id in range(1, args.tokens + 1)]
+    counter = {"n": 0}
+
+    async def get_me(client):
+        counter["n"] += 1
+        return await client.get("/users/me", headers=headers[counter["n"] % len(headers)])
+
+    for label, size in (("no cache", 0), ("cache", 10_000)):
+        auth_middleware.TOKEN_CACHE_SIZE = size
+        stats = run_load(app, get_me, args.concurrency, args.duration)
+        print(f"{label:<9} /users/me {stats['rps']:>8} req/s  p50 {stats['p50_ms']:>6}ms  "
+              f"p99 {stats['p99_ms']:>6}ms  errors {stats['errors']}")
+
+    print("cache stats:", auth_middleware.token_cache_stats())
+
+
+if __name__ == "__main__":
+    main()
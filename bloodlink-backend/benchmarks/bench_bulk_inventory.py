@@ -0,0 +1,86 @@
+# Blood bank LIS sync: N lots as one POST /bloodbank/inventory call each vs a
+# single POST /bloodbank/inventory/bulk (JSON, NDJSON and CSV bodies).
+#
+#   cd bloodlink-backend
+#   python -m benchmarks.bench_bulk_inventory --rows 10000
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.bench_matching import BLOOD_GROUPS
+from benchmarks.load import auth_header
+
+
+def make_lots(count, units_offset=0):
+    # Distinct (blood_group, expiry_date) keys so every row is its own lot
+    return [
+        {
+            "blood_group": BLOOD_GROUPS[i % 8],
+            "units_available": (i + units_offset) % 40,
+            "expiry_date": f"{2030 + i // 2688}-{1 + i // 224 % 12:02d}-{1 + i // 8 % 28:02d}",
+        }
+        for i in range(count)
+    ]
+
+
+def encode(lots, fmt):
+    if fmt == "json":
+        return json.dumps(lots), "application/json"
+    if fmt == "ndjson":
+        return "".join(json.dumps(lot) + "\n" for lot in lots), "application/x-ndjson"
+    lines = ["blood_group,units_available,expiry_date"]
+    lines += [f"{lot['blood_group']},{lot['units_available']},{lot['expiry_date']}" for lot in lots]
+    return "\n".join(lines) + "\n", "text/csv"
+
+
+async def _run(app, args):
+    headers = auth_header(1, "bloodbank")
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        single = make_lots(args.single_rows)
+        start = time.perf_counter()
+        for lot in single:
+            response = await client.post("/bloodbank/inventory", json=lot, headers=headers)
+            response.raise_for_status()
+        single_seconds = time.perf_counter() - start
+        print(f"single POST  {args.single_rows:>6} rows  {single_seconds:7.3f}s  "
+              f"{args.single_rows / single_seconds:>9,.0f} rows/s")
+
+        for offset, fmt in enumerate(("json", "ndjson", "csv")):
+            body, content_type = encode(make_lots(args.rows, units_offset=offset), fmt)
+            start = time.perf_counter()
+            response = await client.post(
+                "/bloodbank/inventory/bulk",
+                content=body,
+                headers={**headers, "Content-Type": content_type}
+            )
+            elapsed = time.perf_counter() - start
+            result = response.json()
+            assert response.status_code == 200 and result["applied"] == args.rows, result.get("errors")
+            print(f"bulk {fmt:<7} {args.rows:>6} rows  {elapsed:7.3f}s  {args.rows / elapsed:>9,.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--single-rows", type=int, default=1_000)
+    args = parser.parse_args()
+
+    from app import database
+    from app.main import app
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = Path(tmp) / "bench.db"
+        database.init_db()
+        asyncio.run(_run(app, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# Parallel approvals racing for the same stock: the old read-then-write
+# approval vs the reservation engine. Checks that stock never goes negative,
+# units approved equal units taken out of inventory, and the reservation
+# ledger agrees.
+#
+#   cd bloodlink-backend
+#   python -m benchmarks.bench_inventory --threads 16 --requests 400
+
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from fastapi import HTTPException
+
+
+def seed(conn, lots, units_per_lot, requests, units_per_request):
+    conn.execute("""
+        INSERT INTO users (google_id, role, name, email)
+        VALUES ('bench-patient', 'patient', 'Bench Patient', 'patient@bench.local')
+    """)
+    conn.execute("""
+        INSERT INTO blood_banks (name, government_id)
+        VALUES ('Bench Bank', 'BENCH-1')
+    """)
+    conn.executemany("""
+        INSERT INTO blood_inventory (blood_bank_id, blood_group, units_available)
+        VALUES (1, 'O+', ?)
+    """, [(units_per_lot,)] * lots)
+    conn.executemany("""
+        INSERT INTO patient_requests (patient_id, blood_group, units_required, request_type)
+        VALUES (1, 'O+', ?, 'immediate')
+    """, [(units_per_request,)] * requests)
+    conn.commit()
+
+
+def legacy_approve(conn, request_id):
+    # The pre-reservation approval: read the largest lot, write back an
+    # absolute value computed in Python
+    cursor = conn.cursor()
+    cursor.execute("SELECT blood_group, units_required FROM patient_requests WHERE id = ?", (request_id,))
+    request = cursor.fetchone()
+
+    cursor.execute("""
+        SELECT id, units_available
+        FROM blood_inventory
+        WHERE LOWER(blood_group) = LOWER(?)
+        ORDER BY units_available DESC
+    """, (request["blood_group"],))
+    inventory = cursor.fetchone()
+
+    if not inventory or inventory["units_available"] < request["units_required"]:
+        raise HTTPException(status_code=400, detail="Insufficient stock")
+
+    time.sleep(0)  # yield between read and write, as a request handler would
+    cursor.execute("UPDATE blood_inventory SET units_available = ? WHERE id = ?",
+                   (inventory["units_available"] - request["units_required"], inventory["id"]))
+    cursor.execute("UPDATE patient_requests SET status = 'approved' WHERE id = ?", (request_id,))
+    conn.commit()
+
+
+def engine_approve(conn, request_id):
+    from app.services import inventory_service
+
+    inventory_service.update_request_status(conn, request_id, "approved", approved_by=1)
+
+
+def run_mode(label, approve, args):
+    from app import database
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = Path(tmp) / "bench.db"
+        database.init_db()
+
+        conn = database.get_connection()
+        seed(conn, args.lots, args.units_per_lot, args.requests, args.units_per_request)
+        stock_before = conn.execute("SELECT SUM(units_available) FROM blood_inventory").fetchone()[0]
+        conn.close()
+
+        next_id = iter(range(1, args.requests + 1))
+        id_lock = threading.Lock()
+        outcome = {"approved": 0, "rejected": 0, "errors": 0}
+        outcome_lock = threading.Lock()
+
+        def worker():
+            conn = database.get_connection()
+            try:
+                while True:
+                    with id_lock:
+                        request_id = next(next_id, None)
+                    if request_id is None:
+                        return
+                    try:
+                        approve(conn, request_id)
+                        key = "approved"
+                    except HTTPException:
+                        conn.rollback()
+                        key = "rejected"
+                    except Exception:
+                        conn.rollback()
+                        key = "errors"
+                    with outcome_lock:
+                        outcome[key] += 1
+            finally:
+                conn.close()
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        conn = database.get_connection()
+        stock_after, min_lot = conn.execute(
+            "SELECT SUM(units_available), MIN(units_available) FROM blood_inventory"
+        ).fetchone()
+        units_approved = conn.execute(
+            "SELECT COALESCE(SUM(units_required), 0) FROM patient_requests WHERE status = 'approved'"
+        ).fetchone()[0]
+        ledger = conn.execute(
+            "SELECT COALESCE(SUM(units), 0) FROM inventory_reservations WHERE status = 'reserved'"
+        ).fetchone()[0]
+        conn.close()
+
+    consumed = stock_before - stock_after
+    print(f"{label:<8} {args.requests / elapsed:>8.1f} approvals/s  approved {outcome['approved']:>4}  "
+          f"rejected {outcome['rejected']:>4}  errors {outcome['errors']:>3}  "
+          f"units approved {units_approved:>4}  stock consumed {consumed:>4}  "
+          f"oversold {units_approved - consumed:>4}  min lot {min_lot:>3}  ledger {ledger:>4}")
+
+    return units_approved, consumed, min_lot, ledger
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--lots", type=int, default=20)
+    parser.add_argument("--units-per-lot", type=int, default=15)
+    parser.add_argument("--units-per-request", type=int, default=2)
+    args = parser.parse_args()
+
+    run_mode("legacy", legacy_approve, args)
+    units_approved, consumed, min_lot, ledger = run_mode("engine", engine_approve, args)
+
+    assert min_lot >= 0, "stock went negative"
+    assert units_approved == consumed == ledger, "approvals, stock and ledger disagree"
+
+
+if __name__ == "__main__":
+    main()
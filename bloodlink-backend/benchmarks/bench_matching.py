@@ -0,0 +1,149 @@
+# Donor matching latency: legacy full-table Haversine scan vs grid-indexed
+# k-nearest lookup.
+#
+#   cd bloodlink-backend
+#   python -m benchmarks.bench_matching --sizes 10000 100000 1000000
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+BLOOD_GROUPS = ["A+", "A-", "B+", "B-", "O+", "O-", "AB+", "AB-"]
+
+# Donors cluster around metros, like a real registry
+METROS = [
+    (12.9716, 77.5946),  # Bangalore
+    (19.0760, 72.8777),  # Mumbai
+    (28.6139, 77.2090),  # Delhi
+    (13.0827, 80.2707),  # Chennai
+    (22.5726, 88.3639),  # Kolkata
+    (17.3850, 78.4867),  # Hyderabad
+]
+
+
+def last_donation(rng):
+    # One donor in five gave in the last 180 days, so about one in ten is
+    # still inside the 90-day cooldown
+    if rng.random() < 0.2:
+        return str(date.today() - timedelta(days=rng.randrange(180)))
+    return None
+
+
+def seed_donors(conn, count, rng):
+    def rows():
+        for i in range(count):
+            lat, lon = rng.choice(METROS)
+            yield (
+                f"bench-donor-{i}",
+                "donor",
+                f"Donor {i}",
+                f"donor{i}@bench.local",
+                "+910000000000",
+                rng.choice(BLOOD_GROUPS),
+                lat + rng.gauss(0, 0.3),
+                lon + rng.gauss(0, 0.3),
+                last_donation(rng),
+            )
+
+    conn.executemany("""
+        INSERT INTO users (google_id, role, name, email, phone, blood_group, latitude, longitude, last_donation_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows())
+    conn.commit()
+
+
+def legacy_find_matching_donors(blood_group, patient_lat, patient_lon):
+    from app.database import get_connection
+    from app.services.matching_service import COMPATIBLE_DONORS, calculate_distance
+
+    groups = COMPATIBLE_DONORS[blood_group]
+    conn = get_connection()
+    donors = conn.execute(f"""
+        SELECT id, name, phone, blood_group, latitude, longitude
+        FROM users
+        WHERE role = 'donor'
+        AND blood_group IN ({", ".join("?" * len(groups))})
+        AND is_available = 1
+        AND (eligible_from IS NULL OR eligible_from <= DATE('now'))
+    """, groups).fetchall()
+    conn.close()
+
+    matched = []
+    for donor in donors:
+        if donor["latitude"] and donor["longitude"]:
+            distance = calculate_distance(patient_lat, patient_lon, donor["latitude"], donor["longitude"])
+            if distance <= 150:
+                matched.append({"id": donor["id"], "distance_km": round(distance, 2)})
+
+    matched.sort(key=lambda x: x["distance_km"])
+    return matched[:10]
+
+
+def time_queries(fn, queries):
+    samples = []
+    for blood_group, lat, lon in queries:
+        start = time.perf_counter()
+        fn(blood_group, lat, lon)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def run(size, queries_per_size, rng):
+    from app import database
+    from app.services import donor_roster
+    from app.services.matching_service import find_matching_donors
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = Path(tmp) / "bench.db"
+        database.init_db()
+
+        conn = database.get_connection()
+        start = time.perf_counter()
+        seed_donors(conn, size, rng)
+        seed_seconds = time.perf_counter() - start
+        conn.close()
+        donor_roster.invalidate()
+
+        queries = []
+        for _ in range(queries_per_size):
+            lat, lon = rng.choice(METROS)
+            queries.append((rng.choice(BLOOD_GROUPS), lat + rng.gauss(0, 0.2), lon + rng.gauss(0, 0.2)))
+
+        # Same answers before timing anything
+        for blood_group, lat, lon in queries[:5]:
+            legacy = [d["id"] for d in legacy_find_matching_donors(blood_group, lat, lon)]
+            indexed = [d["id"] for d in find_matching_donors(blood_group, lat, lon)]
+            assert sorted(legacy) == sorted(indexed), (blood_group, lat, lon)
+
+        legacy_p50, legacy_p95 = time_queries(legacy_find_matching_donors, queries)
+        indexed_p50, indexed_p95 = time_queries(find_matching_donors, queries)
+
+    print(
+        f"{size:>9} donors | seed {seed_seconds:6.1f}s | "
+        f"full scan p50 {legacy_p50:8.2f}ms p95 {legacy_p95:8.2f}ms | "
+        f"grid kNN p50 {indexed_p50:6.2f}ms p95 {indexed_p95:6.2f}ms | "
+        f"x{legacy_p50 / indexed_p50:.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    for size in args.sizes:
+        run(size, args.queries, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# "Which blood banks near me have N units?" latency: joining every inventory
+# row and filtering distance in Python vs the bank_stock summary with the
+# grid prefilter. Also reports the cost the summary triggers add to writes.
+# Banks are seeded the way the app stores them: bloodbank users own the
+# inventory rows and blood_banks stays empty.
+#
+#   cd bloodlink-backend
+#   python -m benchmarks.bench_nearby --banks 10000 --lots-per-bank 24
+#
+# --check DB runs no benchmark: it migrates a copy of an existing database
+# (e.g. bloodlink.db), gives its bloodbank users coordinates where they have
+# none, and checks that bank_stock matches the inventory and that every bank
+# with stock is found next to itself.
+
+import argparse
+import random
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from benchmarks.bench_matching import BLOOD_GROUPS, METROS, time_queries
+
+
+def seed_banks(conn, banks, lots_per_bank, rng):
+    conn.executemany("""
+        INSERT INTO users (google_id, role, name, email, phone, city, latitude, longitude)
+        VALUES (?, 'bloodbank', ?, ?, '+910000000000', 'Bench', ?, ?)
+    """, [
+        (f"bench-bank-{i}", f"Bank {i}", f"bank{i}@bench.local", lat + rng.gauss(0, 0.5), lon + rng.gauss(0, 0.5))
+        for i, (lat, lon) in enumerate(rng.choice(METROS) for _ in range(banks))
+    ])
+
+    start = time.perf_counter()
+    conn.executemany("""
+        INSERT INTO blood_inventory (blood_bank_id, blood_group, units_available, expiry_date)
+        VALUES (?, ?, ?, ?)
+    """, [
+        # One expiry per lot index keeps (bank, group, expiry) unique
+        (bank_id, rng.choice(BLOOD_GROUPS), rng.randint(0, 20), str(date(2099, 1, 1) + timedelta(days=lot)))
+        for bank_id in range(1, banks + 1)
+        for lot in range(lots_per_bank)
+    ])
+    conn.commit()
+    return time.perf_counter() - start
+
+
+def legacy_find_nearby(conn, blood_group, lat, lon, min_units, radius_km=150, limit=10):
+    from app.services.matching_service import calculate_distance
+
+    rows = conn.execute("""
+        SELECT b.id, b.latitude, b.longitude, SUM(i.units_available) AS units
+        FROM blood_inventory i
+        JOIN users b ON b.id = i.blood_bank_id AND b.role = 'bloodbank'
+        WHERE i.blood_group = ?
+        AND (i.expiry_date IS NULL OR i.expiry_date >= DATE('now'))
+        GROUP BY b.id
+        HAVING units >= ?
+    """, (blood_group, min_units)).fetchall()
+
+    matched = []
+    for row in rows:
+        distance = calculate_distance(lat, lon, row["latitude"], row["longitude"])
+        if distance <= radius_km:
+            matched.append({"id": row["id"], "distance_km": round(distance, 2)})
+
+    matched.sort(key=lambda x: x["distance_km"])
+    return matched[:limit]
+
+
+def check_database(path):
+    from app import database
+    from app.migrations import migrate
+    from app.services.matching_service import find_nearby_blood_banks
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = Path(tmp) / "check.db"
+        shutil.copyfile(path, database.DB_PATH)
+        migrate()
+
+        conn = database.get_connection()
+        conn.execute("""
+            UPDATE users
+            SET latitude = 12.9 + id * 0.01, longitude = 77.5
+            WHERE role = 'bloodbank' AND (latitude IS NULL OR longitude IS NULL)
+        """)
+        conn.commit()
+
+        stock = {tuple(row[:3]) for row in conn.execute("""
+            SELECT s.blood_bank_id, s.blood_group, s.units_available
+            FROM bank_stock s
+            JOIN users b ON b.id = s.blood_bank_id
+            WHERE s.geo_cell IS b.geo_cell
+        """)}
+        expected = {tuple(row) for row in conn.execute("""
+            SELECT blood_bank_id, blood_group, SUM(COALESCE(units_available, 0))
+            FROM blood_inventory
+            GROUP BY blood_bank_id, blood_group
+        """)}
+        assert stock == expected, sorted(expected ^ stock)
+
+        banks = conn.execute("""
+            SELECT b.id, b.latitude, b.longitude, i.blood_group
+            FROM blood_inventory i
+            JOIN users b ON b.id = i.blood_bank_id
+            WHERE b.role = 'bloodbank'
+            AND i.units_available > 0
+            AND (i.expiry_date IS NULL OR i.expiry_date >= DATE('now'))
+            GROUP BY b.id, i.blood_group
+        """).fetchall()
+        for bank_id, lat, lon, blood_group in banks:
+            found = find_nearby_blood_banks(conn.cursor(), blood_group, lat, lon, radius_km=1)
+            assert bank_id in [bank["id"] for bank in found], (bank_id, blood_group)
+        conn.close()
+
+    print(f"{path}: bank_stock matches {len(expected)} inventory totals, {len(banks)} bank stocks found nearby")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--banks", type=int, default=10_000)
+    parser.add_argument("--lots-per-bank", type=int, default=24)
+    parser.add_argument("--units", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--check", metavar="DB", help="check an existing database instead of benchmarking")
+    args = parser.parse_args()
+
+    if args.check:
+        check_database(args.check)
+        return
+
+    from app import database
+    from app.services.matching_service import find_nearby_blood_banks
+
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = Path(tmp) / "bench.db"
+        database.init_db()
+
+        conn = database.get_connection()
+        write_seconds = seed_banks(conn, args.banks, args.lots_per_bank, rng)
+
+        # Same insert again without the summary triggers, for write overhead
+        conn.execute("DROP TRIGGER trg_bank_stock_inventory_insert")
+        start = time.perf_counter()
+        conn.executemany("""
+            INSERT INTO blood_inventory (blood_bank_id, blood_group, units_available, expiry_date)
+            VALUES (?, ?, 0, ?)
+        """, [
+            (1 + i % args.banks, BLOOD_GROUPS[i % 8], str(date(2098, 1, 1) + timedelta(days=i // args.banks)))
+            for i in range(args.banks * args.lots_per_bank)
+        ])
+        bare_write_seconds = time.perf_counter() - start
+        conn.rollback()
+
+        queries = []
+        for _ in range(args.queries):
+            lat, lon = rng.choice(METROS)
+            queries.append((rng.choice(BLOOD_GROUPS), lat + rng.gauss(0, 0.2), lon + rng.gauss(0, 0.2)))
+
+        def legacy(blood_group, lat, lon):
+            return legacy_find_nearby(conn, blood_group, lat, lon, args.units)
+
+        def summary(blood_group, lat, lon):
+            return find_nearby_blood_banks(conn.cursor(), blood_group, lat, lon, min_units=args.units)
+
+        for blood_group, lat, lon in queries[:5]:
+            expected = [b["id"] for b in legacy(blood_group, lat, lon)]
+            assert expected and expected == [b["id"] for b in summary(blood_group, lat, lon)], (blood_group, lat, lon)
+
+        legacy_p50, legacy_p95 = time_queries(legacy, queries)
+        summary_p50, summary_p95 = time_queries(summary, queries)
+        conn.close()
+
+    lots = args.banks * args.lots_per_bank
+    print(
+        f"{args.banks} banks, {lots} lots, >= {args.units} units | "
+        f"inventory join p50 {legacy_p50:8.2f}ms p95 {legacy_p95:8.2f}ms | "
+        f"bank_stock p50 {summary_p50:6.2f}ms p95 {summary_p95:6.2f}ms | x{legacy_p50 / summary_p50:.0f}"
+    )
+    print(
+        f"inventory insert: {lots / write_seconds:,.0f} rows/s with summary triggers, "
+        f"{lots / bare_write_seconds:,.0f} rows/s without"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Requests per second on /patient/requests and /emergency/create with one
+# connection per call (rollback journal) vs the pooled WAL connections.
+#
+#   cd bloodlink-backend
+#   python -m benchmarks.bench_pool --concurrency 32 --duration 5
+
+import argparse
+import contextlib
+import io
+import random
+import tempfile
+from pathlib import Path
+
+from benchmarks.bench_matching import seed_donors
+from benchmarks.load import auth_header, run_load
+
+
+def seed_patient_requests(conn, patient_id, count):
+    conn.execute("""
+        INSERT INTO users (google_id, role, name, email)
+        VALUES ('bench-patient', 'patient', 'Bench Patient', 'patient@bench.local')
+    """)
+    conn.executemany("""
+        INSERT INTO patient_requests (patient_id, blood_group, units_required, request_type)
+        VALUES (?, 'O+', 2, 'immediate')
+    """, [(patient_id,)] * count)
+    conn.commit()
+
+
+def run_mode(label, pool_size, args):
+    from app import database
+    from app.main import app
+    from app.services import donor_roster
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = Path(tmp) / "bench.db"
+        database.DB_POOL_SIZE = pool_size
+        database.init_db()
+
+        conn = database.get_connection()
+        seed_donors(conn, args.donors, random.Random(7))
+        patient_id = args.donors + 1
+        seed_patient_requests(conn, patient_id, args.requests)
+        conn.close()
+        donor_roster.invalidate()
+
+        patient = auth_header(patient_id, "patient")
+        admin = auth_header(1, "admin")
+        emergency = {"blood_group": "O+", "units_required": 2, "latitude": 12.97, "longitude": 77.59}
+
+        async def list_requests(client):
+            return await client.get("/patient/requests", headers=patient)
+
+        async def create_emergency(client):
+            return await client.post("/emergency/create", json=emergency, headers=admin)
+
+        # Mock WhatsApp sends print every message
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = {
+                "/patient/requests": run_load(app, list_requests, args.concurrency, args.duration),
+                "/emergency/create": run_load(app, create_emergency, args.concurrency, args.duration),
+            }
+
+        for route, stats in results.items():
+            print(f"{label:<10} {route:<20} {stats['rps']:>8} req/s  p50 {stats['p50_ms']:>7}ms  "
+                  f"p95 {stats['p95_ms']:>7}ms  errors {stats['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--donors", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    run_mode("unpooled", 0, args)
+    run_mode("pooled", 16, args)
+
+
+if __name__ == "__main__":
+    main()
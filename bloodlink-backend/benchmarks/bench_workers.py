@@ -0,0 +1,235 @@
+# Multi-worker scaling: the real server (gunicorn.conf.py) on one seeded
+# database, at 1..N workers, under mixed read/write traffic over TCP from
+# separate client processes. Reports req/s and latency per worker count and
+# the speedup over one worker.
+#
+#   cd bloodlink-backend
+#   python -m benchmarks.bench_workers --workers 1 2 4 8 --duration 10
+#
+# Reads: /hospital/requests, /patient/requests, /bloodbank/inventory and
+# /admin/stats. Writes (--write-ratio): /requests/create and
+# /bloodbank/inventory. Keep client processes off the cores the server uses
+# (--clients) or the numbers measure the load generator.
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.bench_matching import BLOOD_GROUPS, METROS
+from benchmarks.load import auth_header, percentile
+from benchmarks.seed import seed_database, user_ids
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _senders(ids, rng):
+    patients = [auth_header(uid, "patient") for uid in ids["patient"][:200]]
+    hospitals = [auth_header(uid, "hospital") for uid in ids["hospital"]]
+    bank_headers = [auth_header(bank_id, "bloodbank") for bank_id in ids["bloodbank"][:200]]
+    admin = auth_header(ids["admin"][0], "admin")
+
+    def location():
+        lat, lon = rng.choice(METROS)
+        return lat + rng.gauss(0, 0.2), lon + rng.gauss(0, 0.2)
+
+    async def hospital_requests(client):
+        params = {"limit": 50}
+        if rng.random() < 0.5:
+            params["status"] = "pending"
+        return await client.get("/hospital/requests", params=params, headers=rng.choice(hospitals))
+
+    async def patient_requests(client):
+        return await client.get("/patient/requests", params={"limit": 20}, headers=rng.choice(patients))
+
+    async def bank_inventory(client):
+        return await client.get("/bloodbank/inventory", params={"view": "summary"}, headers=rng.choice(bank_headers))
+
+    async def admin_stats(client):
+        return await client.get("/admin/stats", headers=admin)
+
+    async def create_request(client):
+        lat, lon = location()
+        return await client.post("/requests/create", headers=rng.choice(patients), json={
+            "blood_group": rng.choice(BLOOD_GROUPS),
+            "units_required": rng.randint(1, 4),
+            "request_type": "immediate",
+            "latitude": lat,
+            "longitude": lon
+        })
+
+    async def update_inventory(client):
+        return await client.post("/bloodbank/inventory", headers=rng.choice(bank_headers), json={
+            "blood_group": rng.choice(BLOOD_GROUPS),
+            "units_available": rng.randint(0, 50)
+        })
+
+    reads = (hospital_requests, patient_requests, bank_inventory, admin_stats)
+    writes = (create_request, update_inventory)
+    return reads, writes
+
+
+async def _drive(base_url, ids, concurrency, duration, write_ratio, seed):
+    rng = random.Random(seed)
+    reads, writes = _senders(ids, rng)
+    samples = {"read": [], "write": []}
+    errors = 0
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                kind = "write" if rng.random() < write_ratio else "read"
+                send = rng.choice(writes if kind == "write" else reads)
+                start = time.perf_counter()
+                try:
+                    response = await send(client)
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                samples[kind].append((time.perf_counter() - start) * 1000)
+                errors += failed
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return samples, errors, elapsed
+
+
+def _client_process(args):
+    return asyncio.run(_drive(*args))
+
+
+def _wait_ready(base_url, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            if httpx.get(base_url + "/", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def _summary(samples_ms, seconds):
+    samples_ms = sorted(samples_ms)
+    return {
+        "requests": len(samples_ms),
+        "rps": round(len(samples_ms) / seconds, 1) if seconds else 0.0,
+        "p50_ms": round(percentile(samples_ms, 50), 2),
+        "p95_ms": round(percentile(samples_ms, 95), 2),
+        "p99_ms": round(percentile(samples_ms, 99), 2),
+    }
+
+
+def run_workers(db_path, workers, args, ids):
+    port = args.port
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(
+        os.environ,
+        BLOODLINK_DB_PATH=str(db_path),
+        BLOODLINK_WORKERS=str(workers),
+        BLOODLINK_BIND=f"127.0.0.1:{port}",
+        BLOODLINK_METRICS="0",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    try:
+        _wait_ready(base_url, server)
+        time.sleep(1.0)  # let every worker finish booting
+
+        jobs = [
+            (base_url, ids, args.concurrency, args.duration, args.write_ratio, args.seed + i)
+            for i in range(args.clients)
+        ]
+        with multiprocessing.Pool(args.clients) as pool:
+            results = pool.map(_client_process, jobs)
+    finally:
+        server.terminate()
+        server.wait(30)
+
+    elapsed = max(seconds for _, _, seconds in results)
+    reads = [ms for samples, _, _ in results for ms in samples["read"]]
+    writes = [ms for samples, _, _ in results for ms in samples["write"]]
+    return {
+        "workers": workers,
+        "errors": sum(errors for _, errors, _ in results),
+        "total": _summary(reads + writes, elapsed),
+        "read": _summary(reads, elapsed),
+        "write": _summary(writes, elapsed),
+    }
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, cores} & set(range(1, cores + 1))))
+    parser.add_argument("--clients", type=int, default=2, help="load generator processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="connections per client process")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per worker count")
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--donors", type=int, default=50_000)
+    parser.add_argument("--patients", type=int, default=1_000)
+    parser.add_argument("--hospitals", type=int, default=50)
+    parser.add_argument("--banks", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--port", type=int, default=8950)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    from app import database
+
+    print(f"cores: {cores}  clients: {args.clients} x {args.concurrency}  write ratio: {args.write_ratio}")
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        database.DB_PATH = db_path
+        database.init_db()
+        conn = database.get_connection()
+        print("seeded:", seed_database(
+            conn, args.donors, args.patients, args.hospitals, args.banks, requests=args.requests, seed=args.seed
+        ))
+        conn.close()
+        ids = user_ids(args.hospitals, args.patients, args.donors, args.banks)
+
+        for workers in args.workers:
+            result = run_workers(db_path, workers, args, ids)
+            results.append(result)
+            speedup = result["total"]["rps"] / results[0]["total"]["rps"] if results[0]["total"]["rps"] else 0.0
+            print(f"workers {workers:>2}  {result['total']['rps']:>8} req/s  x{speedup:.2f}  "
+                  f"read p50 {result['read']['p50_ms']:>7}ms p99 {result['read']['p99_ms']:>8}ms  "
+                  f"write p50 {result['write']['p50_ms']:>7}ms p99 {result['write']['p99_ms']:>8}ms  "
+                  f"errors {result['errors']}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"cores": cores, "params": vars(args), "results": results}, indent=2) + "\n")
+        print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
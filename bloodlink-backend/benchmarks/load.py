@@ -0,0 +1,60 @@
+# In-process ASGI load driver shared by the API benchmarks.
+
+import asyncio
+import time
+
+import httpx
+
+
+def auth_header(user_id, role):
+    from app.routers.auth import create_access_token
+
+    token = create_access_token({"user_id": user_id, "role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def percentile(sorted_samples, pct):
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(len(sorted_samples) * pct / 100))
+    return sorted_samples[index]
+
+
+async def _drive(app, send, concurrency, duration):
+    latencies = []
+    errors = 0
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await send(client)
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code >= 400:
+                    errors += 1
+                # A socket would yield here; ASGITransport does not, so a
+                # handler that never awaits (cache hit) would starve the others
+                await asyncio.sleep(0)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def run_load(app, send, concurrency=32, duration=5.0):
+    # send: async callable taking an httpx.AsyncClient, returning the response
+    return asyncio.run(_drive(app, send, concurrency, duration))
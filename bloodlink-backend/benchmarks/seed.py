@@ -0,0 +1,145 @@
+# Synthetic BloodLink database at a configurable scale, written with batched
+# executemany() calls (one transaction per table). Shared by the API suite.
+#
+#   cd bloodlink-backend
+#   python -m benchmarks.seed /tmp/bench.db --donors 100000 --banks 2000
+
+import argparse
+import itertools
+import random
+import time
+from datetime import date, timedelta
+
+from benchmarks.bench_matching import BLOOD_GROUPS, METROS, last_donation
+
+SEED_BATCH_SIZE = 5000
+REQUEST_STATUSES = ("pending", "approved", "rejected", "fulfilled", "cancelled")
+
+
+def _insert(conn, sql, rows):
+    # rows: any iterable; fed in SEED_BATCH_SIZE chunks so memory stays flat
+    rows = iter(rows)
+    total = 0
+    while True:
+        batch = list(itertools.islice(rows, SEED_BATCH_SIZE))
+        if not batch:
+            break
+        conn.executemany(sql, batch)
+        total += len(batch)
+    conn.commit()
+    return total
+
+
+def _near_metro(rng, spread):
+    lat, lon = rng.choice(METROS)
+    return lat + rng.gauss(0, spread), lon + rng.gauss(0, spread)
+
+
+def seed_database(conn, donors=10_000, patients=1_000, hospitals=50, banks=500,
+                  lots_per_bank=16, requests=20_000, seed=42):
+    # Returns {table: rows} plus timings. Users get ids in insertion order:
+    # admin 1, hospitals 2.., patients next, then donors, then blood banks.
+    # Inventory is keyed by the bloodbank user, as the bloodbank routes write it.
+    rng = random.Random(seed)
+    counts = {}
+    start = time.perf_counter()
+
+    user_sql = """
+        INSERT INTO users (google_id, role, name, email, phone, blood_group, city, latitude, longitude,
+                           last_donation_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    def users(role, count):
+        for i in range(count):
+            lat, lon = _near_metro(rng, 0.3)
+            yield (
+                f"seed-{role}-{i}",
+                role,
+                f"{role.title()} {i}",
+                f"{role}{i}@seed.local",
+                "+910000000000",
+                rng.choice(BLOOD_GROUPS),
+                "Seed",
+                lat,
+                lon,
+                last_donation(rng) if role == "donor" else None
+            )
+
+    counts["admins"] = _insert(conn, user_sql, users("admin", 1))
+    counts["hospitals"] = _insert(conn, user_sql, users("hospital", hospitals))
+    counts["patients"] = _insert(conn, user_sql, users("patient", patients))
+    counts["donors"] = _insert(conn, user_sql, users("donor", donors))
+    counts["blood_banks"] = _insert(conn, user_sql, users("bloodbank", banks))
+    first_bank = 2 + hospitals + patients + donors
+
+    # One expiry per lot index keeps (bank, group, expiry) unique
+    counts["blood_inventory"] = _insert(conn, """
+        INSERT INTO blood_inventory (blood_bank_id, blood_group, units_available, expiry_date)
+        VALUES (?, ?, ?, ?)
+    """, (
+        (bank_id, BLOOD_GROUPS[lot % 8], rng.randint(0, 40), str(date(2099, 1, 1) + timedelta(days=lot)))
+        for bank_id in range(first_bank, first_bank + banks)
+        for lot in range(lots_per_bank)
+    ))
+
+    first_patient = 2 + hospitals
+    counts["patient_requests"] = _insert(conn, """
+        INSERT INTO patient_requests
+        (patient_id, blood_group, units_required, request_type, status, created_at)
+        VALUES (?, ?, ?, 'immediate', ?, ?)
+    """, (
+        (
+            rng.randrange(first_patient, first_patient + patients),
+            rng.choice(BLOOD_GROUPS),
+            rng.randint(1, 4),
+            rng.choice(REQUEST_STATUSES),
+            f"2025-{1 + i * 12 // max(requests, 1):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:00:00"
+        )
+        for i in range(requests)
+    ))
+
+    counts["seed_seconds"] = round(time.perf_counter() - start, 2)
+    return counts
+
+
+def user_ids(hospitals=50, patients=1_000, donors=10_000, banks=500):
+    # Ids assigned by seed_database for the same sizes
+    first_patient = 2 + hospitals
+    first_bank = first_patient + patients + donors
+    return {
+        "admin": [1],
+        "hospital": list(range(2, first_patient)),
+        "patient": list(range(first_patient, first_patient + patients)),
+        "bloodbank": list(range(first_bank, first_bank + banks)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", help="database file to create (or extend)")
+    parser.add_argument("--donors", type=int, default=10_000)
+    parser.add_argument("--patients", type=int, default=1_000)
+    parser.add_argument("--hospitals", type=int, default=50)
+    parser.add_argument("--banks", type=int, default=500)
+    parser.add_argument("--lots-per-bank", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from pathlib import Path
+    from app import database
+
+    database.DB_PATH = Path(args.path)
+    database.init_db()
+    conn = database.get_connection()
+    counts = seed_database(
+        conn, args.donors, args.patients, args.hospitals, args.banks,
+        args.lots_per_bank, args.requests, args.seed
+    )
+    conn.close()
+    print(counts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+# API benchmark suite: seeds a synthetic database, drives the main routes
+# in-process with concurrent ASGI clients and writes p50/p95/p99 and
+# throughput per route to JSON, so runs can be compared across commits.
+#
+#   cd bloodlink-backend
+#   python -m benchmarks.suite --output bench-main.json
+#   python -m benchmarks.suite --output bench-branch.json --compare bench-main.json
+#
+# Google sign-in uses a locally generated RSA key served through
+# StaticKeySource, so /auth/google-login runs its real verification path
+# without network access.
+
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+from benchmarks.bench_matching import BLOOD_GROUPS, METROS
+from benchmarks.load import auth_header, percentile, run_load
+from benchmarks.seed import seed_database, user_ids
+
+ROUTES = ("google_login", "requests_create", "emergency_create", "hospital_requests", "admin_stats")
+
+
+# -----------------------------
+# Stubbed Google verifier
+# -----------------------------
+def google_token_factory(client_id):
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from google.auth import crypt, jwt as google_jwt
+    from app.services.google_auth_service import StaticKeySource, set_key_source
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    )
+    public_pem = key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+
+    set_key_source(StaticKeySource({"bench": public_pem.decode()}))
+    signer = crypt.RSASigner.from_string(private_pem, key_id="bench")
+
+    def make_token(index):
+        now = int(time.time())
+        return google_jwt.encode(signer, {
+            "iss": "https://accounts.google.com",
+            "aud": client_id,
+            "sub": f"bench-google-{index}",
+            "email": f"bench{index}@gmail.test",
+            "name": f"Bench User {index}",
+            "iat": now,
+            "exp": now + 3600,
+        }).decode()
+
+    return make_token
+
+
+# -----------------------------
+# Route drivers
+# -----------------------------
+def route_senders(ids, login_users):
+    from app.routers.auth import GOOGLE_CLIENT_ID
+
+    make_token = google_token_factory(GOOGLE_CLIENT_ID)
+    # Half new sign-ups, half returning users (insert vs update path)
+    google_tokens = [make_token(i % max(login_users // 2, 1) if i % 2 else i) for i in range(login_users)]
+
+    patients = [auth_header(user_id, "patient") for user_id in ids["patient"]]
+    hospitals = [auth_header(user_id, "hospital") for user_id in ids["hospital"]]
+    admin = auth_header(ids["admin"][0], "admin")
+    rng = random.Random(7)
+    counter = {"n": 0}
+
+    def next_index():
+        counter["n"] += 1
+        return counter["n"]
+
+    def location():
+        lat, lon = rng.choice(METROS)
+        return lat + rng.gauss(0, 0.2), lon + rng.gauss(0, 0.2)
+
+    async def google_login(client):
+        token = google_tokens[next_index() % len(google_tokens)]
+        return await client.post("/auth/google-login", json={
+            "token": token,
+            "role": "patient",
+            "blood_group": rng.choice(BLOOD_GROUPS),
+            "city": "Bengaluru"
+        })
+
+    async def requests_create(client):
+        lat, lon = location()
+        return await client.post("/requests/create", headers=patients[next_index() % len(patients)], json={
+            "blood_group": rng.choice(BLOOD_GROUPS),
+            "units_required": rng.randint(1, 4),
+            "request_type": "immediate",
+            "latitude": lat,
+            "longitude": lon
+        })
+
+    async def emergency_create(client):
+        lat, lon = location()
+        return await client.post("/emergency/create", headers=admin, json={
+            "blood_group": rng.choice(BLOOD_GROUPS),
+            "units_required": rng.randint(1, 6),
+            "latitude": lat,
+            "longitude": lon
+        })
+
+    async def hospital_requests(client):
+        params = {"limit": 50}
+        if next_index() % 2:
+            params["status"] = "pending"
+        return await client.get(
+            "/hospital/requests",
+            params=params,
+            headers=hospitals[counter["n"] % len(hospitals)]
+        )
+
+    async def admin_stats(client):
+        return await client.get("/admin/stats", headers=admin)
+
+    return {
+        "google_login": google_login,
+        "requests_create": requests_create,
+        "emergency_create": emergency_create,
+        "hospital_requests": hospital_requests,
+        "admin_stats": admin_stats,
+    }
+
+
+# -----------------------------
+# Microbenchmarks
+# -----------------------------
+def _latency_summary(samples_ms):
+    samples_ms.sort()
+    return {
+        "calls": len(samples_ms),
+        "p50_ms": round(percentile(samples_ms, 50), 4),
+        "p95_ms": round(percentile(samples_ms, 95), 4),
+        "p99_ms": round(percentile(samples_ms, 99), 4),
+        "mean_ms": round(statistics.fmean(samples_ms), 4),
+    }
+
+
+def micro_benchmarks(queries):
+    from app.services import matching_service
+    from app.services.matching_service import calculate_distance, find_matching_donors
+
+    results = {}
+
+    number = 200_000
+    seconds = min(timeit.repeat(
+        "calculate_distance(12.97, 77.59, 13.08, 80.27)",
+        globals={"calculate_distance": calculate_distance},
+        number=number,
+        repeat=5
+    ))
+    results["calculate_distance"] = {
+        "calls": number,
+        "ns_per_call": round(seconds / number * 1e9, 1),
+    }
+
+    rng = random.Random(11)
+    points = []
+    for _ in range(queries):
+        lat, lon = rng.choice(METROS)
+        points.append((rng.choice(BLOOD_GROUPS), lat + rng.gauss(0, 0.2), lon + rng.gauss(0, 0.2)))
+
+    roster_enabled = matching_service.DONOR_ROSTER_ENABLED
+    try:
+        for label, enabled in (("find_matching_donors", True), ("find_matching_donors_sqlite", False)):
+            matching_service.DONOR_ROSTER_ENABLED = enabled
+            find_matching_donors(*points[0])  # warm the roster partition / page cache
+
+            samples = []
+            for blood_group, lat, lon in points:
+                start = time.perf_counter()
+                find_matching_donors(blood_group, lat, lon)
+                samples.append((time.perf_counter() - start) * 1000)
+            results[label] = _latency_summary(samples)
+    finally:
+        matching_service.DONOR_ROSTER_ENABLED = roster_enabled
+
+    return results
+
+
+# -----------------------------
+# Report
+# -----------------------------
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline):
+    print(f"\nvs {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')})")
+    print(f"{'route':<28}{'p50 ms':>20}{'p99 ms':>20}{'req/s':>22}")
+
+    def delta(new, old):
+        if not old:
+            return f"{new:>10}"
+        return f"{new:>10} ({(new - old) / old * 100:+5.0f}%)"
+
+    for name, stats in current["routes"].items():
+        old = baseline["routes"].get(name)
+        if old is None:
+            continue
+        print(f"{name:<28}{delta(stats['p50_ms'], old['p50_ms']):>20}"
+              f"{delta(stats['p99_ms'], old['p99_ms']):>20}{delta(stats['rps'], old['rps']):>22}")
+
+    for name, stats in current["micro"].items():
+        old = baseline["micro"].get(name)
+        if old is None:
+            continue
+        key = "ns_per_call" if "ns_per_call" in stats else "p50_ms"
+        print(f"{name:<28}{key:>10} {delta(stats[key], old[key])}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--donors", type=int, default=50_000)
+    parser.add_argument("--patients", type=int, default=1_000)
+    parser.add_argument("--hospitals", type=int, default=50)
+    parser.add_argument("--banks", type=int, default=500)
+    parser.add_argument("--lots-per-bank", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per route")
+    parser.add_argument("--routes", nargs="+", choices=ROUTES, default=list(ROUTES))
+    parser.add_argument("--login-users", type=int, default=500)
+    parser.add_argument("--micro-queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench-results.json")
+    parser.add_argument("--compare", help="earlier --output file to diff against")
+    args = parser.parse_args()
+
+    from app import database
+    from app.main import app
+    from app.services import donor_roster
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "params": vars(args),
+        },
+        "routes": {},
+        "micro": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = Path(tmp) / "bench.db"
+        database.init_db()
+
+        conn = database.get_connection()
+        report["seed"] = seed_database(
+            conn, args.donors, args.patients, args.hospitals, args.banks,
+            args.lots_per_bank, args.requests, args.seed
+        )
+        conn.close()
+        donor_roster.invalidate()
+        print("seeded:", report["seed"])
+
+        senders = route_senders(user_ids(args.hospitals, args.patients), args.login_users)
+        for name in args.routes:
+            stats = run_load(app, senders[name], args.concurrency, args.duration)
+            report["routes"][name] = stats
+            print(f"{name:<20} {stats['rps']:>9} req/s  p50 {stats['p50_ms']:>8}ms  "
+                  f"p95 {stats['p95_ms']:>8}ms  p99 {stats['p99_ms']:>8}ms  errors {stats['errors']}")
+
+        report["micro"] = micro_benchmarks(args.micro_queries)
+        for name, stats in report["micro"].items():
+            print(f"{name:<28} {stats}")
+
+    Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    print(f"wrote {args.output}")
+
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# Multi-worker deployment:
+#
+#   cd bloodlink-backend
+#   gunicorn -c gunicorn.conf.py app.main:app
+#
+# Migrations run once in the master before any worker starts. Workers share
+# bloodlink.db: writes queue on one writer lock across processes (see
+# database.write_lock) while reads stay parallel under WAL, and each worker
+# polls PRAGMA data_version to drop cache entries other workers made stale
+# and to replay their live events (app/services/change_watcher.py).
+
+import multiprocessing
+import os
+
+bind = os.getenv("BLOODLINK_BIND", "0.0.0.0:8000")
+
+# Workers read the same variable to switch on cross-process invalidation
+workers = int(os.environ.setdefault("BLOODLINK_WORKERS", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# Each worker opens its own pool, executors and background threads after
+# the fork; a preloaded app would share SQLite handles across processes
+preload_app = False
+
+# Worker liveness check, not a request limit: SSE streams may stay open
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+
+
+def on_starting(server):
+    from app.migrations import migrate
+
+    migrate()
+    # Workers only check that nothing is pending
+    os.environ["BLOODLINK_MIGRATE_ON_STARTUP"] = "0"